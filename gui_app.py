@@ -18,7 +18,7 @@ if project_root_for_imports not in sys.path:
 # --- PySide6 Imports ---
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLineEdit, QLabel, QTableWidget, QTableWidgetItem,
+    QPushButton, QLineEdit, QLabel, QTableWidget, QTableWidgetItem, QTableView,
     QMessageBox, QHeaderView, QInputDialog, QDialog, QFormLayout, QComboBox,
     QDateEdit, QSpinBox, QStackedWidget, QCompleter, QStatusBar,
     QCheckBox, QGroupBox, QFileDialog, QColorDialog, QStyle, QListWidget, QListWidgetItem, QDoubleSpinBox, QMenu
@@ -27,19 +27,11 @@ from PySide6.QtCore import Qt, QSize, QDate, QStringListModel, Signal, QTimer
 from PySide6.QtGui import QIcon, QFont, QBrush, QColor, QPalette, QPixmap, QAction, QShortcut # Importa QShortcut
 
 # --- Local Imports ---
-from config.settings import DATA_DIR, BACKUP_DIR, REPORTS_DIR, MIN_STOCK_THRESHOLD
+from config.settings import DATA_DIR, BACKUP_DIR, REPORTS_DIR, MIN_STOCK_THRESHOLD, DB_PAGE_SIZE, COMPLETER_MAX_RESULTS
 from config.user_roles import UserRole
 from models.user_model import User
-from models.customer_model import Customer
-from models.supplier_model import Supplier
-from models.part_model import Part
-from models.sale_model import Sale, SaleItem
-from models.service_order_model import ServiceOrder, ServiceOrderItem
-from models.financial_transaction_model import FinancialTransaction
-from models.notification_model import Notification
-from models.report_model import Report
-from models.settings_model import Setting
-from models.base_model import get_db_connection
+from models.sale_model import Sale
+from models.migrations import ensure_schema
 from modules.user_manager import UserManager
 from modules.customer_manager import CustomerManager
 from modules.supplier_manager import SupplierManager
@@ -53,8 +45,28 @@ from modules.settings_manager import SettingsManager
 from utils.api_integrations import APIIntegrations
 from utils.email_sender import send_email
 from utils.logger_config import logger
-from utils.helpers import is_valid_email, is_valid_phone
+from utils.helpers import is_valid_email, is_valid_phone, fold_text
 from utils.backup_restore import create_backup, restore_backup, get_available_backups
+from utils.decorators import query_budget
+from utils.table_models import RecordTableModel
+from utils.search_controller import SearchController
+from utils.completion_index import CompletionIndex, PrefixSearch
+
+# --- Projeções de colunas usadas por listas e completers (apenas o que é exibido) ---
+PART_COMPLETER_FIELDS = ("name", "part_number", "manufacturer", "original_code", "barcode", "stock")
+USER_LIST_FIELDS = ("username", "role", "is_active")  # Nunca carrega password_hash para exibição
+
+# --- Cores de fundo das linhas nas listagens (RecordTableModel) ---
+LOW_STOCK_BACKGROUND = QColor(255, 50, 50)
+LOW_STOCK_SEARCH_BACKGROUND = QColor(255, 200, 200)
+UNREAD_NOTIFICATION_BACKGROUND = QColor(255, 255, 200)
+
+
+def part_completer_text(id, name, part_number, manufacturer, original_code, barcode, stock):
+    """Texto de uma peça no completer da venda (valores na ordem de PART_COMPLETER_FIELDS, após o id)."""
+    return (f"ID: {id} - {name} (Nº Peça: {part_number}) - Fab: {manufacturer or 'N/A'} - "
+            f"Cód. Orig: {original_code or 'N/A'} - Barras: {barcode or 'N/A'} - Est: {stock}")
+
 
 # --- CUSTOM WIDGET FOR UPPERCASE INPUT ---
 class UppercaseLineEdit(QLineEdit):
@@ -622,20 +634,36 @@ class PartSearchDialog(QDialog):
 
         search_layout = QHBoxLayout()
         self.search_input = QLineEdit(placeholderText="Buscar por nome, número da peça, fabricante, código de barras...")
-        self.search_input.textChanged.connect(self._load_parts) # Conecta a busca em tempo real
         search_layout.addWidget(self.search_input)
         main_layout.addLayout(search_layout)
 
-        self.parts_table = QTableWidget()
-        self.parts_table.setColumnCount(7) # Ajustado para exibir informações relevantes
-        self.parts_table.setHorizontalHeaderLabels(["ID", "Nome", "Nº Peça", "Fabricante", "Estoque", "Preço", "Localização"])
+        self.parts_table = QTableView()
+        self.parts_table.setModel(RecordTableModel([
+            ("ID", lambda part: part.id),
+            ("Nome", lambda part: part.name),
+            ("Nº Peça", lambda part: part.part_number),
+            ("Fabricante", lambda part: part.manufacturer),
+            ("Estoque", lambda part: part.stock),
+            ("Preço", lambda part: f"R$ {part.price:.2f}", Qt.AlignRight | Qt.AlignVCenter),
+            ("Localização", lambda part: part.location),
+        ], row_background=lambda part: LOW_STOCK_SEARCH_BACKGROUND if part.stock <= part.min_stock else None, parent=self))
         self.parts_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
-        self.parts_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.parts_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.parts_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.parts_table.setSelectionBehavior(QTableView.SelectRows)
+        self.parts_table.setSelectionMode(QTableView.SingleSelection)
+        self.parts_table.setEditTriggers(QTableView.NoEditTriggers)
         self.parts_table.doubleClicked.connect(self._on_part_double_clicked) # Seleciona ao dar duplo clique
         main_layout.addWidget(self.parts_table)
 
+        # Sugestões "Você quis dizer" (busca tolerante a erros), exibidas só quando a busca não acha nada
+        self.suggestions_label = QLabel("Nenhuma peça encontrada. Você quis dizer:")
+        self.suggestions_list = QListWidget()
+        self.suggestions_list.setMaximumHeight(150)
+        self.suggestions_list.itemDoubleClicked.connect(self._on_suggestion_double_clicked)
+        main_layout.addWidget(self.suggestions_label)
+        main_layout.addWidget(self.suggestions_list)
+        self.suggestions_label.hide()
+        self.suggestions_list.hide()
+
         buttons_layout = QHBoxLayout()
         self.select_button = QPushButton("Selecionar")
         self.select_button.clicked.connect(self._select_part)
@@ -646,33 +674,55 @@ class PartSearchDialog(QDialog):
         buttons_layout.addWidget(self.cancel_button)
         main_layout.addLayout(buttons_layout)
 
+        # Busca em tempo real como nas telas da janela principal: consulta quando o usuário para de
+        # digitar, fora da thread da interface, e só exibe o resultado da busca mais recente
+        self.search_controller = SearchController(parent=self)
+        self.search_controller.register("peças", self.search_input, self._search_parts, self._show_parts)
         self._load_parts() # Carrega as peças iniciais
 
     def _load_parts(self):
         """Carrega e exibe as peças na tabela, aplicando o filtro de busca."""
+        self.search_controller.refresh("peças")
+
+    def _search_parts(self):
+        """
+        Consulta da busca digitada: as peças encontradas e, se nenhuma for, as sugestões
+        "Você quis dizer" (busca tolerante a erros), ambas fora da thread da interface.
+        """
         query = self.search_input.text()
-        self.parts_table.setRowCount(0)
-        
-        parts = self.stock_manager.search_parts(query) if query else self.stock_manager.get_all_parts()
-        
-        for row_idx, part in enumerate(parts):
-            self.parts_table.insertRow(row_idx)
-            self.parts_table.setItem(row_idx, 0, QTableWidgetItem(str(part.id)))
-            self.parts_table.setItem(row_idx, 1, QTableWidgetItem(part.name))
-            self.parts_table.setItem(row_idx, 2, QTableWidgetItem(part.part_number))
-            self.parts_table.setItem(row_idx, 3, QTableWidgetItem(part.manufacturer))
-            self.parts_table.setItem(row_idx, 4, QTableWidgetItem(str(part.stock)))
-            table_item_price = QTableWidgetItem(f"R$ {part.price:.2f}")
-            table_item_price.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.parts_table.setItem(row_idx, 5, table_item_price)
-            self.parts_table.setItem(row_idx, 6, QTableWidgetItem(part.location))
-            
-            # Opcional: Destacar peças com estoque baixo
-            if part.stock <= part.min_stock:
-                for col in range(self.parts_table.columnCount()):
-                    item = self.parts_table.item(row_idx, col)
-                    if item:
-                        item.setBackground(QColor(255, 200, 200)) # Cor de fundo para estoque baixo
+        if not query:
+            return lambda: (query, [], [])
+
+        def search():
+            parts = self.stock_manager.search_parts(query)
+            return query, parts, [] if parts else self.stock_manager.fuzzy_search_parts(query)
+        return search
+
+    def _show_parts(self, result):
+        query, parts, suggestions = result
+        model = self.parts_table.model()
+        if query:
+            model.set_records(parts)
+        else:
+            # Sem filtro, as páginas vêm do catálogo em memória conforme a tabela rola
+            catalog = self.stock_manager.get_parts_catalog()
+            model.set_pages(lambda last, limit: catalog.page(last.id if last else None, limit))
+        self._show_suggestions(suggestions)
+
+    def _show_suggestions(self, suggestions):
+        """Preenche a lista "Você quis dizer" com os pares (peça, semelhança); uma lista vazia a esconde."""
+        self.suggestions_list.clear()
+        for part, score in suggestions:
+            item = QListWidgetItem(f"{part.name} - {part.part_number} ({score:.0%})")
+            item.setData(Qt.UserRole, part.id)
+            self.suggestions_list.addItem(item)
+        self.suggestions_label.setVisible(bool(suggestions))
+        self.suggestions_list.setVisible(bool(suggestions))
+
+    def _on_suggestion_double_clicked(self, item):
+        """Seleciona a peça sugerida e aceita o diálogo."""
+        self.selected_part = self.stock_manager.get_part_by_id(item.data(Qt.UserRole))
+        self.accept()
 
     def _on_part_double_clicked(self):
         """Lida com o duplo clique na tabela para selecionar a peça."""
@@ -682,12 +732,16 @@ class PartSearchDialog(QDialog):
         """Define a peça selecionada e aceita o diálogo."""
         selected_rows = self.parts_table.selectionModel().selectedRows()
         if selected_rows:
-            part_id = int(self.parts_table.item(selected_rows[0].row(), 0).text())
+            part_id = self.parts_table.model().record(selected_rows[0].row()).id
             self.selected_part = self.stock_manager.get_part_by_id(part_id)
             self.accept()
         else:
             QMessageBox.warning(self, "Nenhuma Peça Selecionada", "Por favor, selecione uma peça da lista.")
 
+    def done(self, result):
+        self.search_controller.cancel_all()  # Uma busca ainda em andamento não chega ao diálogo fechado
+        super().done(result)
+
 
 class AddEditSaleDialog(QDialog):
     """Diálogo para adicionar ou editar uma venda/orçamento."""
@@ -773,6 +827,8 @@ class AddEditSaleDialog(QDialog):
         part_search_layout = QHBoxLayout()
         self.part_search_input = QLineEdit(placeholderText="Código Fabricante/Original / Cód. Barras") # Campo de busca principal
         part_search_layout.addWidget(self.part_search_input)
+        # Leitores de código de barras "digitam" o código e enviam Enter
+        self.part_search_input.returnPressed.connect(self._on_part_code_entered)
         self.search_part_button = QPushButton("Buscar Peça") # Botão para abrir o diálogo de busca
         self.search_part_button.clicked.connect(self._open_part_search_dialog)
         part_search_layout.addWidget(self.search_part_button)
@@ -932,11 +988,16 @@ class AddEditSaleDialog(QDialog):
 
 
     def _load_customers(self):
-        self.customers_data = self.customer_manager.get_all_customers()
+        self.customers_data = self.customer_manager.get_all_customers(fields=("name", "cpf_cnpj"))
         customer_names = [c.name for c in self.customers_data]
         model = QStringListModel(customer_names)
         self.customer_completer.setModel(model)
         self.customer_combo.addItems(customer_names)
+        # Índice por prefixo do nome, CPF/CNPJ ou telefone (valor: id do cliente), consultado a cada tecla
+        self.customer_names_by_id = {c.id: c.name for c in self.customers_data}
+        self.customer_search = PrefixSearch(
+            [CompletionIndex(fold_text, self.customer_manager.get_completion_keys(), normalized=True)],
+            limit=COMPLETER_MAX_RESULTS)
 
     def _on_customer_selected(self, index):
         """Preenche o nome e CPF do cliente selecionado no QComboBox."""
@@ -952,25 +1013,32 @@ class AddEditSaleDialog(QDialog):
             self.customer_cpf_input.clear()
 
     def _update_customer_completer(self, text):
-        """Atualiza o completer de clientes com base no texto digitado."""
-        if not text:
-            filtered_customers = self.customer_manager.get_all_customers()
-        else:
-            filtered_customers = self.customer_manager.search_customers(text)
-        
-        customer_display_names = [c.name for c in filtered_customers]
+        """
+        Atualiza o completer de clientes com base no texto digitado: os primeiros nomes cujo nome,
+        CPF/CNPJ ou telefone começam com o texto, pelo índice em memória montado em _load_customers.
+        """
+        customer_display_names = [self.customer_names_by_id[customer_id] for customer_id in self.customer_search.complete(text)
+                                  if customer_id in self.customer_names_by_id]
         self.customer_completer.model().setStringList(customer_display_names)
 
 
     def _load_parts(self):
         """
-        Carrega todas as peças. Este método não preenche o completer diretamente,
-        mas sim o `self.parts_data` que será usado por `_update_part_completer`.
+        Garante o catálogo de peças em memória (lido do banco só na primeira vez no processo).
+        Este método não preenche o completer: isso é feito por `_update_part_completer`.
         """
-        self.parts_data = self.stock_manager.get_all_parts()
+        self.stock_manager.get_parts_catalog()
         # O modelo do completer será inicializado na primeira chamada de _update_part_completer
         # ou se o modelo for None.
 
+    def _part_prefix_search(self):
+        """Catálogo de peças e a busca por prefixo de nome/código do completer, refeita se o catálogo for relido."""
+        catalog = self.stock_manager.get_parts_catalog()
+        if getattr(self, '_part_search_catalog', None) is not catalog:
+            self._part_search = PrefixSearch(catalog.completion_indexes(), limit=COMPLETER_MAX_RESULTS)
+            self._part_search_catalog = catalog
+        return catalog, self._part_search
+
     def _open_part_search_dialog(self):
         """Abre o diálogo de busca de peças e processa a seleção."""
         dialog = PartSearchDialog(stock_manager=self.stock_manager, parent=self)
@@ -1002,10 +1070,42 @@ class AddEditSaleDialog(QDialog):
         self.part_search_input.setFocus()
 
 
+    def _on_part_code_entered(self):
+        """
+        Enter no campo de busca (leitor de código de barras ou código digitado no balcão):
+        tenta primeiro a busca exata por código (índices únicos) e adiciona a peça direto;
+        sem correspondência exata, cai na busca abrangente do completer.
+        """
+        text = self.part_search_input.text().strip()
+        if not text:
+            return
+        part = self.stock_manager.find_part_by_code(text)
+        if part is None:
+            self._update_part_completer(text)
+            if self.current_selected_part is None:
+                logger.info(f"Nenhuma peça com o código '{text}'; exibindo resultados da busca abrangente.")
+                return
+        else:
+            self._set_current_part(part)
+            logger.info(f"Peça '{part.name}' encontrada pelo código '{text}'.")
+        self.add_sale_item()
+
+    def _set_current_part(self, part):
+        """Preenche os detalhes da peça selecionada (objeto Part completo) na seção de consulta."""
+        self.part_description_label.setText(f"Descrição do Produto: {part.description or 'N/A'}")
+        self.part_stock_label.setText(f"Qtde Estoque: {part.stock}")
+        self.part_unit_price_label.setText(f"Preço Unitário: R$ {part.price:.2f}")
+        self.part_discount_label.setText("Desconto: R$ 0.00")
+        self.part_subtotal_label.setText(f"Sub-Total: R$ {part.price:.2f}")
+        self.current_selected_part = part
+
     def _update_part_completer(self, text):
         """
-        Atualiza o modelo do completer com base no texto digitado, usando a busca abrangente.
-        Este método é chamado pelo `textChanged` do `part_search_input`.
+        Atualiza o modelo do completer com base no texto digitado.
+        Um código exato (barras, nº da peça, original ou similar) é resolvido primeiro pelo
+        catálogo em memória; depois vêm as primeiras peças cujo nome ou código começa com o texto
+        (índice em memória). Só se nenhuma começar o banco é consultado: os códigos extras de
+        part_codes (fornecedor, OEM), que só existem nele, e então a busca abrangente.
         """
         if not hasattr(self, 'part_completer') or self.part_completer.model() is None:
             # Inicializa o completer se ainda não estiver configurado
@@ -1014,28 +1114,29 @@ class AddEditSaleDialog(QDialog):
             self.part_completer.setModel(QStringListModel())
             self.part_search_input.setCompleter(self.part_completer) # Conecta o completer ao QLineEdit
 
-        if not text:
-            filtered_parts = self.stock_manager.get_all_parts()
+        catalog, prefix_search = self._part_prefix_search()
+        exact_part = catalog.find_by_code(text) if text else None
+        if exact_part is not None:
+            filtered_parts = [exact_part]
         else:
-            filtered_parts = self.stock_manager.search_parts(text)
-        
+            filtered_parts = [catalog.get(part_id) for part_id in prefix_search.complete(text)]
+            if not filtered_parts and text:
+                exact_part = self.stock_manager.find_part_by_code(text, fields=PART_COMPLETER_FIELDS)
+                filtered_parts = ([exact_part] if exact_part is not None else
+                                  self.stock_manager.search_parts(text, fields=PART_COMPLETER_FIELDS))
+
+        # Só as peças exibidas (no máximo COMPLETER_MAX_RESULTS, fora a busca abrangente) viram texto
         part_display_names = [
-            f"ID: {p.id} - {p.name} (Nº Peça: {p.part_number}) - Fab: {p.manufacturer or 'N/A'} - "
-            f"Cód. Orig: {p.original_code or 'N/A'} - Barras: {p.barcode or 'N/A'} - Est: {p.stock}"
+            part_completer_text(p.id, *(getattr(p, field) for field in PART_COMPLETER_FIELDS))
             for p in filtered_parts
         ]
         
         self.part_completer.model().setStringList(part_display_names)
 
-        # Tenta preencher os detalhes da peça se houver uma correspondência única
-        if len(filtered_parts) == 1:
-            selected_part = filtered_parts[0]
-            self.part_description_label.setText(f"Descrição do Produto: {selected_part.description or 'N/A'}")
-            self.part_stock_label.setText(f"Qtde Estoque: {selected_part.stock}")
-            self.part_unit_price_label.setText(f"Preço Unitário: R$ {selected_part.price:.2f}")
-            self.part_discount_label.setText("Desconto: R$ 0.00") 
-            self.part_subtotal_label.setText(f"Sub-Total: R$ {selected_part.price:.2f}")
-            self.current_selected_part = selected_part
+        # Tenta preencher os detalhes da peça se houver uma correspondência exata ou única
+        if exact_part is not None or len(filtered_parts) == 1:
+            # O catálogo e o completer têm só as colunas exibidas; a peça escolhida é carregada por completo
+            self._set_current_part(self.stock_manager.get_part_by_id(filtered_parts[0].id))
         else:
             self.part_description_label.setText("Descrição do Produto: N/A")
             self.part_stock_label.setText("Qtde Estoque: N/A")
@@ -1264,8 +1365,12 @@ class AddEditServiceOrderItemDialog(QDialog):
         self.cancel_button.clicked.connect(self.reject)
 
     def _load_parts(self):
-        self.parts_data = self.stock_manager.get_all_parts()
-        part_display_names = [f"{p.name} ({p.part_number})" for p in self.parts_data]
+        # Texto exibido na lista -> id da peça, a partir do catálogo em memória
+        self.part_ids_by_text = {
+            f"{name} ({part_number})": part_id
+            for part_id, name, part_number in self.stock_manager.get_parts_catalog().records(("name", "part_number"))
+        }
+        part_display_names = list(self.part_ids_by_text)
         self.part_combo.addItem("NÃO SELECIONAR PEÇA (PARA SERVIÇO)", userData=None)
         self.part_combo.addItems(part_display_names)
         model = QStringListModel(part_display_names)
@@ -1286,7 +1391,14 @@ class AddEditServiceOrderItemDialog(QDialog):
         
         if not is_service:
             selected_part_text = self.part_combo.currentText().strip()
-            selected_part = next((p for p in self.parts_data if f"{p.name} ({p.part_number})" == selected_part_text), None)
+            # Código lido/digitado (barras, nº da peça, original ou similar) tem prioridade sobre o nome da lista;
+            # os códigos extras (fornecedor, OEM) só existem no banco e são consultados por último
+            catalog = self.stock_manager.get_parts_catalog()
+            selected_part = catalog.find_by_code(selected_part_text)
+            if selected_part is None and selected_part_text in self.part_ids_by_text:
+                selected_part = catalog.get(self.part_ids_by_text[selected_part_text])
+            if selected_part is None:
+                selected_part = self.stock_manager.find_part_by_code(selected_part_text, fields=("name", "part_number"))
             if selected_part:
                 part_id = selected_part.id
                 part_name = selected_part.name
@@ -1354,7 +1466,7 @@ class AddEditServiceOrderDialog(QDialog):
         if self.service_order:
             existing_items = self.service_order_manager.get_service_order_items(self.service_order.id)
             for item in existing_items:
-                item_dict = item.__dict__
+                item_dict = item.to_dict()
                 part_name = self.stock_manager.get_part_by_id(item.part_id).name if item.part_id else ""
                 item_dict['part_name'] = part_name
                 self.current_items.append(item_dict)
@@ -1447,14 +1559,14 @@ class AddEditServiceOrderDialog(QDialog):
         self.cancel_button.clicked.connect(self.reject)
 
     def _load_customers(self):
-        self.customers_data = self.customer_manager.get_all_customers()
+        self.customers_data = self.customer_manager.get_all_customers(fields=("name",))
         customer_names = [c.name for c in self.customers_data]
         model = QStringListModel(customer_names)
         self.customer_completer.setModel(model)
         self.customer_combo.addItems(customer_names)
 
     def _load_users(self):
-        users = self.user_manager.get_all_users()
+        users = self.user_manager.get_all_users(fields=("username",))
         for user in users: self.assigned_user_combo.addItem(user.username, userData=user.id)
 
     def _consult_plate(self):
@@ -1699,7 +1811,7 @@ class GenerateReportDialog(QDialog):
         self._toggle_filters_visibility()
 
     def _load_users_for_filter(self):
-        users = self.user_manager.get_all_users()
+        users = self.user_manager.get_all_users(fields=("username",))
         for user in users:
             self.os_assigned_user_combo.addItem(user.username, userData=user.id)
 
@@ -1772,75 +1884,20 @@ class MainApplication(QMainWindow):
 
 
     def _run_database_migrations(self):
-        logger.info("A executar migrações da base de dados, se necessário...")
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("SELECT entity_id, entity_type FROM notifications LIMIT 1")
-            logger.debug("Tabela 'notifications' já tem colunas entity_id, entity_type.")
-        except sqlite3.OperationalError:
-            logger.info("  - A migrar tabela 'notifications' (adicionando entity_id, entity_type)...")
-            try:
-                Notification._create_table()
-                
-                cursor.execute("PRAGMA table_info(notifications)")
-                cols = [col[1] for col in cursor.fetchall()]
-                if 'entity_id' not in cols:
-                    cursor.execute("ALTER TABLE notifications ADD COLUMN entity_id INTEGER")
-                if 'entity_type' not in cols:
-                    cursor.execute("ALTER TABLE notifications ADD COLUMN entity_type TEXT")
-                conn.commit()
-                logger.info("  - Migração da tabela 'notifications' concluída com sucesso.")
-            except sqlite3.Error as e:
-                logger.error(f"  - ERRO ao alterar a tabela 'notifications': {e}", exc_info=True)
-                conn.rollback()
-        
-        try:
-            cursor.execute("SELECT start_date, end_date, payment_status FROM service_orders LIMIT 1")
-            logger.debug("Tabela 'service_orders' já tem colunas de data e status de pagamento.")
-        except sqlite3.OperationalError:
-            logger.info("  - A migrar tabela 'service_orders' (adicionando start_date, end_date, payment_status)...")
-            try:
-                cursor.execute("ALTER TABLE service_orders ADD COLUMN start_date TEXT")
-                cursor.execute("ALTER TABLE service_orders ADD COLUMN end_date TEXT")
-                cursor.execute("ALTER TABLE service_orders ADD COLUMN payment_status TEXT DEFAULT 'Pendente'")
-                conn.commit()
-                logger.info("  - Migração da tabela 'service_orders' concluída com sucesso.")
-            except sqlite3.Error as e:
-                logger.error(f"  - ERRO ao alterar a tabela 'service_orders': {e}", exc_info=True)
-                conn.rollback()
-
-        # NOVA MIGRAÇÃO: Adicionar coluna 'is_quote' à tabela 'sales'
+        """
+        Aplica as migrações versionadas pendentes (models/migrations.py) em uma única transação.
+        Com o banco já atualizado, custa apenas a leitura da tabela 'schema_version'.
+        """
+        logger.info("A verificar a versão do esquema da base de dados...")
         try:
-            cursor.execute("SELECT is_quote FROM sales LIMIT 1")
-            logger.debug("Tabela 'sales' já tem a coluna 'is_quote'.")
-        except sqlite3.OperationalError:
-            logger.info("  - A migrar tabela 'sales' (adicionando is_quote)...")
-            try:
-                cursor.execute("ALTER TABLE sales ADD COLUMN is_quote BOOLEAN DEFAULT 0")
-                conn.commit()
-                logger.info("  - Migração da tabela 'sales' (is_quote) concluída com sucesso.")
-            except sqlite3.Error as e:
-                logger.error(f"  - ERRO ao alterar a tabela 'sales' (is_quote): {e}", exc_info=True)
-                conn.rollback()
-
-
-        conn.close()
-        self._create_db_tables_if_not_exist()
+            applied = ensure_schema()
+            if applied:
+                logger.info(f"  - Migrações aplicadas: {applied}")
+        except sqlite3.Error as e:
+            logger.critical(f"Erro CRÍTICO ao migrar a base de dados: {e}", exc_info=True)
+            print(f"Erro ao migrar a base de dados: {e}")
         logger.info("Verificação e migração de tabelas de banco de dados concluídas.")
 
-
-    def _create_db_tables_if_not_exist(self):
-        models = [User, Customer, Supplier, Part, Sale, SaleItem, ServiceOrder, ServiceOrderItem, FinancialTransaction, Notification, Report, Setting]
-        for model in models:
-            try:
-                model._create_table()
-                logger.debug(f"Verificada/criada tabela para o modelo: {model.__name__}")
-            except Exception as e:
-                logger.critical(f"Erro CRÍTICO ao criar tabela para {model.__name__}: {e}", exc_info=True)
-                print(f"Erro ao criar tabela para {model.__name__}: {e}")
-
     def _load_and_apply_settings(self):
         theme_color = self.settings_manager.get_setting("theme_color", "#0d47a1")
         self._apply_theme(theme_color)
@@ -1867,7 +1924,7 @@ class MainApplication(QMainWindow):
             QPushButton {{ background-color: {base_color_hex}; color: white; font-weight: bold; border: none; padding: 8px 12px; border-radius: 3px; }}
             QPushButton:hover {{ background-color: {self._adjust_color(base_color_hex, 20)}; }}
             QPushButton:pressed {{ background-color: {self._adjust_color(base_color_hex, 40)}; }}
-            QTableWidget {{ background-color: #313335; border: 1px solid #4a4d4f; gridline-color: #4a4d4f; selection-background-color: {base_color_hex}; }}
+            QTableView {{ background-color: #313335; border: 1px solid #4a4d4f; gridline-color: #4a4d4f; selection-background-color: {base_color_hex}; }}
             QHeaderView::section {{ background-color: #45494a; padding: 5px; border: 1px solid #4a4d4f; font-weight: bold; }}
             QWidget#sidebar {{ background-color: #313335; }}
             QWidget#sidebar QPushButton {{ text-align: left; padding: 12px; border: none; font-size: 11pt; color: #d3d3d3; background-color: transparent; }}
@@ -2067,10 +2124,10 @@ class MainApplication(QMainWindow):
         controls_layout.addWidget(delete_button)
         layout.addWidget(controls_group)
 
-        table = QTableWidget()
+        table = QTableView()  # O RecordTableModel de cada tela é definido em _create_*_screen
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        table.setSelectionBehavior(QTableWidget.SelectRows)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setEditTriggers(QTableView.NoEditTriggers)
         table.setAlternatingRowColors(True)
         layout.addWidget(table)
 
@@ -2124,42 +2181,99 @@ class MainApplication(QMainWindow):
 
     def _create_customers_screen(self):
         screen = self._create_generic_screen_layout("Clientes")
-        self.clientes_table.setColumnCount(9)
-        self.clientes_table.setHorizontalHeaderLabels(["ID", "Nome", "CPF/CNPJ", "Telefone", "Email", "Rua", "Nº", "Bairro", "CEP"])
+        self.clientes_table.setModel(RecordTableModel([
+            ("ID", lambda customer: customer.id),
+            ("Nome", lambda customer: customer.name),
+            ("CPF/CNPJ", lambda customer: customer.cpf_cnpj),
+            ("Telefone", lambda customer: customer.phone),
+            ("Email", lambda customer: customer.email),
+            ("Rua", lambda customer: customer.street),
+            ("Nº", lambda customer: customer.number),
+            ("Bairro", lambda customer: customer.neighborhood),
+            ("CEP", lambda customer: customer.zip_code),
+        ], parent=self))
         return screen
 
     def _create_suppliers_screen(self):
         screen = self._create_generic_screen_layout("Fornecedores")
-        self.fornecedores_table.setColumnCount(7)
-        self.fornecedores_table.setHorizontalHeaderLabels(["ID", "Nome", "CNPJ", "Contato", "Telefone", "Email", "Endereço"])
+        self.fornecedores_table.setModel(RecordTableModel([
+            ("ID", lambda supplier: supplier.id),
+            ("Nome", lambda supplier: supplier.name),
+            ("CNPJ", lambda supplier: supplier.cnpj),
+            ("Contato", lambda supplier: supplier.contact_person),
+            ("Telefone", lambda supplier: supplier.phone),
+            ("Email", lambda supplier: supplier.email),
+            ("Endereço", lambda supplier: supplier.address),
+        ], parent=self))
         return screen
 
     def _create_parts_screen(self):
         self.add_stock_button = QPushButton("Adicionar Estoque")
         self.remove_stock_button = QPushButton("Remover Estoque")
         screen = self._create_generic_screen_layout("Peças/Estoque", add_extra_buttons=[self.add_stock_button, self.remove_stock_button])
-        self.peças_estoque_table.setColumnCount(13)
-        self.peças_estoque_table.setHorizontalHeaderLabels(["ID", "Nome", "Nº Peça", "Fabricante", "Preço", "Custo", "Estoque", "Mínimo", "Localização", "Fornecedor", "Categoria", "Cód. Original", "Cód. Barras"])
+        self._part_suppliers = {}  # {id: Supplier} dos fornecedores das peças já lidas para a tabela
+        supplier_name = lambda part: getattr(self._part_suppliers.get(part.supplier_id), "name", "N/A")
+        self.peças_estoque_table.setModel(RecordTableModel([
+            ("ID", lambda part: part.id),
+            ("Nome", lambda part: part.name),
+            ("Nº Peça", lambda part: part.part_number),
+            ("Fabricante", lambda part: part.manufacturer),
+            ("Preço", lambda part: f"R$ {part.price:.2f}"),
+            ("Custo", lambda part: f"R$ {part.cost:.2f}"),
+            ("Estoque", lambda part: part.stock),
+            ("Mínimo", lambda part: part.min_stock),
+            ("Localização", lambda part: part.location),
+            ("Fornecedor", supplier_name),
+            ("Categoria", lambda part: part.category),
+            ("Cód. Original", lambda part: part.original_code),
+            ("Cód. Barras", lambda part: part.barcode),
+        ], row_background=lambda part: LOW_STOCK_BACKGROUND if part.stock <= part.min_stock else None, parent=self))
         return screen
 
     def _create_sales_screen(self):
         self.sale_options_button = QPushButton("Opções")
         screen = self._create_generic_screen_layout("Vendas", add_extra_buttons=[self.sale_options_button], add_filters=True)
-        self.vendas_table.setColumnCount(8)
-        self.vendas_table.setHorizontalHeaderLabels(["ID", "Data", "Cliente", "Total", "Status", "Tipo", "Pagamento", "Registrado por"])
+        self.vendas_table.setModel(RecordTableModel([
+            ("ID", lambda sale: sale['id']),
+            ("Data", lambda sale: sale['sale_date'].split('T')[0]),
+            ("Cliente", lambda sale: sale['customer_name']),
+            ("Total", lambda sale: f"R$ {sale['total_amount']:.2f}"),
+            ("Status", lambda sale: sale['status']),
+            ("Tipo", lambda sale: "Orçamento" if sale['is_quote'] else "Venda"),
+            ("Pagamento", lambda sale: sale['payment_method']),
+            ("Registrado por", lambda sale: sale['registered_by']),
+        ], parent=self))
         return screen
 
     def _create_service_orders_screen(self):
         self.so_options_button = QPushButton("Opções")
         screen = self._create_generic_screen_layout("Ordens de Serviço", add_extra_buttons=[self.so_options_button], add_filters=True)
-        self.ordens_de_serviço_table.setColumnCount(12)
-        self.ordens_de_serviço_table.setHorizontalHeaderLabels(["ID", "Data OS", "Cliente", "Placa", "Modelo", "Ano", "Status", "Pagamento", "Total", "M. Obra", "Peças", "Responsável"])
+        self.ordens_de_serviço_table.setModel(RecordTableModel([
+            ("ID", lambda so: so['so_id']),
+            ("Data OS", lambda so: so['order_date'].split('T')[0]),
+            ("Cliente", lambda so: so['customer_name']),
+            ("Placa", lambda so: so['vehicle_plate']),
+            ("Modelo", lambda so: so['vehicle_model']),
+            ("Ano", lambda so: so['vehicle_year']),
+            ("Status", lambda so: so['status']),
+            ("Pagamento", lambda so: so['payment_status']),
+            ("Total", lambda so: f"R$ {so['total_amount']:.2f}"),
+            ("M. Obra", lambda so: f"R$ {so['labor_cost']:.2f}"),
+            ("Peças", lambda so: f"R$ {so['parts_cost']:.2f}"),
+            ("Responsável", lambda so: so['assigned_user_name']),
+        ], parent=self))
         return screen
 
     def _create_financial_screen(self):
         screen = self._create_generic_screen_layout("Financeiro", add_filters=True)
-        self.financeiro_table.setColumnCount(6)
-        self.financeiro_table.setHorizontalHeaderLabels(["ID", "Data", "Valor", "Tipo", "Categoria", "Descrição"])
+        self.financeiro_table.setModel(RecordTableModel([
+            ("ID", lambda transaction: transaction.id),
+            ("Data", lambda transaction: transaction.transaction_date.split('T')[0]),
+            ("Valor", lambda transaction: f"R$ {transaction.amount:.2f}"),
+            ("Tipo", lambda transaction: transaction.type),
+            ("Categoria", lambda transaction: transaction.category),
+            ("Descrição", lambda transaction: transaction.description),
+        ], parent=self))
         return screen
 
     def _create_reports_screen(self):
@@ -2185,8 +2299,12 @@ class MainApplication(QMainWindow):
 
     def _create_users_screen(self):
         screen = self._create_generic_screen_layout("Gerenciar Usuários")
-        self.gerenciar_usuários_table.setColumnCount(4)
-        self.gerenciar_usuários_table.setHorizontalHeaderLabels(["ID", "Utilizador", "Função", "Ativo"])
+        self.gerenciar_usuários_table.setModel(RecordTableModel([
+            ("ID", lambda user: user.id),
+            ("Utilizador", lambda user: user.username),
+            ("Função", lambda user: user.role),
+            ("Ativo", lambda user: "Sim" if user.is_active else "Não"),
+        ], parent=self))
         return screen
 
     def _create_notifications_screen(self):
@@ -2210,12 +2328,18 @@ class MainApplication(QMainWindow):
         notification_actions_layout.addStretch()
         layout.addLayout(notification_actions_layout)
 
-        self.notifications_table = QTableWidget()
-        self.notifications_table.setColumnCount(5)
-        self.notifications_table.setHorizontalHeaderLabels(["ID", "Data", "Tipo", "Mensagem", "Lida?"])
+        self.notifications_table = QTableView()
+        self.notifications_table.setModel(RecordTableModel([
+            ("ID", lambda notification: notification.id),
+            ("Data", lambda notification: notification.timestamp.split('T')[0]),
+            ("Tipo", lambda notification: notification.type),
+            ("Mensagem", lambda notification: notification.message),
+            ("Lida?", lambda notification: "Sim" if notification.is_read else "Não"),
+        ], row_background=lambda notification: None if notification.is_read else UNREAD_NOTIFICATION_BACKGROUND,
+           parent=self))
         self.notifications_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
-        self.notifications_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.notifications_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.notifications_table.setSelectionBehavior(QTableView.SelectRows)
+        self.notifications_table.setEditTriggers(QTableView.NoEditTriggers)
         self.notifications_table.setAlternatingRowColors(True)
         layout.addWidget(self.notifications_table)
 
@@ -2526,7 +2650,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar usuário sem seleção.")
             return
         
-        user_id = int(self.gerenciar_usuários_table.item(selected_rows[0].row(), 0).text())
+        user_id = int(self.gerenciar_usuários_table.model().text(selected_rows[0].row(), 0))
         user = self.user_manager.get_user_by_id(user_id)
         
         if user:
@@ -2551,7 +2675,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar usuário sem seleção.")
             return
         
-        user_id = int(self.gerenciar_usuários_table.item(selected_rows[0].row(), 0).text())
+        user_id = int(self.gerenciar_usuários_table.model().text(selected_rows[0].row(), 0))
         
         if self.current_user and self.current_user.id == user_id:
             QMessageBox.warning(self, "Ação Inválida", "Não pode apagar o seu próprio utilizador.")
@@ -2595,7 +2719,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar cliente sem seleção.")
             return
         
-        customer_id = int(self.clientes_table.item(selected_rows[0].row(), 0).text())
+        customer_id = int(self.clientes_table.model().text(selected_rows[0].row(), 0))
         customer = self.customer_manager.get_customer_by_id(customer_id)
         
         if customer:
@@ -2620,7 +2744,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar cliente sem seleção.")
             return
         
-        customer_id = int(self.clientes_table.item(selected_rows[0].row(), 0).text())
+        customer_id = int(self.clientes_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer apagar o cliente ID {customer_id}?')
         if reply == QMessageBox.Yes:
             logger.info(f"Confirmado deleção para cliente ID: {customer_id}.")
@@ -2656,7 +2780,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar fornecedor sem seleção.")
             return
         
-        supplier_id = int(self.fornecedores_table.item(selected_rows[0].row(), 0).text())
+        supplier_id = int(self.fornecedores_table.model().text(selected_rows[0].row(), 0))
         supplier = self.supplier_manager.get_supplier_by_id(supplier_id)
         if supplier:
             logger.info(f"Abrindo diálogo para editar fornecedor ID: {supplier_id} ({supplier.name}).")
@@ -2680,7 +2804,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar fornecedor sem seleção.")
             return
         
-        supplier_id = int(self.fornecedores_table.item(selected_rows[0].row(), 0).text())
+        supplier_id = int(self.fornecedores_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer apagar o fornecedor ID {supplier_id}?')
         if reply == QMessageBox.Yes:
             logger.info(f"Confirmado deleção para fornecedor ID: {supplier_id}.")
@@ -2717,7 +2841,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar peça sem seleção.")
             return
         
-        part_id = int(self.peças_estoque_table.item(selected_rows[0].row(), 0).text())
+        part_id = int(self.peças_estoque_table.model().text(selected_rows[0].row(), 0))
         part = self.stock_manager.get_part_by_id(part_id)
         if part:
             logger.info(f"Abrindo diálogo para editar peça ID: {part_id} ({part.name}).")
@@ -2742,7 +2866,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar peça sem seleção.")
             return
         
-        part_id = int(self.peças_estoque_table.item(selected_rows[0].row(), 0).text())
+        part_id = int(self.peças_estoque_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer apagar a peça ID {part_id}?')
         if reply == QMessageBox.Yes:
             logger.info(f"Confirmado deleção para peça ID: {part_id}.")
@@ -2763,8 +2887,8 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de adicionar estoque sem seleção de peça.")
             return
         
-        part_id = int(self.peças_estoque_table.item(selected_rows[0].row(), 0).text())
-        part_name = self.peças_estoque_table.item(selected_rows[0].row(), 1).text()
+        part_id = int(self.peças_estoque_table.model().text(selected_rows[0].row(), 0))
+        part_name = self.peças_estoque_table.model().text(selected_rows[0].row(), 1)
         
         quantity, ok = QInputDialog.getInt(self, "Adicionar Estoque", f"Quantidade para '{part_name}':", 1, 1, 9999)
         if ok and quantity > 0:
@@ -2785,10 +2909,10 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de remover estoque sem seleção de peça.")
             return
         
-        part_id = int(self.peças_estoque_table.item(selected_rows[0].row(), 0).text())
-        part_name = self.peças_estoque_table.item(selected_rows[0].row(), 1).text()
+        part_id = int(self.peças_estoque_table.model().text(selected_rows[0].row(), 0))
+        part_name = self.peças_estoque_table.model().text(selected_rows[0].row(), 1)
         
-        current_stock_text = self.peças_estoque_table.item(selected_rows[0].row(), 6).text()
+        current_stock_text = self.peças_estoque_table.model().text(selected_rows[0].row(), 6)
         current_stock = int(current_stock_text) if current_stock_text.isdigit() else 0
         
         quantity, ok = QInputDialog.getInt(self, "Remover Estoque", f"Quantidade de '{part_name}' (Atual: {current_stock}):", 1, 1, current_stock)
@@ -2804,6 +2928,7 @@ class MainApplication(QMainWindow):
                 logger.warning(f"Falha ao remover estoque da peça ID {part_id}: {msg}")
             
     # --- Métodos para Vendas ---
+    @query_budget()
     def add_sale(self):
         logger.info("Abrindo diálogo para adicionar nova venda/orçamento.")
         dialog = AddEditSaleDialog(customer_manager=self.customer_manager, stock_manager=self.stock_manager, parent=self)
@@ -2833,7 +2958,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar venda sem seleção.")
             return
         
-        sale_id = int(self.vendas_table.item(selected_rows[0].row(), 0).text())
+        sale_id = int(self.vendas_table.model().text(selected_rows[0].row(), 0))
         sale = Sale.get_by_id(sale_id)
         
         if sale:
@@ -2877,7 +3002,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar venda sem seleção.")
             return
         
-        sale_id = int(self.vendas_table.item(selected_rows[0].row(), 0).text())
+        sale_id = int(self.vendas_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer apagar a venda/orçamento ID {sale_id}?')
         if reply == QMessageBox.Yes:
             logger.info(f"Confirmado deleção para venda/orçamento ID: {sale_id}.")
@@ -2909,8 +3034,8 @@ class MainApplication(QMainWindow):
             return
         
         row = selected_rows[0].row()
-        sale_id = int(self.vendas_table.item(row, 0).text())
-        is_quote_text = self.vendas_table.item(row, 5).text()
+        sale_id = int(self.vendas_table.model().text(row, 0))
+        is_quote_text = self.vendas_table.model().text(row, 5)
         is_quote = (is_quote_text == 'Orçamento')
         
         logger.info(f"Mostrando opções para {'orçamento' if is_quote else 'venda'} ID: {sale_id}.")
@@ -3025,6 +3150,7 @@ class MainApplication(QMainWindow):
             self.statusBar.clearMessage()
 
     # --- Métodos para Ordens de Serviço ---
+    @query_budget()
     def add_service_order(self):
         logger.info("Abrindo diálogo para adicionar nova Ordem de Serviço.")
         dialog = AddEditServiceOrderDialog(
@@ -3070,7 +3196,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar OS sem seleção.")
             return
 
-        so_id = int(self.ordens_de_serviço_table.item(selected_rows[0].row(), 0).text())
+        so_id = int(self.ordens_de_serviço_table.model().text(selected_rows[0].row(), 0))
         service_order = self.service_order_manager.get_service_order_by_id(so_id)
 
         if service_order:
@@ -3114,7 +3240,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar OS sem seleção.")
             return
         
-        so_id = int(self.ordens_de_serviço_table.item(selected_rows[0].row(), 0).text())
+        so_id = int(self.ordens_de_serviço_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer apagar a Ordem de Serviço ID {so_id}? Peças serão devolvidas ao estoque.')
         if reply == QMessageBox.Yes:
             logger.info(f"Confirmado deleção para Ordem de Serviço ID: {so_id}.")
@@ -3145,9 +3271,9 @@ class MainApplication(QMainWindow):
             return
         
         row = selected_rows[0].row()
-        so_id = int(self.ordens_de_serviço_table.item(selected_rows[0].row(), 0).text())
-        current_status = self.ordens_de_serviço_table.item(row, 6).text()
-        current_payment_status = self.ordens_de_serviço_table.item(row, 7).text()
+        so_id = int(self.ordens_de_serviço_table.model().text(selected_rows[0].row(), 0))
+        current_status = self.ordens_de_serviço_table.model().text(row, 6)
+        current_payment_status = self.ordens_de_serviço_table.model().text(row, 7)
 
         logger.info(f"Mostrando opções para Ordem de Serviço ID: {so_id} (Status: {current_status}, Pagamento: {current_payment_status}).")
 
@@ -3252,7 +3378,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de editar transação financeira sem seleção.")
             return
         
-        transaction_id = int(self.financeiro_table.item(selected_rows[0].row(), 0).text())
+        transaction_id = int(self.financeiro_table.model().text(selected_rows[0].row(), 0))
         transaction = self.financial_manager.get_transaction_by_id(transaction_id)
         if transaction:
             logger.info(f"Abrindo diálogo para editar transação financeira ID: {transaction_id}.")
@@ -3286,7 +3412,7 @@ class MainApplication(QMainWindow):
             logger.warning("Tentativa de deletar transação financeira sem seleção.")
             return
         
-        transaction_id = int(self.financeiro_table.item(selected_rows[0].row(), 0).text())
+        transaction_id = int(self.financeiro_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer apagar a transação ID {transaction_id}?')
         if reply == QMessageBox.Yes:
             logger.info(f"Confirmado deleção para transação financeira ID: {transaction_id}.")
@@ -3310,6 +3436,7 @@ class MainApplication(QMainWindow):
                 self.statusBar.clearMessage()
     
     # --- Métodos para Relatórios ---
+    @query_budget()
     def generate_report(self):
         logger.info("Abrindo diálogo para gerar relatório.")
         dialog = GenerateReportDialog(user_manager=self.user_manager, parent=self)
@@ -3389,6 +3516,9 @@ class MainApplication(QMainWindow):
 
 
     # --- Métodos de Carregamento de Dados para as Tabelas ---
+    # Os orçamentos de consultas (@query_budget) só são verificados com SPEC_SQL_TRACE=1;
+    # uma listagem que passe a fazer uma consulta por linha (N+1) aparece como aviso no log.
+    @query_budget(max_queries=15)
     def load_all_data(self):
         if not self.current_user: return
         logger.info("Iniciando carregamento de todos os dados.")
@@ -3404,98 +3534,90 @@ class MainApplication(QMainWindow):
         self.update_dashboard_stats()
         logger.info("Carregamento de todos os dados concluído.")
 
+    # Cada listagem com busca tem três partes: load_* recarrega na hora (depois de incluir, editar
+    # ou remover); _search_* lê o texto e os filtros da tela e devolve a consulta, que nas buscas
+    # digitadas roda fora da thread da interface (SearchController); _show_* exibe o resultado.
+    @query_budget(max_queries=1)
     def load_users(self):
+        self.search_controller.refresh("gerenciar_usuários")
+
+    def _search_users(self):
         query = self.search_gerenciar_usuários_input.text()
-        table = self.gerenciar_usuários_table
-        table.setRowCount(0)
-        
-        users = self.user_manager.search_users(query) if query else self.user_manager.get_all_users()
-        
-        for row, user in enumerate(users):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(user.id)))
-            table.setItem(row, 1, QTableWidgetItem(user.username))
-            table.setItem(row, 2, QTableWidgetItem(user.role))
-            table.setItem(row, 3, QTableWidgetItem("Sim" if user.is_active else "Não"))
+        if query:
+            return lambda: self.user_manager.search_users(query, fields=USER_LIST_FIELDS)
+        return lambda: self.user_manager.get_all_users(fields=USER_LIST_FIELDS)
+
+    def _show_users(self, users):
+        self.gerenciar_usuários_table.model().set_records(users)
         logger.info(f"Carregados {len(users)} usuários na tabela de Gerenciar Usuários.")
             
+    @query_budget(max_queries=1)
     def load_customers(self):
+        self.search_controller.refresh("clientes")
+
+    def _search_customers(self):
         query = self.search_clientes_input.text()
-        table = self.clientes_table
-        table.setRowCount(0)
-        
-        customers = self.customer_manager.search_customers(query) if query else self.customer_manager.get_all_customers()
-        
-        for row, customer in enumerate(customers):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(customer.id)))
-            table.setItem(row, 1, QTableWidgetItem(customer.name))
-            table.setItem(row, 2, QTableWidgetItem(customer.cpf_cnpj))
-            table.setItem(row, 3, QTableWidgetItem(customer.phone))
-            table.setItem(row, 4, QTableWidgetItem(customer.email))
-            table.setItem(row, 5, QTableWidgetItem(customer.street))
-            table.setItem(row, 6, QTableWidgetItem(customer.number))
-            table.setItem(row, 7, QTableWidgetItem(customer.neighborhood))
-            table.setItem(row, 8, QTableWidgetItem(customer.zip_code))
+        if query:
+            return lambda: self.customer_manager.search_customers(query)
+        return self.customer_manager.get_all_customers
+
+    def _show_customers(self, customers):
+        self.clientes_table.model().set_records(customers)
         logger.info(f"Carregados {len(customers)} clientes na tabela de Clientes.")
 
 
+    @query_budget(max_queries=1)
     def load_suppliers(self):
+        self.search_controller.refresh("fornecedores")
+
+    def _search_suppliers(self):
         query = self.search_fornecedores_input.text()
-        table = self.fornecedores_table
-        table.setRowCount(0)
-        
-        suppliers = self.supplier_manager.search_suppliers(query) if query else self.supplier_manager.get_all_suppliers()
-        
-        for row, supplier in enumerate(suppliers):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(supplier.id)))
-            table.setItem(row, 1, QTableWidgetItem(supplier.name))
-            table.setItem(row, 2, QTableWidgetItem(supplier.cnpj))
-            table.setItem(row, 3, QTableWidgetItem(supplier.contact_person))
-            table.setItem(row, 4, QTableWidgetItem(supplier.phone))
-            table.setItem(row, 5, QTableWidgetItem(supplier.email))
-            table.setItem(row, 6, QTableWidgetItem(supplier.address))
+        if query:
+            return lambda: self.supplier_manager.search_suppliers(query)
+        return self.supplier_manager.get_all_suppliers
+
+    def _show_suppliers(self, suppliers):
+        self.fornecedores_table.model().set_records(suppliers)
         logger.info(f"Carregados {len(suppliers)} fornecedores na tabela de Fornecedores.")
 
     
+    @query_budget(max_queries=2)
     def load_parts(self):
+        self.search_controller.refresh("peças_estoque")
+
+    def _search_parts(self):
         query = self.search_peças_estoque_input.text()
-        table = self.peças_estoque_table
-        table.setRowCount(0)
-        
-        parts = self.stock_manager.search_parts(query) if query else self.stock_manager.get_all_parts()
-        
-        for row, part in enumerate(parts):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(part.id)))
-            table.setItem(row, 1, QTableWidgetItem(part.name))
-            table.setItem(row, 2, QTableWidgetItem(part.part_number))
-            table.setItem(row, 3, QTableWidgetItem(part.manufacturer))
-            table.setItem(row, 4, QTableWidgetItem(f"R$ {part.price:.2f}"))
-            table.setItem(row, 5, QTableWidgetItem(f"R$ {part.cost:.2f}"))
-            table.setItem(row, 6, QTableWidgetItem(str(part.stock)))
-            table.setItem(row, 7, QTableWidgetItem(str(part.min_stock)))
-            table.setItem(row, 8, QTableWidgetItem(part.location))
-            
-            supplier = self.supplier_manager.get_supplier_by_id(part.supplier_id) if part.supplier_id else None
-            table.setItem(row, 9, QTableWidgetItem(supplier.name if supplier else "N/A"))
-            table.setItem(row, 10, QTableWidgetItem(part.category))
-            table.setItem(row, 11, QTableWidgetItem(part.original_code))
-            table.setItem(row, 12, QTableWidgetItem(part.barcode))
-            
-            if part.stock <= part.min_stock:
-                for col_idx in range(table.columnCount()):
-                    item = table.item(row, col_idx)
-                    if item:
-                        item.setBackground(QColor(255, 50, 50))
-        logger.info(f"Carregados {len(parts)} peças/estoque na tabela de Peças/Estoque.")
+        suppliers = {}  # {id: Supplier} das peças lidas, para a coluna Fornecedor
+
+        def with_suppliers(parts):
+            # Fornecedores do lote em uma única consulta, em vez de um get_supplier_by_id por peça
+            missing = {part.supplier_id for part in parts} - suppliers.keys()
+            suppliers.update(self.supplier_manager.get_suppliers_by_ids(missing))
+            return parts
+
+        def fetch_page(last, limit):
+            return with_suppliers(self.stock_manager.get_all_parts(after_id=last.id if last else None, limit=limit))
+
+        def search():
+            if query:
+                return with_suppliers(self.stock_manager.search_parts(query)), None, suppliers
+            # Sem filtro, só a primeira página vem do banco agora; as demais quando a tabela rolar
+            return fetch_page(None, DB_PAGE_SIZE), fetch_page, suppliers
+        return search
+
+    def _show_parts(self, result):
+        parts, fetch_page, self._part_suppliers = result
+        model = self.peças_estoque_table.model()
+        model.set_records(parts, fetch_page)
+        logger.info(f"Carregados {model.rowCount()} peças/estoque na tabela de Peças/Estoque.")
 
 
+    @query_budget(max_queries=1)
     def load_sales(self):
+        self.search_controller.refresh("vendas")
+
+    def _search_sales(self):
         query = self.search_vendas_input.text()
-        table = self.vendas_table
-        table.setRowCount(0)
         
         filters = self.filter_vendas_widgets
         start_date = filters['start_date'].date().toString("yyyy-MM-dd HH:MM:S")
@@ -3505,34 +3627,33 @@ class MainApplication(QMainWindow):
         if filters['type_combo'].currentText() == "Venda": is_quote_filter = False
         elif filters['type_combo'].currentText() == "Orçamento": is_quote_filter = True
 
-        sales_data = self.sale_manager.get_all_sales_for_display(
-            query=query, 
-            start_date=start_date, 
-            end_date=end_date, 
-            status_filter=status_filter,
-            is_quote_filter=is_quote_filter
-        )
-        
-        for row, sale in enumerate(sales_data):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(sale['id'])))
-            table.setItem(row, 1, QTableWidgetItem(sale['sale_date'].split('T')[0]))
-            table.setItem(row, 2, QTableWidgetItem(sale['customer_name']))
-            table.setItem(row, 3, QTableWidgetItem(f"R$ {sale['total_amount']:.2f}"))
-            table.setItem(row, 4, QTableWidgetItem(sale['status']))
-            table.setItem(row, 5, QTableWidgetItem("Orçamento" if sale['is_quote'] else "Venda"))
-            table.setItem(row, 6, QTableWidgetItem(sale['payment_method']))
-            table.setItem(row, 7, QTableWidgetItem(sale['registered_by']))
-        logger.info(f"Carregados {len(sales_data)} vendas na tabela de Vendas com filtros.")
+        def fetch_page(last, limit):
+            return self.sale_manager.get_all_sales_for_display(
+                query=query, 
+                start_date=start_date, 
+                end_date=end_date, 
+                status_filter=status_filter,
+                is_quote_filter=is_quote_filter,
+                limit=limit,
+                after=last['id'] if last else None
+            )
+        return lambda: (fetch_page(None, DB_PAGE_SIZE), fetch_page)
 
+    def _show_sales(self, result):
+        model = self.vendas_table.model()
+        model.set_records(*result)
+        logger.info(f"Carregados {model.rowCount()} vendas na tabela de Vendas com filtros.")
+
+    @query_budget(max_queries=2)
     def load_service_orders(self):
+        self.search_controller.refresh("ordens_de_serviço")
+
+    def _search_service_orders(self):
         query = self.search_ordens_de_serviço_input.text()
-        table = self.ordens_de_serviço_table
-        table.setRowCount(0)
 
         filters = self.filter_ordens_de_serviço_widgets
         if filters['assigned_user_combo'].count() <= 1:
-            users = self.user_manager.get_all_users()
+            users = self.user_manager.get_all_users(fields=("username",))
             for user in users:
                 filters['assigned_user_combo'].addItem(user.username, userData=user.id)
 
@@ -3542,59 +3663,61 @@ class MainApplication(QMainWindow):
         assigned_user_id_filter = filters['assigned_user_combo'].currentData()
 
 
-        service_orders = self.service_order_manager.get_all_service_orders(
-            query_text=query,
-            status_filter=status_filter,
-            start_date=start_date,
-            end_date=end_date,
-            assigned_user_id=assigned_user_id_filter
-        )
-        
-        for row_idx, so_data in enumerate(service_orders):
-            table.insertRow(row_idx)
-            table.setItem(row_idx, 0, QTableWidgetItem(str(so_data['so_id'])))
-            table.setItem(row_idx, 1, QTableWidgetItem(so_data['order_date'].split('T')[0]))
-            table.setItem(row_idx, 2, QTableWidgetItem(so_data['customer_name']))
-            table.setItem(row_idx, 3, QTableWidgetItem(so_data['vehicle_plate']))
-            table.setItem(row_idx, 4, QTableWidgetItem(so_data['vehicle_model']))
-            table.setItem(row_idx, 5, QTableWidgetItem(str(so_data['vehicle_year'])))
-            table.setItem(row_idx, 6, QTableWidgetItem(so_data['status']))
-            table.setItem(row_idx, 7, QTableWidgetItem(so_data['payment_status']))
-            table.setItem(row_idx, 8, QTableWidgetItem(f"R$ {so_data['total_amount']:.2f}"))
-            table.setItem(row_idx, 9, QTableWidgetItem(f"R$ {so_data['labor_cost']:.2f}"))
-            table.setItem(row_idx, 10, QTableWidgetItem(f"R$ {so_data['parts_cost']:.2f}"))
-            table.setItem(row_idx, 11, QTableWidgetItem(so_data['assigned_user_name']))
-        logger.info(f"Carregadas {len(service_orders)} Ordens de Serviço na tabela de Ordens de Serviço com filtros.")
+        def fetch_page(last, limit):
+            return self.service_order_manager.get_all_service_orders(
+                query_text=query,
+                status_filter=status_filter,
+                start_date=start_date,
+                end_date=end_date,
+                assigned_user_id=assigned_user_id_filter,
+                limit=limit,
+                after=(last['order_date'], last['so_id']) if last else None
+            )
+        return lambda: (fetch_page(None, DB_PAGE_SIZE), fetch_page)
 
+    def _show_service_orders(self, result):
+        model = self.ordens_de_serviço_table.model()
+        model.set_records(*result)
+        logger.info(f"Carregadas {model.rowCount()} Ordens de Serviço na tabela de Ordens de Serviço com filtros.")
 
+
+    @query_budget(max_queries=1)
     def load_financial_transactions(self):
+        self.search_controller.refresh("financeiro")
+
+    def _search_financial_transactions(self):
         query = self.search_financeiro_input.text()
-        table = self.financeiro_table
-        table.setRowCount(0)
         
         filters = self.filter_financeiro_widgets
         start_date = filters['start_date'].date().toString("yyyy-MM-dd HH:MM:S")
         end_date = filters['end_date'].date().toString("yyyy-MM-dd HH:MM:S")
         type_filter = filters['type_combo'].currentData()
 
-        transactions = self.financial_manager.search_transactions(
-            query_text=query,
-            transaction_type_filter=type_filter,
-            start_date=start_date,
-            end_date=end_date
-        )
-        
-        for row, transaction in enumerate(transactions):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(transaction.id)))
-            table.setItem(row, 1, QTableWidgetItem(transaction.transaction_date.split('T')[0]))
-            table.setItem(row, 2, QTableWidgetItem(f"R$ {transaction.amount:.2f}"))
-            table.setItem(row, 3, QTableWidgetItem(transaction.type))
-            table.setItem(row, 4, QTableWidgetItem(transaction.category))
-            table.setItem(row, 5, QTableWidgetItem(transaction.description))
-        logger.info(f"Carregadas {len(transactions)} transações financeiras na tabela Financeiro com filtros.")
+        if query:
+            return lambda: (self.financial_manager.search_transactions(
+                query_text=query,
+                transaction_type_filter=type_filter,
+                start_date=start_date,
+                end_date=end_date
+            ), None)
+
+        def fetch_page(last, limit):
+            return self.financial_manager.get_all_transactions(
+                transaction_type_filter=type_filter,
+                start_date=start_date,
+                end_date=end_date,
+                limit=limit,
+                after=(last.transaction_date, last.id) if last else None
+            )
+        return lambda: (fetch_page(None, DB_PAGE_SIZE), fetch_page)
+
+    def _show_financial_transactions(self, result):
+        model = self.financeiro_table.model()
+        model.set_records(*result)
+        logger.info(f"Carregadas {model.rowCount()} transações financeiras na tabela Financeiro com filtros.")
 
 
+    @query_budget(max_queries=1)
     def load_reports(self):
         table = self.reports_table
         table.setRowCount(0)
@@ -3646,26 +3769,12 @@ class MainApplication(QMainWindow):
             logger.warning(f"Tentativa de abrir arquivo de relatório não encontrado: {file_path}")
 
 
+    @query_budget(max_queries=1)
     def load_notifications(self):
         """Carrega e exibe as notificações na tabela de Notificações."""
-        table = self.notifications_table
-        table.setRowCount(0)
-        
         notifications = self.notification_manager.get_all_notifications()
         
-        for row, notification in enumerate(notifications):
-            table.insertRow(row)
-            table.setItem(row, 0, QTableWidgetItem(str(notification.id)))
-            table.setItem(row, 1, QTableWidgetItem(notification.timestamp.split('T')[0]))
-            table.setItem(row, 2, QTableWidgetItem(notification.type))
-            table.setItem(row, 3, QTableWidgetItem(notification.message))
-            table.setItem(row, 4, QTableWidgetItem("Sim" if notification.is_read else "Não"))
-
-            if not notification.is_read:
-                for col_idx in range(table.columnCount()):
-                    item = table.item(row, col_idx)
-                    if item:
-                        item.setBackground(QColor(255, 255, 200))
+        self.notifications_table.model().set_records(notifications)
         logger.info(f"Carregadas {len(notifications)} notificações na tabela de Notificações.")
 
     def update_notification_count(self):
@@ -3691,7 +3800,7 @@ class MainApplication(QMainWindow):
             QMessageBox.warning(self, "Seleção Necessária", "Por favor, selecione uma notificação para marcar como lida.")
             return
         
-        notification_id = int(self.notifications_table.item(selected_rows[0].row(), 0).text())
+        notification_id = int(self.notifications_table.model().text(selected_rows[0].row(), 0))
         success, msg = self.notification_manager.mark_notification_as_read(notification_id)
         if success:
             self.statusBar.showMessage(msg, 5000)
@@ -3719,7 +3828,7 @@ class MainApplication(QMainWindow):
             QMessageBox.warning(self, "Seleção Necessária", "Por favor, selecione uma notificação para remover.")
             return
         
-        notification_id = int(self.notifications_table.item(selected_rows[0].row(), 0).text())
+        notification_id = int(self.notifications_table.model().text(selected_rows[0].row(), 0))
         reply = QMessageBox.question(self, 'Confirmar', f'Tem a certeza que quer remover a notificação ID {notification_id}?')
         if reply == QMessageBox.Yes:
             success, msg = self.notification_manager.delete_notification(notification_id)
@@ -3732,23 +3841,33 @@ class MainApplication(QMainWindow):
 
 
     def update_dashboard_stats(self):
+        """Recalcula as estatísticas em segundo plano; uma atualização mais nova cancela a anterior."""
         logger.info("Atualizando estatísticas do Dashboard.")
-        low_stock_parts = self.stock_manager.get_parts_below_min_stock()
-        self.dashboard_low_stock_label.setText(f"Itens com estoque baixo: {len(low_stock_parts)}")
+        self.search_controller.search("dashboard")
+
+    def _search_dashboard_stats(self):
+        # Apenas agregados (COUNT/SUM) calculados no banco, sem carregar as tabelas na memória
+        return lambda: (
+            self.stock_manager.count_parts_below_min_stock(),
+            self.financial_manager.get_balance(),
+            self.sale_manager.get_total_sales_amount(),
+            self.service_order_manager.count_service_orders_by_status(),
+        )
 
-        balance = self.financial_manager.get_balance()
+    def _show_dashboard_stats(self, stats):
+        low_stock_count, balance, total_sales_amount, so_counts = stats
+        self.dashboard_low_stock_label.setText(f"Itens com estoque baixo: {low_stock_count}")
         self.dashboard_balance_label.setText(f"Balanço Financeiro (Total): R$ {balance:.2f}")
 
-        total_sales_amount = sum(s['total_amount'] for s in self.sale_manager.get_all_sales_for_display(query=None, is_quote_filter=False))
-        pending_oss_count = len([so for so in self.service_order_manager.get_all_service_orders(status_filter='Pendente')])
-        in_progress_oss_count = len([so for so in self.service_order_manager.get_all_service_orders(status_filter='Em Andamento')])
+        pending_oss_count = so_counts.get('Pendente', 0)
+        in_progress_oss_count = so_counts.get('Em Andamento', 0)
         
         self.dashboard_stats_label.setText(
             f"Total de Vendas Registradas: R$ {total_sales_amount:.2f}\n"
             f"OS Pendentes: {pending_oss_count}\n"
             f"OS Em Andamento: {in_progress_oss_count}"
         )
-        logger.info(f"Estatísticas do Dashboard atualizadas: Estoque Baixo={len(low_stock_parts)}, Balanço={balance:.2f}, Vendas={total_sales_amount:.2f}, OS Pendentes={pending_oss_count}.")
+        logger.info(f"Estatísticas do Dashboard atualizadas: Estoque Baixo={low_stock_count}, Balanço={balance:.2f}, Vendas={total_sales_amount:.2f}, OS Pendentes={pending_oss_count}.")
 
 
     def update_ui_permissions(self):
@@ -3841,6 +3960,7 @@ class MainApplication(QMainWindow):
     def logout(self):
         logger.info(f"Usuário {self.current_user.username} está fazendo logout.")
         self.current_user = None
+        self.search_controller.cancel_all()  # Nada do usuário anterior chega às telas
         self.update_ui_permissions()
         self.statusBar.showMessage("Você foi desconectado.", 5000)
         self.show_login_dialog()
@@ -3852,14 +3972,20 @@ class MainApplication(QMainWindow):
         
         self.btn_logout.clicked.connect(self.logout)
 
-        # Conecta inputs de busca para funções de carregamento
-        self.search_clientes_input.textChanged.connect(self.load_customers)
-        self.search_fornecedores_input.textChanged.connect(self.load_suppliers)
-        self.search_peças_estoque_input.textChanged.connect(self.load_parts)
-        self.search_vendas_input.textChanged.connect(self.load_sales)
-        self.search_ordens_de_serviço_input.textChanged.connect(self.load_service_orders)
-        self.search_financeiro_input.textChanged.connect(self.load_financial_transactions)
-        self.search_gerenciar_usuários_input.textChanged.connect(self.load_users)
+        # Conecta inputs de busca às buscas em segundo plano: consulta quando o usuário para de digitar,
+        # fora da thread da interface, e só exibe o resultado da busca mais recente de cada tela
+        self.search_controller = SearchController(parent=self)
+        for key, prepare, apply in (
+            ("clientes", self._search_customers, self._show_customers),
+            ("fornecedores", self._search_suppliers, self._show_suppliers),
+            ("peças_estoque", self._search_parts, self._show_parts),
+            ("vendas", self._search_sales, self._show_sales),
+            ("ordens_de_serviço", self._search_service_orders, self._show_service_orders),
+            ("financeiro", self._search_financial_transactions, self._show_financial_transactions),
+            ("gerenciar_usuários", self._search_users, self._show_users),
+        ):
+            self.search_controller.register(key, getattr(self, f"search_{key}_input"), prepare, apply)
+        self.search_controller.add("dashboard", self._search_dashboard_stats, self._show_dashboard_stats)
 
         # Conecta mudanças de filtro para funções de carregamento
         # Filtros de Vendas
@@ -0,0 +1,77 @@
+# benchmarks/bench_model_hydration.py
+"""
+Memória e tempo de hidratação de 100 mil peças.
+Compara o formato antigo (objeto com __dict__ criado via cls(id=..., **campos) para cada linha)
+com o atual (Part com __slots__, preenchido pelo hidratador em cache de BaseModel).
+
+Uso (a partir de sistema_spec/):  python -m benchmarks.bench_model_hydration [quantidade]
+"""
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import use_temporary_database
+
+from models.base_model import get_db_connection
+from models.part_model import Part
+
+DEFAULT_PART_COUNT = 100_000
+
+
+class _DictPart:
+    """Reprodução do modelo antigo: atributos em __dict__ e construção por keyword arguments."""
+    def __init__(self, id=None, **fields):
+        self.id = id
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+def _seed(part_count):
+    Part.insert_many(
+        Part(name=f"PECA {i}", description=f"DESCRICAO DA PECA {i}", part_number=f"BN-{i:06d}",
+             manufacturer=f"FABRICANTE {i % 50}", price=10.0 + i % 100, cost=5.0, stock=i % 30,
+             min_stock=2, location=f"A{i % 20}", category=f"CATEGORIA {i % 12}",
+             original_code=f"OR{i:06d}", barcode=f"789{i:010d}")
+        for i in range(part_count)
+    )
+
+
+def _load_legacy():
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"SELECT * FROM {Part._table_name}").fetchall()
+        return [_DictPart(id=row['id'], **{k: row[k] for k in Part._fields}) for row in rows]
+    finally:
+        conn.close()
+
+
+def _measure(loader):
+    start = time.perf_counter()
+    objects = loader()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    del objects
+
+    tracemalloc.start()
+    objects = loader()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"count": len(objects), "hydration_ms": round(elapsed_ms, 1),
+            "retained_mb": round(retained / 1024 / 1024, 1), "peak_mb": round(peak / 1024 / 1024, 1)}
+
+
+def run(part_count=DEFAULT_PART_COUNT):
+    use_temporary_database()
+    _seed(part_count)
+    return {"legacy_dict": _measure(_load_legacy), "slots": _measure(Part.get_all)}
+
+
+def main():
+    part_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PART_COUNT
+    results = run(part_count)
+    print(f"{'formato':>12} | {'peças':>7} | {'hidratação (ms)':>15} | {'retido (MB)':>11} | {'pico (MB)':>9}")
+    for name, row in results.items():
+        print(f"{name:>12} | {row['count']:>7} | {row['hydration_ms']:>15.1f} | {row['retained_mb']:>11.1f} | {row['peak_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# benchmarks/bench_scale.py
+"""
+Benchmark de escala dos caminhos mais usados da aplicação sobre o conjunto sintético de
+benchmarks/dataset.py (200 mil peças, 50 mil clientes, 1 milhão de vendas... com --scale 1).
+Os resultados saem em JSON para que execuções diferentes possam ser comparadas.
+
+Uso (a partir de sistema_spec/):
+    python -m benchmarks.bench_scale --scale 0.05 --output resultado.json
+    python -m benchmarks.bench_scale --database /tmp/spec_1x.db   # gera uma vez e reaproveita
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.common import use_temporary_database, time_call
+from benchmarks.dataset import generate_dataset, DEFAULT_SEED
+
+from config.settings import DB_PAGE_SIZE, COMPLETER_MAX_RESULTS
+from models import migrations, parts_catalog
+from models.base_model import get_db_connection
+from models.connection_manager import connection_manager
+from models.part_model import Part
+from utils.completion_index import CompletionIndex, PrefixSearch
+from utils.helpers import fold_text
+
+SALE_ITEM_COUNT = 3
+STOCK_FOR_SALES = 1_000_000  # Estoque das peças usadas nas vendas cronometradas, para nunca faltar
+
+
+def _managers():
+    from modules.notification_manager import NotificationManager
+    from modules.customer_manager import CustomerManager
+    from modules.stock_manager import StockManager
+    from modules.sale_manager import SaleManager
+    from modules.user_manager import UserManager
+    from modules.service_order_manager import ServiceOrderManager
+    from modules.financial_manager import FinancialManager
+
+    notification_manager = NotificationManager()
+    stock_manager = StockManager(notification_manager)
+    user_manager = UserManager()
+    return {
+        "notification": notification_manager,
+        "stock": stock_manager,
+        "sale": SaleManager(stock_manager),
+        "user": user_manager,
+        "service_order": ServiceOrderManager(stock_manager, user_manager),
+        "financial": FinancialManager(),
+        "customer": CustomerManager(),
+    }
+
+
+def _startup():
+    migrations._checked_databases.clear()  # Simula um processo novo
+    connection_manager.close_all()
+    _managers()
+
+
+def _sale_fixture():
+    """Primeiro cliente, usuário e as primeiras peças, com estoque suficiente para todas as repetições."""
+    conn = get_db_connection()
+    try:
+        customer_id = conn.execute("SELECT MIN(id) FROM customers").fetchone()[0]
+        user_id = conn.execute("SELECT MIN(id) FROM users").fetchone()[0]
+        parts = conn.execute("SELECT id, price FROM parts ORDER BY id LIMIT ?", (SALE_ITEM_COUNT,)).fetchall()
+        conn.execute(f"UPDATE parts SET stock = ? WHERE id IN ({', '.join('?' for _ in parts)})",
+                     [STOCK_FOR_SALES] + [part['id'] for part in parts])
+        conn.commit()
+    finally:
+        conn.close()
+    items = [{'part_id': part['id'], 'quantity': 1, 'unit_price': part['price'], 'subtotal': part['price']}
+             for part in parts]
+    return customer_id, user_id, items
+
+
+def _sample_values():
+    """Termos de busca tirados do próprio banco, para buscar algo que existe."""
+    part = Part.get_page(limit=1)[0]
+    code = part.original_code
+    return {"part_name": part.name.split()[0], "manufacturer": part.manufacturer, "code": code,
+            "code_typo": code[:-1] + ("1" if code[-1] != "1" else "2")}  # Erro de digitação no último caractere
+
+
+def _type_into(prefix_search, text):
+    """Completa 'text' letra a letra, como o completer a cada tecla."""
+    for end in range(1, len(text) + 1):
+        prefix_search.complete(text[:end])
+
+
+def _report_benchmarks(user_manager, repeat):
+    """Relatórios do ReportManager; dependem de pandas/fpdf/openpyxl e são pulados se faltarem."""
+    try:
+        from modules.report_manager import ReportManager
+    except ImportError as e:
+        return {"reports": {"skipped": str(e)}}
+
+    reports_dir = tempfile.mkdtemp(prefix="spec_bench_reports_")
+    report_manager = ReportManager(reports_dir, reports_dir, user_manager)
+    start, end = "2000-01-01 00:00:00", "2100-12-31 23:59:59"
+    calls = {
+        "report_sales": lambda: report_manager.generate_sales_report(start, end, None),
+        "report_stock": lambda: report_manager.generate_stock_report(None),
+        "report_financial_summary": lambda: report_manager.generate_financial_summary_report(start, end, None),
+        "report_service_orders": lambda: report_manager.generate_service_order_report(start, end, None, None, None),
+    }
+    results = {}
+    for name, call in calls.items():
+        try:
+            results[name] = time_call(call, repeat)
+        except ImportError as e:  # openpyxl só é importado pelo pandas ao gravar a planilha
+            results[name] = {"skipped": str(e)}
+    return results
+
+
+def run(repeat=5, heavy_repeat=2):
+    """Cronometra os caminhos quentes no banco atual. 'heavy_repeat' vale para as listagens completas."""
+    managers = _managers()
+    stock, sale, service_order, financial, customer = (
+        managers[name] for name in ("stock", "sale", "service_order", "financial", "customer"))
+    samples = _sample_values()
+    customer_id, user_id, items = _sale_fixture()
+    total = sum(item['subtotal'] for item in items)
+
+    results = {
+        "startup": time_call(_startup, repeat),
+        "part_search_name": time_call(lambda: Part.search(samples["part_name"]), repeat),
+        "part_search_code": time_call(lambda: Part.search(samples["code"]), repeat),
+        "stock_search_parts": time_call(lambda: stock.search_parts(samples["manufacturer"]), repeat),
+        "stock_find_part_by_code": time_call(lambda: stock.find_part_by_code(samples["code"]), repeat),
+        "stock_find_substitutes": time_call(lambda: stock.find_substitutes(samples["code"]), repeat),
+        "stock_fuzzy_search_name": time_call(lambda: stock.fuzzy_search_parts(samples["part_name"][:-1] + "x"), repeat),
+        "stock_fuzzy_search_code": time_call(lambda: stock.fuzzy_search_parts(samples["code_typo"]), repeat),
+        "stock_get_all_parts": time_call(stock.get_all_parts, heavy_repeat),
+        "parts_catalog_load": time_call(stock.get_parts_catalog, heavy_repeat, setup=parts_catalog.invalidate),
+        "parts_catalog_page": time_call(lambda: stock.get_parts_catalog().page(None, DB_PAGE_SIZE), repeat),
+        "parts_catalog_records": time_call(lambda: stock.get_parts_catalog().records(("name", "part_number")), repeat),
+        "parts_catalog_find_code": time_call(lambda: stock.get_parts_catalog().find_by_code(samples["code"]), repeat),
+        "parts_completion_build": time_call(lambda: stock.get_parts_catalog().completion_indexes(), heavy_repeat,
+                                            setup=lambda: (parts_catalog.invalidate(), stock.get_parts_catalog())),
+        "parts_complete_typing": time_call(lambda: _type_into(PrefixSearch(stock.get_parts_catalog().completion_indexes(),
+                                                                           COMPLETER_MAX_RESULTS), samples["part_name"]), repeat),
+        "customers_completion_build": time_call(
+            lambda: CompletionIndex(fold_text, customer.get_completion_keys(), normalized=True), repeat),
+        "add_sale": time_call(lambda: sale.add_sale(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), customer_id,
+                                                   total, 0.0, "Dinheiro", user_id, items), repeat),
+        "sales_display_all": time_call(lambda: sale.get_all_sales_for_display(), heavy_repeat),
+        "sales_display_page": time_call(lambda: sale.get_all_sales_for_display(limit=DB_PAGE_SIZE), repeat),
+        "sales_display_search": time_call(lambda: sale.get_all_sales_for_display(query="silva", limit=DB_PAGE_SIZE), repeat),
+        "service_orders_all": time_call(lambda: service_order.get_all_service_orders(), heavy_repeat),
+        "service_orders_page": time_call(lambda: service_order.get_all_service_orders(limit=DB_PAGE_SIZE), repeat),
+        "service_orders_pending": time_call(lambda: service_order.get_all_service_orders(status_filter="Pendente"), heavy_repeat),
+        "financial_balance": time_call(financial.get_balance, repeat),
+    }
+    results.update(_report_benchmarks(managers["user"], heavy_repeat))
+    return results
+
+
+def _prepare_database(database, scale, seed):
+    """Usa o banco informado (gerando-o se ainda não existir) ou um banco temporário novo."""
+    if database and os.path.exists(database):
+        connection_manager.set_database(database)
+        migrations.ensure_schema()
+        return database, None, None
+    if database:
+        connection_manager.set_database(database)
+        migrations.ensure_schema()
+    else:
+        database = use_temporary_database()
+    start = time.perf_counter()
+    counts = generate_dataset(scale, seed, progress=lambda step: print(f"gerando {step}...", flush=True))
+    return database, counts, round(time.perf_counter() - start, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escala com dados sintéticos determinísticos.")
+    parser.add_argument("--scale", type=float, default=1.0, help="fração do volume completo (padrão: 1.0)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database", help="arquivo de banco a reaproveitar (gerado na primeira execução)")
+    parser.add_argument("--output", help="grava o JSON neste arquivo, além de imprimi-lo")
+    args = parser.parse_args()
+
+    database, counts, generation_s = _prepare_database(args.database, args.scale, args.seed)
+    results = run(args.repeat)
+    connection_manager.close_all()
+
+    output = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "database": database,
+            "database_mb": round(os.path.getsize(database) / 1024 / 1024, 1),
+            "generated": counts,
+            "generation_s": generation_s,
+        },
+        "results": results,
+    }
+    text = json.dumps(output, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
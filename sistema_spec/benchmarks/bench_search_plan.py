@@ -0,0 +1,112 @@
+# benchmarks/bench_search_plan.py
+"""
+Busca por prefixo x busca por substring ('contains') nos models.
+Para cada caso, confere com EXPLAIN QUERY PLAN que a busca por prefixo é resolvida por uma faixa
+no índice (SEARCH ... USING INDEX, sem SCAN da tabela) e cronometra os dois modos.
+Termina com código de saída 1 se algum plano de prefixo não usar o índice.
+
+Uso (a partir de sistema_spec/):  python -m benchmarks.bench_search_plan [escala]
+"""
+import sys
+
+from benchmarks.common import use_temporary_database, time_call
+from benchmarks.dataset import generate_dataset
+
+from models.base_model import get_db_connection
+from models.customer_model import Customer
+from models.part_model import Part
+from models.supplier_model import Supplier
+from utils.helpers import fold_text
+
+DEFAULT_SCALE = 0.02
+REPEAT = 20
+
+
+def _samples():
+    """Prefixos tirados do próprio banco, para buscar algo que existe."""
+    conn = get_db_connection()
+    try:
+        customer = conn.execute("SELECT name FROM customers ORDER BY id LIMIT 1").fetchone()['name']
+        part = conn.execute("SELECT name, part_number FROM parts ORDER BY id LIMIT 1").fetchone()
+        supplier = conn.execute("SELECT name FROM suppliers ORDER BY id LIMIT 1").fetchone()['name']
+    finally:
+        conn.close()
+    return {"customer": customer[:4], "part_name": part['name'][:5],
+            "part_number": part['part_number'][:6], "supplier": supplier[:3]}
+
+
+def _cases(samples):
+    """(nome, SQL e parâmetros do prefixo, SQL e parâmetros do 'contains', tabela da consulta)."""
+    customer_select = Customer._select_list(("name",))
+    return [
+        ("customers.name", Customer._search_query(samples["customer"], "name", ("name",), "prefix"),
+         Customer._search_query(samples["customer"], "name", ("name",), "contains"), "customers"),
+        ("customers (nome/doc/fone)", Customer._prefix_search_query(fold_text(samples["customer"]), customer_select),
+         Customer._search_query(samples["customer"], "name", ("name",), "contains"), "customers"),
+        ("parts.name", Part._search_query(samples["part_name"], "name", ("name",), "prefix"),
+         Part._search_query(samples["part_name"], "name", ("name",), "contains"), "parts"),
+        ("parts.part_number", Part._search_query(samples["part_number"], "part_number", ("part_number",), "prefix"),
+         Part._search_query(samples["part_number"], "part_number", ("part_number",), "contains"), "parts"),
+        ("parts (nome/códigos)", Part._prefix_search_query(samples["part_number"], "id, name"),
+         Part._search_query(samples["part_number"], "part_number", ("part_number",), "contains"), "parts"),
+        ("suppliers.name", Supplier._search_query(samples["supplier"], "name", ("name",), "prefix"),
+         Supplier._search_query(samples["supplier"], "name", ("name",), "contains"), "suppliers"),
+    ]
+
+
+def _plan(conn, sql, params):
+    return [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def _uses_index(plan, table):
+    """Todo acesso à tabela é uma busca por índice (nenhum 'SCAN <tabela>' completo)."""
+    return (not any(detail.startswith(f"SCAN {table}") for detail in plan)
+            and any("USING" in detail and ("INDEX" in detail or "PRIMARY KEY" in detail) for detail in plan))
+
+
+def _run_query(sql, params):
+    conn = get_db_connection()
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def run(scale=DEFAULT_SCALE):
+    use_temporary_database()
+    generate_dataset(scale)
+    results = []
+    conn = get_db_connection()
+    try:
+        for name, prefix, contains, table in _cases(_samples()):
+            plan = _plan(conn, *prefix)
+            results.append({
+                "case": name,
+                "plan": plan,
+                "uses_index": _uses_index(plan, table),
+                "prefix_rows": len(_run_query(*prefix)),
+                "prefix_ms": time_call(lambda: _run_query(*prefix), REPEAT)["median_ms"],
+                "contains_plan": _plan(conn, *contains),
+                "contains_ms": time_call(lambda: _run_query(*contains), REPEAT)["median_ms"],
+            })
+    finally:
+        conn.close()
+    return results
+
+
+def main():
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SCALE
+    results = run(scale)
+    print(f"{'caso':>26} | {'índice':>6} | {'linhas':>6} | {'prefixo (ms)':>12} | {'contains (ms)':>13}")
+    for row in results:
+        print(f"{row['case']:>26} | {'sim' if row['uses_index'] else 'NÃO':>6} | {row['prefix_rows']:>6} | "
+              f"{row['prefix_ms']:>12.3f} | {row['contains_ms']:>13.3f}")
+    for row in results:
+        print(f"\n{row['case']}\n  prefixo:  " + "\n            ".join(row['plan'])
+              + "\n  contains: " + "\n            ".join(row['contains_plan']))
+    if not all(row['uses_index'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
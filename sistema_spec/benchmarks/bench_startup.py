@@ -0,0 +1,84 @@
+# benchmarks/bench_startup.py
+"""
+Custo de inicialização do esquema do banco.
+- antigo: verificações de colunas com SELECT/except + _create_table de todos os models na tela
+  principal + o _create_table repetido no __init__ de cada manager, cada um com sua conexão e commit;
+- migrações: ensure_schema() em um banco já atualizado (uma leitura de schema_version).
+Também mede a primeira execução em um banco vazio (todas as migrações em uma transação).
+
+Uso (a partir de sistema_spec/):  python -m benchmarks.bench_startup
+"""
+import sqlite3
+
+from benchmarks.common import use_temporary_database, time_call
+
+from models import migrations
+from models.base_model import get_db_connection
+from models.connection_manager import connection_manager
+from models.user_model import User
+from models.customer_model import Customer
+from models.supplier_model import Supplier
+from models.part_model import Part
+from models.sale_model import Sale, SaleItem
+from models.service_order_model import ServiceOrder, ServiceOrderItem
+from models.financial_transaction_model import FinancialTransaction
+from models.notification_model import Notification
+from models.report_model import Report
+from models.settings_model import Setting
+
+REPEAT = 20
+
+ALL_MODELS = [User, Customer, Supplier, Part, Sale, SaleItem, ServiceOrder, ServiceOrderItem,
+              FinancialTransaction, Notification, Report, Setting]
+# _create_table chamados pelos managers em MainApplication._initialize_app_components
+MANAGER_MODELS = [Setting, User, Customer, Supplier, Notification, Part, Sale, SaleItem, FinancialTransaction,
+                  ServiceOrder, ServiceOrderItem, FinancialTransaction, Report]
+
+
+def _legacy_startup():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    for probe in ("SELECT entity_id, entity_type FROM notifications LIMIT 1",
+                  "SELECT start_date, end_date, payment_status FROM service_orders LIMIT 1",
+                  "SELECT is_quote FROM sales LIMIT 1"):
+        try:
+            cursor.execute(probe)
+        except sqlite3.OperationalError:
+            pass
+    conn.close()
+    for model in ALL_MODELS + MANAGER_MODELS:
+        conn = get_db_connection()
+        model._create_table(conn.cursor())  # Cada chamada com sua própria conexão e commit, como antes
+        conn.commit()
+        conn.close()
+
+
+def _versioned_startup():
+    migrations._checked_databases.clear()  # Simula um processo novo
+    migrations.ensure_schema()
+
+
+def _fresh_database():
+    use_temporary_database(migrate=False)
+
+
+def run():
+    use_temporary_database()
+    results = {
+        "legacy_ms": time_call(_legacy_startup, REPEAT),
+        "versioned_ms": time_call(_versioned_startup, REPEAT),
+    }
+    results["first_run_ms"] = time_call(_versioned_startup, 5, setup=_fresh_database)
+    connection_manager.close_all()
+    return results
+
+
+def main():
+    results = run()
+    for name, stats in results.items():
+        print(f"{name:>13}: mediana {stats['median_ms']:.3f} ms (mín. {stats['min_ms']:.3f} ms)")
+    print(f"ganho na inicialização: {results['legacy_ms']['median_ms'] / results['versioned_ms']['median_ms']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
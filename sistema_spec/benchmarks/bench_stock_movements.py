@@ -0,0 +1,86 @@
+# benchmarks/bench_stock_movements.py
+"""
+Latência por pedido em função do número de itens.
+Compara o caminho item a item (leitura da peça + UPDATE de estoque + INSERT do item por linha)
+com o caminho em lote usado por SaleManager.add_sale (StockManager.apply_stock_movements
++ SaleItem.insert_many).
+
+Uso (a partir de sistema_spec/):  python -m benchmarks.bench_stock_movements
+"""
+from benchmarks.common import use_temporary_database, time_call
+
+from models.base_model import unit_of_work
+from models.part_model import Part
+from models.sale_model import Sale, SaleItem
+from models.customer_model import Customer
+from models.user_model import User
+from modules.notification_manager import NotificationManager
+from modules.stock_manager import StockManager
+from modules.sale_manager import SaleManager
+
+ITEM_COUNTS = (1, 5, 10, 20, 40, 80)
+REPEAT = 20
+
+
+def _seed(part_count):
+    user = User(username="benchmark", password_hash="-", role="Administrador")
+    user.save()
+    customer = Customer(name="CLIENTE BENCHMARK")
+    customer.save()
+    parts = [
+        Part(name=f"PECA {i}", part_number=f"BN-{i:05d}", price=10.0, cost=5.0,
+             stock=1_000_000, min_stock=0)
+        for i in range(part_count)
+    ]
+    Part.insert_many(parts)
+    return user.id, customer.id, [part.id for part in parts]
+
+
+def _add_sale_itemwise(stock_manager, customer_id, user_id, items):
+    """Reproduz o fluxo antigo: uma leitura, um UPDATE e um INSERT por item."""
+    with unit_of_work() as cursor:
+        sale = Sale(sale_date="2025-01-01T10:00:00", customer_id=customer_id, total_amount=0.0,
+                    payment_method="PIX", user_id=user_id, status="PENDENTE PAGAMENTO")
+        sale.save(cursor=cursor)
+        for item in items:
+            part = stock_manager.get_part_by_id(item['part_id'])
+            if not part or part.stock < item['quantity']:
+                raise ValueError("Estoque insuficiente.")
+            stock_manager.remove_stock(item['part_id'], item['quantity'], user_id, cursor=cursor)
+            SaleItem(sale_id=sale.id, part_id=item['part_id'], quantity=item['quantity'],
+                     unit_price=item['unit_price'], subtotal=item['subtotal']).save(cursor=cursor)
+
+
+def run():
+    use_temporary_database()
+    notification_manager = NotificationManager()
+    stock_manager = StockManager(notification_manager)
+    sale_manager = SaleManager(stock_manager)
+    user_id, customer_id, part_ids = _seed(max(ITEM_COUNTS))
+
+    results = []
+    for count in ITEM_COUNTS:
+        items = [
+            {'part_id': part_id, 'quantity': 1, 'unit_price': 10.0, 'subtotal': 10.0}
+            for part_id in part_ids[:count]
+        ]
+        itemwise = time_call(lambda: _add_sale_itemwise(stock_manager, customer_id, user_id, items), REPEAT)
+        batched = time_call(
+            lambda: sale_manager.add_sale("2025-01-01T10:00:00", customer_id, 10.0 * count, 0.0,
+                                          "PIX", user_id, items),
+            REPEAT
+        )
+        results.append({"items": count, "itemwise": itemwise, "batched": batched})
+    return results
+
+
+def main():
+    results = run()
+    print(f"{'itens':>6} | {'item a item (ms)':>17} | {'em lote (ms)':>13} | {'ganho':>6}")
+    for row in results:
+        itemwise, batched = row["itemwise"]["median_ms"], row["batched"]["median_ms"]
+        print(f"{row['items']:>6} | {itemwise:>17.3f} | {batched:>13.3f} | {itemwise / batched:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/bench_table_views.py
+"""
+Preenchimento da tabela de Peças/Estoque na tela principal:
+- antigo: QTableWidget com um QTableWidgetItem por célula e o fundo das linhas com estoque baixo
+  pintado célula a célula, depois de ler o catálogo inteiro (como o load_parts anterior);
+- modelo: QTableView + RecordTableModel, que lê a primeira página pelo StockManager e formata
+  apenas as células desenhadas (as páginas seguintes vêm com fetchMore, ao rolar).
+Roda sem janela (QT_QPA_PLATFORM=offscreen). Mede o tempo até a tabela estar desenhada, a
+memória residente do processo acrescentada por ela e, no modelo, o custo de rolar até o fim
+algumas vezes. O modelo é medido primeiro, para que a memória que o QTableWidget deixa alocada
+não esconda o consumo dele.
+
+Uso (a partir de sistema_spec/):
+    python -m benchmarks.bench_table_views --scale 0.5            # 100 mil peças
+    python -m benchmarks.bench_table_views --database /tmp/spec_1x.db
+"""
+import argparse
+import gc
+import os
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QTableView, QTableWidget, QTableWidgetItem
+from PySide6.QtGui import QColor
+
+from benchmarks.bench_scale import _prepare_database
+from benchmarks.dataset import DEFAULT_SEED
+
+from models.connection_manager import connection_manager
+from modules.stock_manager import StockManager
+from modules.supplier_manager import SupplierManager
+from utils.table_models import RecordTableModel
+
+HEADERS = ["ID", "Nome", "Nº Peça", "Fabricante", "Preço", "Custo", "Estoque", "Mínimo", "Localização",
+           "Fornecedor", "Categoria", "Cód. Original", "Cód. Barras"]
+LOW_STOCK_BACKGROUND = QColor(255, 50, 50)
+SCROLLS = 5  # Rolagens até o fim da tabela do modelo (cada uma dispara um fetchMore)
+
+
+def _rss_mb():
+    """Memória residente do processo em MB (Linux); None onde /proc não existe."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _legacy_table(stock, supplier_manager):
+    table = QTableWidget()
+    table.setColumnCount(len(HEADERS))
+    table.setHorizontalHeaderLabels(HEADERS)
+    parts = stock.get_all_parts()
+    suppliers = supplier_manager.get_suppliers_by_ids(part.supplier_id for part in parts)
+    for row, part in enumerate(parts):
+        supplier = suppliers.get(part.supplier_id)
+        values = [str(part.id), part.name, part.part_number, part.manufacturer, f"R$ {part.price:.2f}",
+                  f"R$ {part.cost:.2f}", str(part.stock), str(part.min_stock), part.location,
+                  supplier.name if supplier else "N/A", part.category, part.original_code, part.barcode]
+        table.insertRow(row)
+        for column, value in enumerate(values):
+            # Colunas vazias viram "" (QTableWidgetItem(None) derruba o processo em algumas versões do PySide6)
+            table.setItem(row, column, QTableWidgetItem(value if value is not None else ""))
+        if part.stock <= part.min_stock:
+            for column in range(table.columnCount()):
+                table.item(row, column).setBackground(LOW_STOCK_BACKGROUND)
+    return table
+
+
+def _model_table(stock, supplier_manager):
+    suppliers = {}
+
+    def fetch_page(last, limit):
+        parts = stock.get_all_parts(after_id=last.id if last else None, limit=limit)
+        suppliers.update(supplier_manager.get_suppliers_by_ids({part.supplier_id for part in parts} - suppliers.keys()))
+        return parts
+
+    model = RecordTableModel([
+        ("ID", lambda part: part.id),
+        ("Nome", lambda part: part.name),
+        ("Nº Peça", lambda part: part.part_number),
+        ("Fabricante", lambda part: part.manufacturer),
+        ("Preço", lambda part: f"R$ {part.price:.2f}"),
+        ("Custo", lambda part: f"R$ {part.cost:.2f}"),
+        ("Estoque", lambda part: part.stock),
+        ("Mínimo", lambda part: part.min_stock),
+        ("Localização", lambda part: part.location),
+        ("Fornecedor", lambda part: getattr(suppliers.get(part.supplier_id), "name", "N/A")),
+        ("Categoria", lambda part: part.category),
+        ("Cód. Original", lambda part: part.original_code),
+        ("Cód. Barras", lambda part: part.barcode),
+    ], row_background=lambda part: LOW_STOCK_BACKGROUND if part.stock <= part.min_stock else None)
+    table = QTableView()
+    table.setModel(model)
+    model.set_pages(fetch_page)
+    return table
+
+
+def _measure(app, build, scroll=False):
+    gc.collect()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    table = build()
+    table.resize(1280, 720)
+    table.show()
+    app.processEvents()
+    result = {"populate_ms": round((time.perf_counter() - start) * 1000, 1)}
+    rss_after = _rss_mb()
+    result["rss_mb"] = round(rss_after - rss_before, 1) if rss_before is not None else None
+    if scroll:
+        start = time.perf_counter()
+        for _ in range(SCROLLS):
+            table.scrollToBottom()
+            app.processEvents()
+        result["scroll_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    result["rows"] = table.model().rowCount()
+    table.close()
+    table.deleteLater()
+    app.processEvents()
+    return result
+
+
+def run():
+    app = QApplication.instance() or QApplication([])
+    stock, supplier_manager = StockManager(), SupplierManager()
+    return {
+        "model": _measure(app, lambda: _model_table(stock, supplier_manager), scroll=True),
+        "legacy": _measure(app, lambda: _legacy_table(stock, supplier_manager)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="QTableWidget x QTableView + RecordTableModel na tabela de peças.")
+    parser.add_argument("--scale", type=float, default=0.5, help="fração do volume completo (padrão: 0.5)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--database", help="arquivo de banco a reaproveitar (gerado na primeira execução)")
+    args = parser.parse_args()
+
+    _prepare_database(args.database, args.scale, args.seed)
+    results = run()
+    connection_manager.close_all()
+
+    for name, result in results.items():
+        rss = f"{result['rss_mb']:.1f} MB" if result['rss_mb'] is not None else "n/d"
+        line = f"{name:>6}: {result['rows']:>7} linhas, {result['populate_ms']:>9.1f} ms, memória +{rss}"
+        if "scroll_ms" in result:
+            line += f", {SCROLLS} rolagens até o fim em {result['scroll_ms']:.1f} ms"
+        print(line)
+    print(f"ganho no preenchimento: {results['legacy']['populate_ms'] / results['model']['populate_ms']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
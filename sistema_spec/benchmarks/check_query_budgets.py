@@ -0,0 +1,116 @@
+# benchmarks/check_query_budgets.py
+"""
+Orçamento de comandos SQL e de conexões de ações críticas, conferido com assert_query_budget
+(models/query_tracer.py) sobre um banco sintético:
+- MainApplication.load_parts, com o orçamento declarado no seu @query_budget, na carga inicial
+  (primeira página e fornecedores dela) e depois de uma busca digitada;
+- SaleManager.get_sale_details_for_email, que lê a venda, os itens e as peças em uma transação só.
+Cada ação roda uma vez antes de ser medida: o que só é lido uma vez por processo (ex.: se o
+índice de busca existe) não entra no orçamento.
+Roda sem janela (QT_QPA_PLATFORM=offscreen). Termina com código de saída 1 se alguma ação
+ultrapassar o orçamento, listando os comandos que ela executou.
+
+Uso (a partir de sistema_spec/):  python -m benchmarks.check_query_budgets [escala]
+"""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QLineEdit, QTableView
+
+from benchmarks.common import use_temporary_database
+from benchmarks.dataset import generate_dataset
+
+from gui_app import MainApplication
+from models.base_model import get_db_connection
+from models.query_tracer import assert_query_budget
+from modules.sale_manager import SaleManager
+from modules.stock_manager import StockManager
+from modules.supplier_manager import SupplierManager
+from utils.search_controller import SearchController
+from utils.table_models import RecordTableModel
+
+DEFAULT_SCALE = 0.005
+SALE_DETAILS_MAX_QUERIES = 4  # BEGIN, venda, itens e peças dos itens (get_many)
+SALE_DETAILS_MAX_CONNECTIONS = 1
+
+
+class _PartsScreen:
+    """
+    O que MainApplication.load_parts usa da janela principal (campo de busca, tabela, managers
+    e SearchController), sem montar a janela inteira nem passar pelo login.
+    """
+    load_parts = MainApplication.load_parts
+    _search_parts = MainApplication._search_parts
+    _show_parts = MainApplication._show_parts
+
+    def __init__(self, stock_manager, supplier_manager):
+        self.stock_manager = stock_manager
+        self.supplier_manager = supplier_manager
+        self.search_peças_estoque_input = QLineEdit()
+        self.peças_estoque_table = QTableView()
+        self.peças_estoque_table.setModel(RecordTableModel([("ID", lambda part: part.id)]))
+        self.search_controller = SearchController()
+        self.search_controller.add("peças_estoque", self._search_parts, self._show_parts)
+
+
+def _samples():
+    """Um trecho de nome de peça e a venda com mais itens, tirados do próprio banco."""
+    conn = get_db_connection()
+    try:
+        part_name = conn.execute("SELECT name FROM parts ORDER BY id LIMIT 1").fetchone()['name']
+        sale_id = conn.execute(
+            "SELECT sale_id FROM sale_items GROUP BY sale_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()['sale_id']
+    finally:
+        conn.close()
+    return {"part_query": part_name[:5], "sale_id": sale_id}
+
+
+def _check(name, action, max_queries, max_connections=None):
+    """Executa 'action()' uma vez e de novo dentro de assert_query_budget; devolve o resultado da verificação."""
+    action()
+    try:
+        with assert_query_budget(max_queries, max_connections, name=name) as stats:
+            action()
+    except AssertionError as e:
+        return {"action": name, "ok": False, "detail": str(e)}
+    return {"action": name, "ok": True, "detail": stats.summary()}
+
+
+def run(scale=DEFAULT_SCALE):
+    app = QApplication.instance() or QApplication([])
+    use_temporary_database()
+    generate_dataset(scale)
+    samples = _samples()
+    stock_manager = StockManager()
+    screen = _PartsScreen(stock_manager, SupplierManager())
+    sale_manager = SaleManager(stock_manager)
+    load_parts_budget = (MainApplication.load_parts.max_queries, MainApplication.load_parts.max_connections)
+
+    def load_parts_searching():
+        screen.search_peças_estoque_input.setText(samples["part_query"])
+        screen.load_parts()
+
+    results = [
+        _check("load_parts (carga inicial)", screen.load_parts, *load_parts_budget),
+        _check("load_parts (busca)", load_parts_searching, *load_parts_budget),
+        _check("get_sale_details_for_email", lambda: sale_manager.get_sale_details_for_email(samples["sale_id"]),
+               SALE_DETAILS_MAX_QUERIES, SALE_DETAILS_MAX_CONNECTIONS),
+    ]
+    del app
+    return results
+
+
+def main():
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SCALE
+    results = run(scale)
+    for row in results:
+        print(f"[{'ok' if row['ok'] else 'ESTOUROU'}] {row['action']}: {row['detail']}")
+    if not all(row['ok'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/common.py
+"""
+Infraestrutura comum dos benchmarks: banco temporário isolado e cronometragem.
+Os benchmarks nunca tocam em data/database.db; cada execução usa um arquivo novo.
+"""
+import os
+import sys
+import tempfile
+import time
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from models.connection_manager import connection_manager
+from models.migrations import ensure_schema
+
+
+def use_temporary_database(prefix="spec_bench_", migrate=True):
+    """
+    Aponta o pool de conexões para um banco vazio em um diretório temporário
+    e, por padrão, aplica as migrações para criar o esquema.
+    """
+    directory = tempfile.mkdtemp(prefix=prefix)
+    path = os.path.join(directory, "benchmark.db")
+    connection_manager.set_database(path)
+    if migrate:
+        ensure_schema()
+    return path
+
+
+def time_call(func, repeat=5, setup=None):
+    """
+    Executa 'func' 'repeat' vezes e retorna as estatísticas em milissegundos.
+    'setup', se informado, roda antes de cada repetição e não entra na medição.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "repeat": repeat,
+    }
@@ -0,0 +1,289 @@
+# benchmarks/dataset.py
+"""
+Gerador determinístico de dados sintéticos para os benchmarks de escala.
+A mesma semente produz sempre o mesmo banco: peças com códigos originais/similares e
+códigos de barras, clientes, vendas com itens, ordens de serviço e transações financeiras.
+Tudo é gravado pelos próprios models (insert_many), em lotes, como a aplicação faria.
+
+Uso (a partir de sistema_spec/):
+    from benchmarks.dataset import generate_dataset
+    counts = generate_dataset(scale=0.01)   # 1% do volume completo
+"""
+import random
+from datetime import datetime, timedelta
+
+from models.user_model import User
+from models.customer_model import Customer
+from models.supplier_model import Supplier
+from models.part_model import Part
+from models import part_equivalence, parts_catalog
+from models.sale_model import Sale, SaleItem
+from models.service_order_model import ServiceOrder, ServiceOrderItem
+from models.financial_transaction_model import FinancialTransaction
+
+# Volume com scale=1.0
+FULL_SCALE = {
+    "users": 20,
+    "suppliers": 500,
+    "parts": 200_000,
+    "customers": 50_000,
+    "sales": 1_000_000,
+    "service_orders": 300_000,
+    "expenses": 100_000,
+}
+CHUNK_SIZE = 10_000  # Instâncias por insert_many (uma transação por lote)
+DEFAULT_SEED = 20240601
+
+START_DATE = datetime(2023, 1, 1)
+PERIOD_DAYS = 730
+
+PART_TYPES = [
+    "FILTRO DE OLEO", "FILTRO DE AR", "FILTRO DE COMBUSTIVEL", "PASTILHA DE FREIO", "DISCO DE FREIO",
+    "AMORTECEDOR DIANTEIRO", "AMORTECEDOR TRASEIRO", "VELA DE IGNICAO", "CORREIA DENTADA",
+    "BOMBA D'AGUA", "ROLAMENTO DE RODA", "JUNTA DO CABECOTE", "KIT EMBREAGEM", "SENSOR DE OXIGENIO",
+    "BOBINA DE IGNICAO", "TERMOSTATO", "BIELETA", "PIVO DE SUSPENSAO", "TERMINAL DE DIRECAO", "RADIADOR",
+]
+MANUFACTURERS = [
+    "BOSCH", "MAHLE", "NGK", "COFAP", "MONROE", "VALEO", "SKF", "TRW", "FRAS-LE", "GATES",
+    "DAYCO", "METAL LEVE", "WEGA", "TECFIL", "MAGNETI MARELLI", "NAKATA", "VIEMAR", "SABO",
+]
+VEHICLES = [
+    ("VOLKSWAGEN", "GOL"), ("VOLKSWAGEN", "POLO"), ("FIAT", "UNO"), ("FIAT", "STRADA"),
+    ("CHEVROLET", "ONIX"), ("CHEVROLET", "CELTA"), ("FORD", "KA"), ("FORD", "FIESTA"),
+    ("RENAULT", "SANDERO"), ("HYUNDAI", "HB20"), ("TOYOTA", "COROLLA"), ("HONDA", "CIVIC"),
+]
+CATEGORIES = ["MOTOR", "FREIOS", "SUSPENSAO", "IGNICAO", "ARREFECIMENTO", "TRANSMISSAO", "DIRECAO", "FILTROS"]
+FIRST_NAMES = [
+    "JOÃO", "MARIA", "JOSÉ", "ANA", "ANTÔNIO", "FRANCISCA", "CARLOS", "PAULO", "ADRIANA", "LUCAS",
+    "JULIANA", "MÁRCIA", "PEDRO", "FERNANDA", "RAFAEL", "PATRÍCIA", "LUIZ", "ALINE", "SÉRGIO", "CONCEIÇÃO",
+]
+LAST_NAMES = [
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA", "GOMES",
+    "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ARAÚJO", "GONÇALVES", "ROCHA", "ALMEIDA", "NASCIMENTO", "BRAGA",
+]
+CITIES = ["SÃO PAULO", "CAMPINAS", "BELO HORIZONTE", "CURITIBA", "PORTO ALEGRE", "GOIÂNIA", "RECIFE", "SALVADOR"]
+PAYMENT_METHODS = ["Dinheiro", "Cartão de Crédito", "Cartão de Débito", "Pix", "Boleto"]
+SO_STATUSES = ["Pendente", "Em Andamento", "Concluída", "Cancelada"]
+SO_PAYMENT_STATUSES = ["Pendente", "Pago", "Parcialmente Pago"]
+EXPENSE_CATEGORIES = ["Fornecedor", "Aluguel", "Salários", "Energia", "Impostos", "Manutenção"]
+
+
+def scaled_counts(scale=1.0):
+    """Quantidade de registros de cada tabela para a escala informada (mínimo de 1)."""
+    return {name: max(1, int(count * scale)) for name, count in FULL_SCALE.items()}
+
+
+def _timestamp(rng):
+    moment = START_DATE + timedelta(seconds=rng.randrange(PERIOD_DAYS * 86400))
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _insert_in_chunks(model_class, instances):
+    """Grava as instâncias em lotes de CHUNK_SIZE e retorna a lista de ids gerados."""
+    ids = []
+    chunk = []
+    for instance in instances:
+        chunk.append(instance)
+        if len(chunk) >= CHUNK_SIZE:
+            ids.extend(_insert_chunk(model_class, chunk))
+            chunk = []
+    if chunk:
+        ids.extend(_insert_chunk(model_class, chunk))
+    return ids
+
+
+def _insert_chunk(model_class, chunk):
+    if not model_class.insert_many(chunk):
+        raise RuntimeError(f"Falha ao gerar dados para {model_class._table_name}.")
+    return [instance.id for instance in chunk]
+
+
+def _users(count):
+    roles = ["Administrador", "Gerente", "Caixa", "Funcionário", "Financeiro"]
+    for i in range(count):
+        # Hash fixo: os benchmarks não fazem login, e bcrypt em massa só atrasaria a geração
+        yield User(username=f"usuario{i:03d}", password_hash="benchmark", role=roles[i % len(roles)], is_active=1)
+
+
+def _suppliers(rng, count):
+    for i in range(count):
+        yield Supplier(
+            name=f"{rng.choice(MANUFACTURERS)} DISTRIBUIDORA {i:04d}",
+            cnpj=f"{10_000_000 + i:08d}0001{i % 100:02d}",
+            contact_person=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            phone=f"(11) 9{rng.randrange(10**8):08d}",
+            email=f"contato{i}@fornecedor.com.br",
+            address=f"RUA {rng.choice(LAST_NAMES)}, {rng.randrange(1, 3000)} - {rng.choice(CITIES)}",
+        )
+
+
+def _parts(rng, count, supplier_ids):
+    for i in range(count):
+        part_type = rng.choice(PART_TYPES)
+        manufacturer = rng.choice(MANUFACTURERS)
+        make, model = rng.choice(VEHICLES)
+        cost = round(rng.uniform(5, 800), 2)
+        has_similar = rng.random() < 0.6
+        # Famílias de até 4 peças consecutivas: o similar 02 aponta para o código original da
+        # anterior, criando as classes de equivalência usadas pela busca de substitutos
+        cross_reference = i % 4 != 0 and rng.random() < 0.5
+        yield Part(
+            name=f"{part_type} {make} {model}",
+            description=f"{part_type} {manufacturer} PARA {make} {model} {rng.randrange(1998, 2025)}",
+            part_number=f"{manufacturer[:3]}-{i:07d}",
+            manufacturer=manufacturer,
+            price=round(cost * rng.uniform(1.3, 2.2), 2),
+            cost=cost,
+            stock=rng.randrange(0, 200),
+            min_stock=rng.randrange(1, 10),
+            location=f"{chr(65 + rng.randrange(12))}{rng.randrange(1, 40):02d}-{rng.randrange(1, 8)}",
+            supplier_id=rng.choice(supplier_ids),
+            category=rng.choice(CATEGORIES),
+            original_code=f"OR{i:07d}",
+            similar_code_01=f"SM{i:07d}A" if has_similar else None,
+            similar_code_02=f"OR{i - 1:07d}" if cross_reference else (f"SM{i:07d}B" if has_similar and rng.random() < 0.5 else None),
+            barcode=f"789{i:010d}",
+        )
+
+
+def _customers(rng, count):
+    for i in range(count):
+        company = rng.random() < 0.2
+        name = (f"AUTO CENTER {rng.choice(LAST_NAMES)} {i}" if company
+                else f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}")
+        yield Customer(
+            name=name,
+            cpf_cnpj=f"{i:08d}0001{i % 100:02d}" if company else f"{i:09d}{i % 100:02d}",
+            phone=f"(11) 9{rng.randrange(10**8):08d}",
+            email=f"cliente{i}@email.com.br",
+            street=f"RUA {rng.choice(LAST_NAMES)}",
+            number=str(rng.randrange(1, 3000)),
+            neighborhood=f"BAIRRO {rng.randrange(1, 200)}",
+            city=rng.choice(CITIES),
+            zip_code=f"{rng.randrange(10**8):08d}",
+        )
+
+
+def _sales_with_items(rng, count, customer_ids, user_ids, part_catalog):
+    """Gera (venda, itens) em lotes; os itens recebem o sale_id após a gravação da venda."""
+    sales_done = 0
+    items_done = 0
+    paid = []
+    while sales_done < count:
+        batch = min(CHUNK_SIZE, count - sales_done)
+        sales = []
+        sale_items = []
+        for _ in range(batch):
+            items = []
+            for _ in range(rng.choice((1, 1, 2, 2, 3, 4))):
+                part_id, unit_price = rng.choice(part_catalog)
+                quantity = rng.randrange(1, 5)
+                items.append((part_id, quantity, unit_price, round(quantity * unit_price, 2)))
+            is_quote = rng.random() < 0.1
+            status = "ORÇAMENTO" if is_quote else rng.choice(("PAGA", "PAGA", "PAGA", "PENDENTE PAGAMENTO", "CANCELADA"))
+            total = round(sum(item[3] for item in items), 2)
+            sales.append(Sale(
+                sale_date=_timestamp(rng), customer_id=rng.choice(customer_ids), total_amount=total,
+                discount_applied=0.0, payment_method=rng.choice(PAYMENT_METHODS), user_id=rng.choice(user_ids),
+                status=status, closed_by_user_id=None, is_quote=is_quote,
+            ))
+            sale_items.append(items)
+        _insert_chunk(Sale, sales)
+        _insert_in_chunks(SaleItem, (
+            SaleItem(sale_id=sale.id, part_id=part_id, quantity=quantity, unit_price=unit_price, subtotal=subtotal)
+            for sale, items in zip(sales, sale_items)
+            for part_id, quantity, unit_price, subtotal in items
+        ))
+        paid.extend(sale for sale in sales if sale.status == "PAGA")
+        sales_done += batch
+        items_done += sum(len(items) for items in sale_items)
+        if len(paid) >= CHUNK_SIZE:
+            _insert_revenues(paid)
+            paid = []
+    _insert_revenues(paid)
+    return items_done
+
+
+def _insert_revenues(paid_sales):
+    _insert_in_chunks(FinancialTransaction, (
+        FinancialTransaction(
+            transaction_date=sale.sale_date, amount=sale.total_amount, type="Receita", category="Venda",
+            description=f"Receita da Venda ID {sale.id}", related_entity_id=sale.id, related_entity_type="sale",
+        )
+        for sale in paid_sales
+    ))
+
+
+def _service_orders(rng, count, customer_ids, user_ids):
+    for _ in range(count):
+        make, model = rng.choice(VEHICLES)
+        labor = round(rng.uniform(50, 900), 2)
+        parts_cost = round(rng.uniform(0, 1500), 2)
+        status = rng.choice(SO_STATUSES)
+        order_date = _timestamp(rng)
+        yield ServiceOrder(
+            order_date=order_date, customer_id=rng.choice(customer_ids), vehicle_make=make, vehicle_model=model,
+            vehicle_year=str(rng.randrange(1998, 2025)),
+            vehicle_plate=f"{''.join(chr(65 + rng.randrange(26)) for _ in range(3))}{rng.randrange(10)}"
+                          f"{chr(65 + rng.randrange(10))}{rng.randrange(100):02d}",
+            description=f"REVISAO {rng.choice(CATEGORIES)}", status=status,
+            total_amount=round(labor + parts_cost, 2), labor_cost=labor, parts_cost=parts_cost,
+            assigned_user_id=rng.choice(user_ids),
+            start_date=order_date if status != "Pendente" else None,
+            end_date=order_date if status == "Concluída" else None,
+            payment_status=rng.choice(SO_PAYMENT_STATUSES),
+        )
+
+
+def _service_order_items(rng, service_order_ids, part_catalog):
+    for so_id in service_order_ids:
+        part_id, unit_price = rng.choice(part_catalog)
+        yield ServiceOrderItem(service_order_id=so_id, part_id=part_id, quantity=1,
+                               unit_price=unit_price, subtotal=unit_price, is_service=0)
+        labor = round(rng.uniform(50, 400), 2)
+        yield ServiceOrderItem(service_order_id=so_id, part_id=None, quantity=1, unit_price=labor,
+                               subtotal=labor, is_service=1, description="MAO DE OBRA")
+
+
+def _expenses(rng, count):
+    for _ in range(count):
+        category = rng.choice(EXPENSE_CATEGORIES)
+        yield FinancialTransaction(
+            transaction_date=_timestamp(rng), amount=round(rng.uniform(20, 5000), 2), type="Despesa",
+            category=category, description=f"DESPESA {category.upper()}",
+        )
+
+
+def generate_dataset(scale=1.0, seed=DEFAULT_SEED, progress=None):
+    """
+    Popula o banco atual (normalmente um banco temporário, ver common.use_temporary_database)
+    e retorna a quantidade de registros gerados por tabela. 'progress', se informado,
+    recebe o nome de cada etapa antes de ela começar.
+    """
+    rng = random.Random(seed)
+    counts = scaled_counts(scale)
+    report = progress or (lambda step: None)
+
+    report("users")
+    user_ids = _insert_in_chunks(User, _users(counts["users"]))
+    report("suppliers")
+    supplier_ids = _insert_in_chunks(Supplier, _suppliers(rng, counts["suppliers"]))
+    report("parts")
+    parts = list(_parts(rng, counts["parts"], supplier_ids))
+    _insert_in_chunks(Part, parts)
+    part_catalog = [(part.id, part.price) for part in parts]
+    del parts
+    part_equivalence.rebuild()  # insert_many não passa pelo StockManager
+    parts_catalog.invalidate()  # Pelo mesmo motivo, um catálogo já lido não vê as peças novas
+    report("customers")
+    customer_ids = _insert_in_chunks(Customer, _customers(rng, counts["customers"]))
+    report("sales")
+    sale_item_count = _sales_with_items(rng, counts["sales"], customer_ids, user_ids, part_catalog)
+    report("service_orders")
+    so_ids = _insert_in_chunks(ServiceOrder, _service_orders(rng, counts["service_orders"], customer_ids, user_ids))
+    so_item_ids = _insert_in_chunks(ServiceOrderItem, _service_order_items(rng, so_ids, part_catalog))
+    report("expenses")
+    _insert_in_chunks(FinancialTransaction, _expenses(rng, counts["expenses"]))
+
+    counts.update(sale_items=sale_item_count, service_order_items=len(so_item_ids))
+    return counts
@@ -18,6 +18,28 @@ os.makedirs(REPORTS_DIR, exist_ok=True)
 
 # --- Configurações do Banco de Dados ---
 DB_NAME = os.path.join(DATA_DIR, 'database.db')
+DB_BUSY_TIMEOUT_MS = 5000          # Tempo de espera quando o banco está bloqueado por outro terminal
+DB_CACHE_SIZE_KB = 20000           # Cache de páginas por conexão (~20 MB)
+DB_MMAP_SIZE = 256 * 1024 * 1024   # Leitura via memory-mapped I/O (256 MB)
+DB_POOL_MAX_IDLE = 4               # Conexões ociosas mantidas abertas por thread
+DB_FETCH_BATCH_SIZE = 500          # Linhas lidas por fetchmany() nas iterações em lote
+DB_PAGE_SIZE = 200                 # Tamanho padrão de página nas listagens paginadas
+DB_CANCEL_CHECK_OPS = 1000         # Instruções do SQLite entre verificações de cancelamento (connection_manager.cancellable)
+
+# --- Busca nas telas (utils.search_controller) ---
+SEARCH_DEBOUNCE_MS = 250           # Espera após a última tecla antes de consultar o banco
+SEARCH_MAX_THREADS = 2             # Threads que executam as buscas fora da interface
+COMPLETER_MAX_RESULTS = 50         # Sugestões exibidas pelos completers de clientes e peças (utils.completion_index)
+
+# --- Catálogo de peças em memória (models.parts_catalog) ---
+PARTS_CATALOG_MAX_AGE_S = 300      # Após este tempo o catálogo é relido (alterações feitas por outros terminais)
+
+# --- Instrumentação SQL (opcional) ---
+# Ative com a variável de ambiente SPEC_SQL_TRACE=1 (ou connection_manager.set_tracing(True)).
+SQL_TRACE_ENABLED = os.environ.get('SPEC_SQL_TRACE') == '1'
+SQL_SLOW_QUERY_MS = float(os.environ.get('SPEC_SQL_SLOW_MS', 50))  # Acima deste tempo o comando vai para o log de consultas lentas
+SQL_TRACE_TOP_N = 20               # Comandos listados no relatório de fim de sessão
+SQL_SLOW_QUERY_LOG = os.path.join(DATA_DIR, 'logs', 'slow_queries.log')
 
 # --- Configurações de API ---
 # URL da API de consulta de veículos (substitua pela URL real da API que você usa)
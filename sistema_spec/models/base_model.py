@@ -1,137 +1,576 @@
 # models/base_model.py
 import sqlite3
-from config.settings import DB_NAME
+from operator import itemgetter
+from config.settings import DB_FETCH_BATCH_SIZE, DB_PAGE_SIZE
+from models.connection_manager import connection_manager
+from utils.helpers import fold_text
 
 def get_db_connection():
-    """Cria e retorna uma conexão com o banco de dados."""
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
-    return conn
+    """
+    Retorna uma conexão do pool, já configurada (WAL, cache, foreign_keys...).
+    Chamar 'close()' devolve a conexão ao pool em vez de fechá-la.
+    Se houver uma unidade de trabalho ativa na thread, retorna a conexão dela.
+    """
+    return connection_manager.get_connection()
+
+def unit_of_work(cursor=None, immediate=True):
+    """
+    Context manager da transação compartilhada (unidade de trabalho).
+    Uso: `with unit_of_work() as cursor: ...` -- chamadas aninhadas de models e managers
+    reutilizam a mesma conexão e a mesma transação, comitada uma única vez ao final.
+    """
+    return connection_manager.unit_of_work(cursor=cursor, immediate=immediate)
+
+def on_commit(callback):
+    """
+    Agenda 'callback()' para depois do commit da transação atual (ou executa já, fora de uma).
+    Uso: atualizar um cache em memória só quando a alteração no banco se confirmar.
+    """
+    connection_manager.on_commit(callback)
+
+def cancellable(token):
+    """
+    Context manager que torna interrompíveis por 'token' (CancellationToken) as consultas da thread.
+    Uso: `with cancellable(token): parts = Part.search(...)` -- token.cancel(), chamado de outra
+    thread, aborta a consulta em andamento e o bloco termina com QueryCancelled.
+    """
+    return connection_manager.cancellable(token)
+
+def _identity_map():
+    """Mapa de identidade da unidade de trabalho ativa na thread, ou None fora de uma transação."""
+    unit = connection_manager.current_unit_of_work()
+    return unit.identity_map if unit is not None else None
+
+def _fail_unit_of_work(error):
+    """
+    Falha de gravação de um model que participava de uma transação externa: marca a transação
+    inteira para ser desfeita (ela termina com erro em vez de comitar uma gravação parcial),
+    para que o manager que a abriu relate a falha. Fora de uma transação, não há o que marcar.
+    """
+    unit = connection_manager.current_unit_of_work()
+    if unit is not None:
+        unit.rollback_only = True
+        if unit.rollback_reason is None:
+            unit.rollback_reason = str(error)
+
+def evict(model_class, ids=None):
+    """
+    Remove instâncias de 'model_class' do mapa de identidade da transação atual.
+    Deve ser chamado após alterações feitas com SQL direto (UPDATE/DELETE fora de save/delete),
+    para que o próximo get_by_id leia o valor atualizado. Sem 'ids', remove todas as da classe.
+    """
+    identity_map = _identity_map()
+    if not identity_map:
+        return
+    if ids is None:
+        for key in [key for key in identity_map if key[0] is model_class]:
+            del identity_map[key]
+    else:
+        for id in ids:
+            identity_map.pop((model_class, id), None)
+
+def iter_query(sql, params=(), batch_size=DB_FETCH_BATCH_SIZE):
+    """
+    Executa uma consulta e entrega as linhas (sqlite3.Row) lendo 'batch_size' por vez com fetchmany,
+    em vez de materializar o resultado inteiro com fetchall. A conexão volta ao pool ao fim da iteração.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+def keyset_condition(columns, after, descending=False):
+    """
+    Condição de paginação por chave (keyset) para uma consulta ordenada por 'columns'.
+    'after' é a chave da última linha da página anterior (um valor, ou uma tupla com um valor
+    por coluna); retorna o trecho de WHERE e seus parâmetros. Ao contrário de OFFSET, o custo
+    não cresce com o número da página: o índice posiciona a leitura direto na chave.
+    """
+    values = list(after) if isinstance(after, (tuple, list)) else [after]
+    operator = "<" if descending else ">"
+    if len(columns) == 1:
+        return f"{columns[0]} {operator} ?", values
+    placeholders = ", ".join(["?" for _ in columns])
+    return f"({', '.join(columns)}) {operator} ({placeholders})", values
+
+# Modos de busca por texto: 'contains' (LIKE '%q%', percorre a tabela), 'prefix' (faixa no índice)
+# e 'auto' (prefixo primeiro; 'contains' só se o prefixo não encontrar nada)
+SEARCH_MATCH_MODES = ("contains", "prefix", "auto")
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def prefix_range(prefix, nocase=True):
+    """
+    Limites [início, fim) das strings que começam com 'prefix', para a condição
+    'coluna >= início AND coluna < fim', que o SQLite resolve como uma faixa no índice.
+    Com 'nocase', vale para colunas/índices COLLATE NOCASE, que só igualam maiúsculas e
+    minúsculas ASCII: o prefixo vai para minúsculas ASCII antes de calcular o fim.
+    O fim é o prefixo com o último caractere incrementado (None se não houver próximo).
+    """
+    start = prefix.translate(_ASCII_LOWER) if nocase else prefix
+    if not start:
+        return start, None
+    next_char = ord(start[-1]) + 1
+    if nocase and ord("A") <= next_char <= ord("Z"):
+        next_char = ord("Z") + 1  # Sob NOCASE 'A'..'Z' valem como minúsculas: o próximo após '@' é '['
+    if 0xD800 <= next_char <= 0xDFFF:
+        next_char = 0xE000  # Surrogates não podem ser gravados em UTF-8
+    if next_char > 0x10FFFF:
+        return start, None
+    return start, start[:-1] + chr(next_char)
+
+def prefix_condition(expression, prefix, nocase=True):
+    """Trecho de WHERE e parâmetros da busca por prefixo em 'expression' (ver prefix_range)."""
+    start, end = prefix_range(prefix, nocase)
+    if end is None:
+        return f"{expression} >= ?", [start]
+    return f"{expression} >= ? AND {expression} < ?", [start, end]
 
 class BaseModel:
+    # As subclasses declaram __slots__ = tuple(_fields) (mais atributos extras, se houver):
+    # sem o __dict__ por instância, cada objeto carregado ocupa menos memória.
+    __slots__ = ('id',)
     _table_name = None  # Deve ser definido nas subclasses
     _fields = []        # Deve ser definido nas subclasses, excluindo 'id'
+    _hydrate_with_init = False  # True se __init__ normaliza os valores e deve rodar também na leitura
+    # Colunas de busca normalizadas ("sombra"): {coluna: (campos de origem)}. Cada uma guarda
+    # fold_text dos campos de origem, é gravada junto com eles em save/insert_many/update_many
+    # e é a coluna comparada pelas buscas, com o termo passado pelo mesmo fold_text.
+    _normalized_columns = {}
 
     def __init__(self, id=None):
         self.id = id
 
+    def to_dict(self):
+        """Retorna o id e os campos persistidos como um dicionário (substitui o antigo uso de __dict__)."""
+        data = {'id': self.id}
+        for field in self._fields:
+            try:
+                data[field] = getattr(self, field)
+            except AttributeError:
+                pass  # Campo não carregado (instância parcial)
+        return data
+
+    @classmethod
+    def _hydrator(cls, columns):
+        """
+        Retorna a função que cria uma instância a partir de uma linha com as colunas 'columns'.
+        A função é montada uma vez por classe e conjunto de colunas e não passa por __init__:
+        os valores são gravados direto nos slots, o que torna get_all/search bem mais rápidos.
+        """
+        cache = cls.__dict__.get('_hydrator_cache')
+        if cache is None:
+            cache = {}
+            setattr(cls, '_hydrator_cache', cache)
+        hydrate = cache.get(columns)
+        if hydrate is None:
+            names = [name for name in ['id'] + list(cls._fields) if name in columns]
+            if cls._hydrate_with_init:
+                def hydrate(row):
+                    return cls(**{name: row[name] for name in names})
+            else:
+                positions = [columns.index(name) for name in names]
+                # itemgetter com um único índice retorna o valor, e não uma tupla
+                getter = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+                setters = [getattr(cls, name).__set__ for name in names]
+
+                def hydrate(row):
+                    obj = cls.__new__(cls)
+                    for set_value, value in zip(setters, getter(row)):
+                        set_value(obj, value)
+                    return obj
+            cache[columns] = hydrate
+        return hydrate
+
+    @classmethod
+    def _from_rows(cls, rows):
+        """Converte linhas (sqlite3.Row) em instâncias da classe, como gerador."""
+        hydrate = None
+        for row in rows:
+            if hydrate is None:
+                hydrate = cls._hydrator(tuple(row.keys()))
+            yield hydrate(row)
+
+    @classmethod
+    def _from_row(cls, row):
+        """Converte uma única linha em instância (ou None)."""
+        if row is None:
+            return None
+        return cls._hydrator(tuple(row.keys()))(row)
+
+    @classmethod
+    def _select_list(cls, fields=None):
+        """
+        Colunas do SELECT: todas ('*') ou, se 'fields' for informado, apenas 'id' e esses campos.
+        Os nomes são validados contra _fields, já que entram diretamente no SQL.
+        Instâncias carregadas assim são parciais: os campos não lidos ficam sem valor
+        (acessá-los levanta AttributeError) e a instância não pode ser salva.
+        """
+        if not fields:
+            return "*"
+        unknown = [field for field in fields if field != 'id' and field not in cls._fields]
+        if unknown:
+            raise ValueError(f"Campos inexistentes em {cls._table_name}: {', '.join(unknown)}")
+        return ", ".join(["id"] + [field for field in fields if field != 'id'])
+
+    @classmethod
+    def _sql(cls, kind):
+        """
+        Retorna o SQL de INSERT ou UPDATE da classe, montado uma única vez.
+        O cache fica no próprio __dict__ da classe para que subclasses não compartilhem entradas.
+        """
+        cache = cls.__dict__.get('_sql_cache')
+        if cache is None:
+            cache = {}
+            setattr(cls, '_sql_cache', cache)
+        sql = cache.get(kind)
+        if sql is None:
+            columns = list(cls._fields) + list(cls._normalized_columns)
+            if kind == 'insert':
+                field_names = ", ".join(columns)
+                placeholders = ", ".join(["?" for _ in columns])
+                sql = f"INSERT INTO {cls._table_name} ({field_names}) VALUES ({placeholders})"
+            else:
+                set_clause = ", ".join([f"{column} = ?" for column in columns])
+                sql = f"UPDATE {cls._table_name} SET {set_clause} WHERE id = ?"
+            cache[kind] = sql
+        return sql
+
+    @staticmethod
+    def _fold_values(values):
+        """Valor de uma coluna normalizada: fold_text dos valores de origem não vazios (None se nenhum)."""
+        return fold_text(" ".join(str(value) for value in values if value not in (None, ""))) or None
+
+    def _values(self):
+        """Valores dos campos na ordem de _fields, seguidos das colunas normalizadas (parâmetros do INSERT)."""
+        try:
+            values = [getattr(self, field) for field in self._fields]
+        except AttributeError as e:
+            raise ValueError(f"Instância parcial de {self._table_name} não pode ser salva: {e}") from e
+        for sources in self._normalized_columns.values():
+            values.append(self._fold_values([getattr(self, field) for field in sources]))
+        return values
+
+    @classmethod
+    def _create_normalized_columns(cls, cursor, indexed=()):
+        """
+        Adiciona as colunas de _normalized_columns que faltam na tabela, preenche todas a partir
+        dos campos de origem e cria índices nas colunas de 'indexed'. Chamado por uma migração.
+        As colunas usam COLLATE NOCASE, como os demais índices de busca, para que LIKE com prefixo
+        possa usar o índice.
+        """
+        cursor.execute(f"PRAGMA table_info({cls._table_name})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for column in cls._normalized_columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {cls._table_name} ADD COLUMN {column} TEXT COLLATE NOCASE")
+
+        sources = list(cls._normalized_columns.values())
+        source_fields = sorted({field for fields in sources for field in fields})
+        select_sql = (f"SELECT id, {', '.join(source_fields)} FROM {cls._table_name} "
+                      f"WHERE id > ? ORDER BY id LIMIT {DB_FETCH_BATCH_SIZE}")
+        set_clause = ", ".join(f"{column} = ?" for column in cls._normalized_columns)
+        update_sql = f"UPDATE {cls._table_name} SET {set_clause} WHERE id = ?"
+        last_id = 0
+        while True:
+            # Em lotes por chave: o UPDATE não roda enquanto o SELECT ainda percorre a tabela
+            rows = cursor.execute(select_sql, (last_id,)).fetchall()
+            if not rows:
+                break
+            cursor.executemany(update_sql, [
+                [cls._fold_values([row[field] for field in fields]) for fields in sources] + [row['id']]
+                for row in rows
+            ])
+            last_id = rows[-1]['id']
+
+        for column in indexed:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{cls._table_name}_{column} ON {cls._table_name} ({column})")
+
     def save(self, cursor=None):
         """
         Salva (insere ou atualiza) a instância no banco de dados.
         Se 'cursor' for fornecido, ele é usado e a conexão não é fechada/comitada.
-        Caso contrário, uma nova conexão é criada, usada, comitada e fechada.
+        Se houver uma unidade de trabalho ativa, participa dela (commit feito externamente).
+        Caso contrário, abre uma transação própria, que é comitada ao final.
         """
         if not self._table_name or not self._fields:
             raise NotImplementedError("As subclasses devem definir _table_name e _fields.")
 
-        internal_conn_management = False
-        if cursor is None:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            internal_conn_management = True
-        else:
-            conn = cursor.connection # Obtém a conexão do cursor fornecido (para transações)
-
-        field_names = ", ".join(self._fields)
-        placeholders = ", ".join(["?" for _ in self._fields])
-        field_values = [getattr(self, field) for field in self._fields]
+        field_values = self._values()
 
         try:
-            if self.id is None:
-                # Inserir novo registro
-                sql = f"INSERT INTO {self._table_name} ({field_names}) VALUES ({placeholders})"
-                cursor.execute(sql, field_values)
-                self.id = cursor.lastrowid
-            else:
-                # Atualizar registro existente
-                set_clause = ", ".join([f"{field} = ?" for field in self._fields])
-                sql = f"UPDATE {self._table_name} SET {set_clause} WHERE id = ?"
-                cursor.execute(sql, field_values + [self.id])
-
-            if internal_conn_management:
-                conn.commit()
-                return True # Retorna True para indicar sucesso
-            return True # Sucesso, mas commit será feito externamente
+            with unit_of_work(cursor) as cursor:
+                if self.id is None:
+                    # Inserir novo registro
+                    cursor.execute(self._sql('insert'), field_values)
+                    self.id = cursor.lastrowid
+                else:
+                    # Atualizar registro existente
+                    cursor.execute(self._sql('update'), field_values + [self.id])
+                self._remember([self])
+            return True # Retorna True para indicar sucesso
         except sqlite3.Error as e:
             print(f"Erro ao salvar {self._table_name}: {e}")
-            if internal_conn_management:
-                conn.rollback()
+            _fail_unit_of_work(e)
             return False # Retorna False para indicar falha
-        finally:
-            if internal_conn_management:
-                conn.close()
 
     @classmethod
-    def get_by_id(cls, id):
-        """Retorna uma instância da classe pelo ID."""
-        conn = get_db_connection()
+    def insert_many(cls, instances, cursor=None):
+        """
+        Insere várias instâncias novas (id None) com um único executemany e atribui os ids gerados.
+        Usa o 'cursor' fornecido ou a unidade de trabalho ativa, como save().
+        """
+        instances = list(instances)
+        if not instances:
+            return True
         try:
-            cursor = conn.cursor()
-            cursor.execute(f"SELECT * FROM {cls._table_name} WHERE id = ?", (id,))
-            row = cursor.fetchone()
-            if row:
-                return cls(id=row['id'], **{k: row[k] for k in cls._fields}) # Desempacota campos
-            return None
-        finally:
-            conn.close()
+            with unit_of_work(cursor) as cursor:
+                cls._insert_rows(cursor, instances)
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao inserir registros em {cls._table_name}: {e}")
+            _fail_unit_of_work(e)
+            return False
+
+    @classmethod
+    def _remember(cls, instances):
+        """Registra instâncias recém-gravadas no mapa de identidade da transação, se houver."""
+        identity_map = _identity_map()
+        if identity_map is not None:
+            for obj in instances:
+                identity_map[(type(obj), obj.id)] = obj
+
+    @classmethod
+    def update_many(cls, instances, cursor=None):
+        """
+        Atualiza várias instâncias já persistidas com um único executemany.
+        Instâncias sem id não são aceitas (use save_many para misturar inserções e atualizações).
+        """
+        instances = list(instances)
+        if not instances:
+            return True
+        if any(obj.id is None for obj in instances):
+            print(f"Erro ao atualizar registros em {cls._table_name}: instância sem id.")
+            _fail_unit_of_work(f"instância de {cls._table_name} sem id.")
+            return False
+        try:
+            with unit_of_work(cursor) as cursor:
+                cls._update_rows(cursor, instances)
+            return True
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar registros em {cls._table_name}: {e}")
+            _fail_unit_of_work(e)
+            return False
 
     @classmethod
-    def get_all(cls):
-        """Retorna uma lista de todas as instâncias da classe."""
+    def save_many(cls, instances, cursor=None):
+        """
+        Equivalente a chamar save() em cada instância, mas em uma única transação:
+        as novas (id None) são inseridas com um executemany e as demais atualizadas com outro.
+        Se qualquer linha falhar, nada é gravado.
+        """
+        instances = list(instances)
+        if not instances:
+            return True
+        new = [obj for obj in instances if obj.id is None]
+        existing = [obj for obj in instances if obj.id is not None]
+        try:
+            with unit_of_work(cursor) as cursor:
+                if existing:
+                    cls._update_rows(cursor, existing)
+                if new:
+                    cls._insert_rows(cursor, new)
+            return True
+        except sqlite3.Error as e:
+            for obj in new:
+                obj.id = None  # A transação foi desfeita; os ids atribuídos não existem mais
+            print(f"Erro ao salvar registros em {cls._table_name}: {e}")
+            _fail_unit_of_work(e)
+            return False
+
+    @classmethod
+    def _insert_rows(cls, cursor, instances):
+        """
+        executemany do INSERT. Os ids gerados são atribuídos às instâncias: dentro da
+        transação a tabela fica bloqueada para escrita, então são consecutivos até last_insert_rowid().
+        """
+        cursor.executemany(cls._sql('insert'), [obj._values() for obj in instances])
+        last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+        first_id = last_id - len(instances) + 1
+        for offset, obj in enumerate(instances):
+            obj.id = first_id + offset
+        cls._remember(instances)
+
+    @classmethod
+    def _update_rows(cls, cursor, instances):
+        """executemany do UPDATE, com o id como último parâmetro."""
+        cursor.executemany(cls._sql('update'), [obj._values() + [obj.id] for obj in instances])
+        cls._remember(instances)
+
+    @classmethod
+    def get_by_id(cls, id, fields=None):
+        """
+        Retorna uma instância da classe pelo ID (apenas com 'fields', se informado).
+        Dentro de uma unidade de trabalho, chamadas repetidas para o mesmo (classe, id) retornam
+        a mesma instância, servida do mapa de identidade, sem nova consulta ao banco.
+        """
+        identity_map = _identity_map() if not fields else None
+        if identity_map is not None:
+            obj = identity_map.get((cls, id))
+            if obj is not None:
+                return obj
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute(f"SELECT * FROM {cls._table_name}")
-            rows = cursor.fetchall()
-            return [cls(id=row['id'], **{k: row[k] for k in cls._fields}) for row in rows]
+            cursor.execute(f"SELECT {cls._select_list(fields)} FROM {cls._table_name} WHERE id = ?", (id,))
+            obj = cls._from_row(cursor.fetchone())
         finally:
             conn.close()
+        if identity_map is not None and obj is not None:
+            identity_map[(cls, obj.id)] = obj
+        return obj
 
     @classmethod
-    def delete(cls, id):
-        """Deleta um registro pelo ID."""
-        conn = get_db_connection()
+    def get_many(cls, ids):
+        """
+        Retorna {id: instância} para os ids informados com uma única consulta (WHERE id IN ...),
+        em vez de um get_by_id por id. Ids inexistentes ficam fora do dicionário.
+        Dentro de uma unidade de trabalho, usa e alimenta o mapa de identidade.
+        """
+        ids = {id for id in ids if id is not None}
+        identity_map = _identity_map()
+        found = {}
+        if identity_map is not None:
+            for id in ids:
+                obj = identity_map.get((cls, id))
+                if obj is not None:
+                    found[id] = obj
+        missing = [id for id in ids if id not in found]
+        if missing:
+            placeholders = ", ".join(["?" for _ in missing])
+            sql = f"SELECT * FROM {cls._table_name} WHERE id IN ({placeholders})"
+            for obj in cls._from_rows(iter_query(sql, missing)):
+                found[obj.id] = obj
+                if identity_map is not None:
+                    identity_map[(cls, obj.id)] = obj
+        return found
+
+    @classmethod
+    def get_all(cls, fields=None):
+        """
+        Retorna uma lista de todas as instâncias da classe.
+        Com 'fields', lê apenas essas colunas (além do id) e retorna instâncias parciais.
+        """
+        return list(cls.iter_all(fields=fields))
+
+    @classmethod
+    def iter_all(cls, batch_size=DB_FETCH_BATCH_SIZE, fields=None):
+        """
+        Gerador com todas as instâncias da classe, em ordem de id, lidas em lotes com fetchmany.
+        Útil para exportações: só 'batch_size' linhas ficam em memória por vez.
+        """
+        sql = f"SELECT {cls._select_list(fields)} FROM {cls._table_name} ORDER BY id"
+        yield from cls._from_rows(iter_query(sql, (), batch_size))
+
+    @classmethod
+    def get_page(cls, after_id=None, limit=DB_PAGE_SIZE, fields=None):
+        """
+        Retorna até 'limit' instâncias com id maior que 'after_id' (paginação por chave).
+        Para a próxima página, passe o id da última instância recebida.
+        """
+        sql = f"SELECT {cls._select_list(fields)} FROM {cls._table_name}"
+        params = []
+        if after_id is not None:
+            condition, params = keyset_condition(["id"], after_id)
+            sql += f" WHERE {condition}"
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        return list(cls._from_rows(iter_query(sql, params)))
+
+    @classmethod
+    def delete(cls, id, cursor=None):
+        """
+        Deleta um registro pelo ID.
+        Assim como em save(), usa o 'cursor' fornecido ou a unidade de trabalho ativa, se houver.
+        """
         try:
-            cursor = conn.cursor()
-            cursor.execute(f"DELETE FROM {cls._table_name} WHERE id = ?", (id,))
-            conn.commit()
-            return cursor.rowcount > 0 # Retorna True se algum registro foi deletado
+            with unit_of_work(cursor) as cursor:
+                cursor.execute(f"DELETE FROM {cls._table_name} WHERE id = ?", (id,))
+                evict(cls, [id])
+                return cursor.rowcount > 0 # Retorna True se algum registro foi deletado
         except sqlite3.Error as e:
             print(f"Erro ao deletar de {cls._table_name}: {e}")
-            conn.rollback()
+            _fail_unit_of_work(e)
             return False
-        finally:
-            conn.close()
 
     @classmethod
-    def search(cls, query, column_name=None):
+    def _search_query(cls, query, column_name, fields=None, match="contains", limit=None):
+        """
+        SQL e parâmetros da busca de search() em uma coluna ('contains' ou 'prefix').
+        Com uma coluna normalizada (<coluna>_norm), compara a forma normalizada do termo; sem ela,
+        a busca por prefixo usa '<coluna> COLLATE NOCASE', a mesma expressão dos índices criados
+        em _create_table, para que a faixa seja resolvida pelo índice.
+        """
+        if column_name != 'id' and column_name not in cls._fields:
+            raise ValueError(f"Campo inexistente em {cls._table_name}: {column_name}")
+        normalized = f"{column_name}_norm" in cls._normalized_columns
+        if match == "prefix":
+            expression = f"{column_name}_norm" if normalized else f"{column_name} COLLATE NOCASE"
+            condition, params = prefix_condition(expression, fold_text(query) if normalized else query)
+            order_by = f" ORDER BY {expression}"  # Ordem do índice: dispensa a ordenação
+        elif normalized:
+            condition, params, order_by = f"{column_name}_norm LIKE ?", [f'%{fold_text(query)}%'], ""
+        else:
+            condition, params, order_by = f"LOWER({column_name}) LIKE LOWER(?)", [f'%{query}%'], ""
+        sql_query = f"SELECT {cls._select_list(fields)} FROM {cls._table_name} WHERE {condition}{order_by}"
+        if limit is not None:
+            sql_query += " LIMIT ?"
+            params.append(limit)
+        return sql_query, params
+
+    @classmethod
+    def search(cls, query, column_name=None, fields=None, match="contains", limit=None):
         """
         Busca instâncias da classe por um termo em uma coluna específica.
-        Retorna uma lista de objetos do tipo da classe.
+        Se a coluna tiver uma coluna normalizada (<coluna>_norm), a comparação ignora acentos,
+        maiúsculas e pontuação.
+        'match' escolhe o modo (SEARCH_MATCH_MODES): 'contains' (padrão) acha o termo em qualquer
+        posição, mas percorre a tabela; 'prefix' acha só o início e usa o índice da coluna (faixa
+        'coluna >= ? AND coluna < ?'), em ordem alfabética; 'auto' tenta o prefixo e só recorre
+        ao 'contains' se nada começar com o termo -- o caso de quem digita o início de um nome ou código.
+        Retorna uma lista de objetos do tipo da classe (parciais, se 'fields' for informado).
         """
+        if not column_name:
+            # Se column_name não for fornecido, este método genérico não sabe em qual coluna buscar.
+            # As subclasses devem sobrescrever este método para implementar busca em múltiplos campos.
+            raise NotImplementedError("A busca sem 'column_name' deve ser implementada na subclasse.")
+        if match not in SEARCH_MATCH_MODES:
+            raise ValueError(f"Modo de busca inválido: {match}")
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
-            if column_name:
-                sql_query = f"SELECT * FROM {cls._table_name} WHERE LOWER({column_name}) LIKE LOWER(?)"
-                params = (f'%{query}%',)
-            else:
-                # Se column_name não for fornecido, este método genérico não sabe em qual coluna buscar.
-                # As subclasses devem sobrescrever este método para implementar busca em múltiplos campos.
-                raise NotImplementedError("A busca sem 'column_name' deve ser implementada na subclasse.")
-            
-            cursor.execute(sql_query, params)
-            rows = cursor.fetchall()
-            return [cls(id=row['id'], **{k: row[k] for k in cls._fields}) for row in rows]
+            if match != "contains":
+                cursor.execute(*cls._search_query(query, column_name, fields, "prefix", limit))
+                results = list(cls._from_rows(cursor.fetchall()))
+                if results or match == "prefix":
+                    return results
+            cursor.execute(*cls._search_query(query, column_name, fields, "contains", limit))
+            return list(cls._from_rows(cursor.fetchall()))
         finally:
             conn.close()
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """
         Cria a tabela no banco de dados.
         Esta é uma função de esqueleto e deve ser implementada nas subclasses.
-        É chamada pelos Managers para garantir que as tabelas existam.
+        É chamada pela migração inicial (models/migrations.py), dentro da transação das migrações.
         """
         raise NotImplementedError("O método _create_table deve ser implementado na subclasse.")
 
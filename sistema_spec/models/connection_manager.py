@@ -0,0 +1,300 @@
+# models/connection_manager.py
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config.settings import (
+    DB_NAME, DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_POOL_MAX_IDLE, DB_CANCEL_CHECK_OPS
+)
+from models.query_tracer import query_tracer, TracedCursor
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    Conexão SQLite reutilizável entregue pelo ConnectionManager.
+    O 'close()' não fecha a conexão física: desfaz qualquer transação pendente
+    (como o sqlite3 faria ao fechar) e devolve a conexão ao pool da thread.
+    """
+    _manager = None
+    _generation = 0
+    _in_pool = False
+    _cancellable = False  # Progress handler de um CancellationToken instalado
+
+    def close(self):
+        if self._manager is None:
+            return super().close()
+        self._manager.release(self)
+
+    def _close_physical(self):
+        super().close()
+
+
+class TracedConnection(PooledConnection):
+    """
+    Conexão do pool com o rastreamento SQL ligado: todo comando passa por TracedCursor,
+    inclusive os atalhos conn.execute/executemany/executescript. Os PRAGMAs de configuração,
+    executados antes de '_traced' ser ligado, não entram nas contagens.
+    """
+    _traced = False
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or (TracedCursor if self._traced else sqlite3.Cursor))
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+class QueryCancelled(sqlite3.OperationalError):
+    """Consultas interrompidas porque o CancellationToken do bloco cancellable() foi cancelado."""
+
+
+class CancellationToken:
+    """
+    Sinal de cancelamento de um conjunto de consultas. A thread que consulta o banco usa
+    connection_manager.cancellable(token); qualquer outra thread pode chamar cancel(), e o
+    comando em execução é interrompido na próxima verificação do progress handler do SQLite.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+
+class UnitOfWork:
+    """
+    Transação ambiente da thread atual. Enquanto estiver ativa, todo acesso ao banco feito
+    pela mesma thread (models e managers) usa esta conexão: um BEGIN, um commit.
+    Também guarda o mapa de identidade da transação: {(classe, id): instância} e as funções
+    a executar depois do commit (on_commit).
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.rollback_only = False
+        self.rollback_reason = None  # Primeiro erro que marcou a transação para ser desfeita
+        self.identity_map = {}
+        self.after_commit = []
+
+
+class _JoinedConnection:
+    """
+    Conexão devolvida por get_db_connection() quando há uma unidade de trabalho ativa.
+    Delega tudo à conexão da transação, mas 'commit()' e 'close()' ficam a cargo de quem
+    abriu a unidade de trabalho; um 'rollback()' marca a transação inteira para ser desfeita.
+    """
+    def __init__(self, unit):
+        self._unit = unit
+        self._conn = unit.connection
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        self._unit.rollback_only = True
+
+
+class ConnectionManager:
+    """
+    Pool de conexões por thread (o sqlite3 não permite compartilhar conexões entre threads).
+    Cada conexão é configurada uma única vez ao ser criada (WAL, synchronous, cache, mmap,
+    foreign_keys e busy_timeout) e reaproveitada nas chamadas seguintes a get_db_connection().
+    """
+    def __init__(self, database=DB_NAME, max_idle=DB_POOL_MAX_IDLE):
+        self.database = database
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._generation = 0
+
+    def _idle_connections(self):
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = []
+        return idle
+
+    def _connect(self):
+        traced = query_tracer.enabled
+        conn = sqlite3.connect(self.database, timeout=DB_BUSY_TIMEOUT_MS / 1000,
+                               factory=TracedConnection if traced else PooledConnection)
+        conn.row_factory = sqlite3.Row  # Permite acessar colunas por nome
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)}")  # Valor negativo = KiB
+        conn.execute(f"PRAGMA mmap_size = {int(DB_MMAP_SIZE)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(DB_BUSY_TIMEOUT_MS)}")
+        conn._manager = self
+        conn._generation = self._generation
+        if traced:
+            conn._traced = True
+            query_tracer.attach(conn)
+            query_tracer.on_connect()
+        return conn
+
+    def current_unit_of_work(self):
+        """Retorna a unidade de trabalho ativa na thread atual, ou None."""
+        return getattr(self._local, 'unit_of_work', None)
+
+    def get_connection(self):
+        """
+        Conexão usada por get_db_connection(): a da unidade de trabalho ativa, se houver,
+        ou uma conexão do pool.
+        """
+        unit = self.current_unit_of_work()
+        if unit is not None:
+            return _JoinedConnection(unit)
+        return self.acquire()
+
+    @contextmanager
+    def unit_of_work(self, cursor=None, immediate=True):
+        """
+        Abre (ou reaproveita) a transação ambiente da thread e fornece um cursor.
+        - Se 'cursor' for informado, ele é usado como está (compatibilidade com o padrão antigo).
+        - Se já houver uma unidade de trabalho ativa, a chamada aninhada apenas participa dela;
+          exceções sobem até quem abriu a transação, que faz o rollback.
+        - Caso contrário, executa BEGIN IMMEDIATE (ou BEGIN, se immediate=False),
+          comita ao final e desfaz tudo em caso de exceção. Depois do commit, executa as
+          funções registradas com on_commit durante a transação.
+        """
+        if cursor is not None:
+            yield cursor
+            return
+        unit = self.current_unit_of_work()
+        if unit is not None:
+            yield unit.connection.cursor()
+            return
+
+        conn = self.acquire()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            unit = UnitOfWork(conn)
+            self._local.unit_of_work = unit
+            try:
+                yield conn.cursor()
+                if unit.rollback_only:
+                    raise sqlite3.OperationalError(
+                        f"Transação desfeita: {unit.rollback_reason or 'uma operação interna solicitou rollback.'}")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._local.unit_of_work = None
+        finally:
+            conn.close()
+        for callback in unit.after_commit:
+            callback()
+
+    def on_commit(self, callback):
+        """
+        Executa 'callback()' depois do commit da unidade de trabalho ativa na thread, ou já, se
+        não houver uma. Se a transação for desfeita, o callback é descartado: serve para
+        atualizar caches em memória apenas com o que foi de fato gravado.
+        """
+        unit = self.current_unit_of_work()
+        if unit is None:
+            callback()
+        else:
+            unit.after_commit.append(callback)
+
+    @contextmanager
+    def cancellable(self, token):
+        """
+        Torna interrompíveis por 'token' as consultas feitas pela thread atual dentro do bloco:
+        as conexões obtidas do pool recebem um progress handler que consulta o token a cada
+        DB_CANCEL_CHECK_OPS instruções do SQLite. Depois de token.cancel(), o comando em andamento
+        falha em milissegundos, a conexão volta ao pool pelo close() de sempre e o bloco termina
+        com QueryCancelled, mesmo que o código chamado tenha tratado o erro (resultado incompleto).
+        Conexões obtidas antes do bloco, como a de uma unidade de trabalho ativa, não são afetadas.
+        """
+        previous = getattr(self._local, 'cancel_token', None)
+        self._local.cancel_token = token
+        try:
+            yield token
+        except sqlite3.OperationalError as e:
+            if token.is_cancelled() and not isinstance(e, QueryCancelled):
+                raise QueryCancelled("Consulta cancelada.") from e
+            raise
+        finally:
+            self._local.cancel_token = previous
+        if token.is_cancelled():
+            raise QueryCancelled("Consulta cancelada.")
+
+    def acquire(self):
+        """Retorna uma conexão ociosa da thread atual ou cria uma nova já configurada."""
+        token = getattr(self._local, 'cancel_token', None)
+        if token is not None and token.is_cancelled():
+            raise QueryCancelled("Consulta cancelada.")  # Nem ocupa uma conexão
+        if query_tracer.enabled:
+            query_tracer.on_acquire()
+        idle = self._idle_connections()
+        conn = None
+        while idle and conn is None:
+            conn = idle.pop()
+            conn._in_pool = False
+            if conn._generation != self._generation:
+                conn._close_physical()
+                conn = None
+        if conn is None:
+            conn = self._connect()
+        if token is not None:
+            conn.set_progress_handler(token.is_cancelled, DB_CANCEL_CHECK_OPS)
+            conn._cancellable = True
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool, descartando transações que não foram comitadas."""
+        if conn._in_pool:
+            return  # 'close()' chamado duas vezes para a mesma conexão
+        if conn._cancellable:
+            conn.set_progress_handler(None, 0)
+            conn._cancellable = False
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = sqlite3.Row
+        idle = self._idle_connections()
+        if conn._generation != self._generation or len(idle) >= self.max_idle:
+            conn._close_physical()
+            return
+        conn._in_pool = True
+        idle.append(conn)
+
+    def set_tracing(self, enabled, slow_query_ms=None):
+        """Liga/desliga o rastreamento SQL (models.query_tracer) e renova as conexões do pool."""
+        query_tracer.set_enabled(enabled, slow_query_ms)
+        self.close_all()
+
+    def set_database(self, database):
+        """Aponta o pool para outro arquivo de banco (usado por benchmarks e ferramentas)."""
+        self.database = database
+        self.close_all()
+
+    def close_all(self):
+        """
+        Invalida todas as conexões do pool. As da thread atual são fechadas na hora;
+        as das demais threads são descartadas na próxima vez que forem requisitadas.
+        """
+        self._generation += 1
+        idle = self._idle_connections()
+        while idle:
+            idle.pop()._close_physical()
+
+
+connection_manager = ConnectionManager()
+atexit.register(connection_manager.close_all)
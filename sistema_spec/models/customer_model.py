@@ -1,5 +1,6 @@
 # models/customer_model.py
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, get_db_connection, unit_of_work, prefix_condition
+from utils.helpers import fold_text
 import sqlite3
 
 class Customer(BaseModel):
@@ -8,6 +9,17 @@ class Customer(BaseModel):
         "name", "cpf_cnpj", "phone", "email", "street", "number", 
         "neighborhood", "city", "zip_code"
     ]
+    __slots__ = tuple(_fields)
+    # Colunas normalizadas usadas pela busca (ver BaseModel._normalized_columns)
+    _normalized_columns = {
+        "name_norm": ("name",),
+        "cpf_cnpj_norm": ("cpf_cnpj",),
+        "phone_norm": ("phone",),
+        "email_norm": ("email",),
+        "address_norm": ("street", "number", "neighborhood", "city", "zip_code"),
+    }
+    # Colunas indexadas usadas pela busca por prefixo (match='prefix'/'auto')
+    _prefix_columns = ("name_norm", "cpf_cnpj_norm", "phone_norm")
 
     def __init__(self, id=None, name=None, cpf_cnpj=None, phone=None, email=None,\
                  street=None, number=None, neighborhood=None, city=None, zip_code=None):
@@ -23,54 +35,76 @@ class Customer(BaseModel):
         self.zip_code = zip_code
 
     @classmethod
-    def _create_table(cls):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                cpf_cnpj TEXT,
-                phone TEXT,
-                email TEXT,
-                street TEXT,
-                number TEXT,
-                neighborhood TEXT,
-                city TEXT,
-                zip_code TEXT
-            )
-        """)
-        # Adicionando índices para colunas de busca frequente
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_name ON {cls._table_name} (name COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_cpf_cnpj ON {cls._table_name} (cpf_cnpj COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_email ON {cls._table_name} (email COLLATE NOCASE)")
-        conn.commit()
-        conn.close()
+    def _create_table(cls, cursor=None):
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    cpf_cnpj TEXT,
+                    phone TEXT,
+                    email TEXT,
+                    street TEXT,
+                    number TEXT,
+                    neighborhood TEXT,
+                    city TEXT,
+                    zip_code TEXT
+                )
+            """)
+            # Adicionando índices para colunas de busca frequente
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_name ON {cls._table_name} (name COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_cpf_cnpj ON {cls._table_name} (cpf_cnpj COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_customers_email ON {cls._table_name} (email COLLATE NOCASE)")
 
     @classmethod
-    def search(cls, query_text, column=None): 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        search_columns = ['name', 'cpf_cnpj', 'phone', 'email', 'street', 'number', 'neighborhood', 'city', 'zip_code']
-        
-        where_clauses = [f"LOWER({col}) LIKE ?" for col in search_columns]
-        sql_query = f"""
-            SELECT id, name, cpf_cnpj, phone, email, street, number, neighborhood, city, zip_code 
-            FROM {cls._table_name}
-            WHERE {' OR '.join(where_clauses)}
+    def _prefix_search_query(cls, folded, select_list):
+        """SQL da busca por prefixo: uma faixa por coluna de _prefix_columns, cada uma no seu índice."""
+        conditions, params = [], []
+        for col in cls._prefix_columns:
+            condition, condition_params = prefix_condition(col, folded)
+            conditions.append(f"({condition})")
+            params.extend(condition_params)
+        sql = f"""
+            SELECT {select_list} FROM {cls._table_name}
+            WHERE {' OR '.join(conditions)}
             ORDER BY name
         """
-        search_term = f'%{query_text.lower()}%'
-        params = [search_term] * len(search_columns)
-        
-        cursor.execute(sql_query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        return sql, params
+
+    @classmethod
+    def search(cls, query_text, column=None, fields=None, match="contains"): 
+        """
+        Busca clientes em todos os campos (nome, documento, telefone, email e endereço).
+        Com match='prefix', só o início do nome, CPF/CNPJ ou telefone, por faixas nos índices
+        dessas colunas; com 'auto', o prefixo primeiro e a busca completa só se ele não achar nada.
+        """
+        select_list = cls._select_list(fields or cls._fields)
+        folded = fold_text(query_text)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            if match != "contains":
+                cursor.execute(*cls._prefix_search_query(folded, select_list))
+                rows = cursor.fetchall()
+                if rows or match == "prefix":
+                    return list(cls._from_rows(rows))
+
+            search_columns = list(cls._normalized_columns)
+            
+            where_clauses = [f"{col} LIKE ?" for col in search_columns]
+            sql_query = f"""
+                SELECT {select_list} 
+                FROM {cls._table_name}
+                WHERE {' OR '.join(where_clauses)}
+                ORDER BY name
+            """
+            search_term = f'%{folded}%'
+            params = [search_term] * len(search_columns)
+            
+            cursor.execute(sql_query, params)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
         
-        customers = []
-        for row in rows:
-            row_dict = dict(row)
-            customer_id = row_dict.pop('id')
-            customers.append(cls(id=customer_id, **row_dict))
-        return customers
+        return list(cls._from_rows(rows))
     
@@ -1,5 +1,6 @@
 # models/financial_transaction_model.py
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, get_db_connection, unit_of_work
+from utils.helpers import fold_text
 import sqlite3
 
 class FinancialTransaction(BaseModel):
@@ -8,6 +9,9 @@ class FinancialTransaction(BaseModel):
         "transaction_date", "amount", "type", "category",
         "description", "related_entity_id", "related_entity_type"
     ]
+    __slots__ = tuple(_fields)
+    # Colunas normalizadas usadas pela busca (ver BaseModel._normalized_columns)
+    _normalized_columns = {"category_norm": ("category",), "description_norm": ("description",)}
 
     def __init__(self, id=None, transaction_date=None, amount=0.0, type=None,\
                  category=None, description=None, related_entity_id=None,\
@@ -22,28 +26,25 @@ class FinancialTransaction(BaseModel):
         self.related_entity_type = related_entity_type # 'sale', 'service_order' etc.
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """Cria a tabela de transações financeiras se ela não existir."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transaction_date TEXT NOT NULL,
-                amount REAL NOT NULL,
-                type TEXT NOT NULL, -- 'Receita' ou 'Despesa'
-                category TEXT,
-                description TEXT,
-                related_entity_id INTEGER,
-                related_entity_type TEXT
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_financial_transactions_date ON {cls._table_name} (transaction_date)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_financial_transactions_type ON {cls._table_name} (type COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_financial_transactions_category ON {cls._table_name} (category COLLATE NOCASE)")
-        conn.commit()
-        conn.close()
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    transaction_date TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    type TEXT NOT NULL, -- 'Receita' ou 'Despesa'
+                    category TEXT,
+                    description TEXT,
+                    related_entity_id INTEGER,
+                    related_entity_type TEXT
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_financial_transactions_date ON {cls._table_name} (transaction_date)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_financial_transactions_type ON {cls._table_name} (type COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_financial_transactions_category ON {cls._table_name} (category COLLATE NOCASE)")
 
     @classmethod
     def search(cls, query_text):
@@ -53,13 +54,13 @@ class FinancialTransaction(BaseModel):
         """
         conn = get_db_connection()
         cursor = conn.cursor()
-        search_term = f'%{query_text.lower()}%'
+        search_term = f'%{fold_text(query_text)}%'
         
         sql_query = f"""
             SELECT id, transaction_date, amount, type, category, description, related_entity_id, related_entity_type
             FROM {cls._table_name}
-            WHERE LOWER(category) LIKE ? OR
-                  LOWER(description) LIKE ?
+            WHERE category_norm LIKE ? OR
+                  description_norm LIKE ?
             ORDER BY transaction_date DESC, id DESC
         """
         params = [search_term, search_term]
@@ -68,5 +69,5 @@ class FinancialTransaction(BaseModel):
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(id=row['id'], **{k: row[k] for k in cls._fields}) for row in rows]
+        return list(cls._from_rows(rows))
 
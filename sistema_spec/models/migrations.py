@@ -0,0 +1,186 @@
+# models/migrations.py
+"""
+Migrações versionadas do banco de dados.
+
+Cada migração é uma função que recebe o cursor da transação e tem um número de versão.
+A tabela 'schema_version' registra as versões já aplicadas: na inicialização, ensure_schema()
+faz uma única consulta à versão atual e só abre uma transação se houver migrações pendentes.
+Todas as pendentes são aplicadas juntas, em uma transação só (o DDL do SQLite é transacional).
+
+Para alterar o esquema, adicione uma nova função ao final de MIGRATIONS; nunca edite uma
+migração já publicada.
+"""
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from models.base_model import get_db_connection, unit_of_work
+from models.connection_manager import connection_manager
+from models.user_model import User
+from models.customer_model import Customer
+from models.supplier_model import Supplier
+from models.part_model import Part
+from models import part_equivalence
+from models.sale_model import Sale, SaleItem
+from models.service_order_model import ServiceOrder, ServiceOrderItem
+from models.financial_transaction_model import FinancialTransaction
+from models.notification_model import Notification
+from models.report_model import Report
+from models.settings_model import Setting
+
+logger = logging.getLogger('sistema_spec_logger')  # Mesmo logger configurado em utils/logger_config.py
+
+_lock = threading.Lock()
+_checked_databases = set()  # Bancos já verificados neste processo
+
+
+def _table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [row[1] for row in cursor.fetchall()]
+
+
+def _add_column_if_missing(cursor, table, column, definition):
+    """ALTER TABLE ADD COLUMN apenas se a tabela já existe e ainda não tem a coluna."""
+    columns = _table_columns(cursor, table)
+    if columns and column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _migration_001_base_schema(cursor):
+    """
+    Esquema base: todas as tabelas e índices dos models. Bancos criados antes do controle
+    de versão recebem primeiro as colunas que eram adicionadas pelas verificações antigas
+    da inicialização (os índices novos dependem delas).
+    """
+    _add_column_if_missing(cursor, "notifications", "entity_id", "INTEGER")
+    _add_column_if_missing(cursor, "notifications", "entity_type", "TEXT")
+    _add_column_if_missing(cursor, "service_orders", "start_date", "TEXT")
+    _add_column_if_missing(cursor, "service_orders", "end_date", "TEXT")
+    _add_column_if_missing(cursor, "service_orders", "payment_status", "TEXT DEFAULT 'Pendente'")
+    _add_column_if_missing(cursor, "sales", "is_quote", "BOOLEAN DEFAULT 0")
+
+    for model in (User, Customer, Supplier, Part, Sale, SaleItem, ServiceOrder, ServiceOrderItem,
+                  FinancialTransaction, Notification, Report, Setting):
+        model._create_table(cursor)
+
+
+def _migration_002_parts_search_index(cursor):
+    """Índice FTS5 (trigram) para a busca ampla de peças, mantido por triggers."""
+    # Colunas originais do índice; a migração 5 o recria sobre as colunas normalizadas
+    Part._create_search_index(cursor, ("name", "part_number", "manufacturer", "description",
+                                       "original_code", "similar_code_01", "similar_code_02", "barcode"))
+
+
+def _migration_003_part_codes(cursor):
+    """Tabela part_codes (códigos normalizados das peças), preenchida a partir das colunas atuais."""
+    Part._create_code_table(cursor)
+
+
+def _migration_004_part_equivalence(cursor):
+    """Classes de equivalência (substitutos transitivos) calculadas a partir de part_codes."""
+    part_equivalence.create_table(cursor)
+    part_equivalence.rebuild(cursor)
+
+
+def _migration_005_normalized_search_columns(cursor):
+    """
+    Colunas normalizadas (sem acentos, maiúsculas e pontuação) usadas pelas buscas, preenchidas
+    a partir dos dados atuais, com índices nas mais buscadas. O índice FTS das peças passa a
+    cobrir as colunas normalizadas.
+    """
+    Part._create_normalized_columns(cursor, indexed=("name_norm", "manufacturer_norm"))
+    Customer._create_normalized_columns(cursor, indexed=("name_norm", "cpf_cnpj_norm", "phone_norm"))
+    Supplier._create_normalized_columns(cursor, indexed=("name_norm", "cnpj_norm"))
+    FinancialTransaction._create_normalized_columns(cursor, indexed=("category_norm", "description_norm"))
+    Sale._create_normalized_columns(cursor)  # status e forma de pagamento: poucos valores, índice não ajuda
+    Part._drop_search_index(cursor)
+    Part._create_search_index(cursor)
+
+
+# (versão, descrição, função) -- em ordem crescente de versão
+MIGRATIONS = [
+    (1, "Esquema base (tabelas, índices e colunas anteriores ao controle de versão)", _migration_001_base_schema),
+    (2, "Índice de texto completo (FTS5 trigram) para a busca de peças", _migration_002_parts_search_index),
+    (3, "Tabela normalizada de códigos de peças (part_codes)", _migration_003_part_codes),
+    (4, "Classes de equivalência de peças para busca de substitutos", _migration_004_part_equivalence),
+    (5, "Colunas de busca normalizadas (acentos, maiúsculas e pontuação)", _migration_005_normalized_search_columns),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _current_version(cursor):
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except sqlite3.OperationalError:
+        return 0  # Tabela ainda não existe: banco novo ou anterior às migrações versionadas
+    return cursor.fetchone()[0] or 0
+
+
+def get_schema_version():
+    """Retorna a versão do esquema do banco atual (0 se nenhuma migração foi registrada)."""
+    conn = get_db_connection()
+    try:
+        return _current_version(conn.cursor())
+    finally:
+        conn.close()
+
+
+def apply_migrations():
+    """
+    Aplica as migrações pendentes em uma única transação e retorna a lista de versões aplicadas.
+    A versão é relida depois do BEGIN IMMEDIATE, então dois terminais abrindo o sistema ao mesmo
+    tempo não aplicam a mesma migração duas vezes.
+    """
+    applied = []
+    with unit_of_work() as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        """)
+        current = _current_version(cursor)
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info(f"  - Aplicando migração {version}: {description}")
+            migrate(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            applied.append(version)
+    return applied
+
+
+def ensure_schema():
+    """
+    Garante que o banco atual está na versão mais recente do esquema.
+    A verificação é feita uma vez por banco em cada processo; as chamadas seguintes
+    (por exemplo, no __init__ de cada manager) retornam imediatamente.
+    """
+    database = connection_manager.database
+    if database in _checked_databases:
+        return []
+    with _lock:
+        if database in _checked_databases:
+            return []
+        applied = []
+        if get_schema_version() < LATEST_VERSION:
+            applied = apply_migrations()
+            logger.info(f"Migrações aplicadas: {applied}. Versão do esquema: {LATEST_VERSION}.")
+        _checked_databases.add(database)
+        return applied
+
+
+def recheck_schema():
+    """
+    Verifica de novo o banco atual, mesmo que já tenha sido verificado neste processo:
+    usado quando o conteúdo do arquivo é substituído (ex.: restauração de um backup antigo).
+    """
+    with _lock:
+        _checked_databases.discard(connection_manager.database)
+    return ensure_schema()
@@ -1,10 +1,11 @@
 # models/notification_model.py
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, get_db_connection, unit_of_work
 import sqlite3
 
 class Notification(BaseModel):
     _table_name = "notifications"
     _fields = ["timestamp", "type", "message", "is_read", "entity_id", "entity_type"]
+    __slots__ = tuple(_fields)
 
     def __init__(self, id=None, timestamp=None, type=None, message=None,
                  is_read=0, entity_id=None, entity_type=None):
@@ -17,27 +18,24 @@ class Notification(BaseModel):
         self.entity_type = entity_type # Tipo da entidade ('part', 'sale', 'service_order', etc.)
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """Cria a tabela de notificações se ela não existir."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                type TEXT NOT NULL,
-                message TEXT NOT NULL,
-                is_read INTEGER DEFAULT 0,
-                entity_id INTEGER,
-                entity_type TEXT
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_notifications_timestamp ON {cls._table_name} (timestamp DESC)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_notifications_is_read ON {cls._table_name} (is_read)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_notifications_entity ON {cls._table_name} (entity_type, entity_id)")
-        conn.commit()
-        conn.close()
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    message TEXT NOT NULL,
+                    is_read INTEGER DEFAULT 0,
+                    entity_id INTEGER,
+                    entity_type TEXT
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_notifications_timestamp ON {cls._table_name} (timestamp DESC)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_notifications_is_read ON {cls._table_name} (is_read)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_notifications_entity ON {cls._table_name} (entity_type, entity_id)")
 
     @classmethod
     def get_unread_notifications(cls):
@@ -48,12 +46,7 @@ class Notification(BaseModel):
         rows = cursor.fetchall()
         conn.close()
         
-        result_notifications = []
-        for row in rows:
-            row_dict = dict(row)
-            notification_id = row_dict.pop('id')
-            result_notifications.append(cls(id=notification_id, **row_dict))
-        return result_notifications
+        return list(cls._from_rows(rows))
 
     def mark_as_read(self):
         """Marca a notificação como lida."""
@@ -0,0 +1,175 @@
+# models/part_equivalence.py
+"""
+Classes de equivalência de peças (substitutos).
+
+Duas peças são equivalentes quando compartilham algum código normalizado em part_codes
+(ex.: o código similar de uma é o código original da outra); a relação é transitiva, então
+A~B e B~C colocam A, B e C na mesma classe. As classes são calculadas com union-find e
+gravadas em part_equivalence(part_id, class_id), onde class_id é o menor id da classe.
+Peças sem equivalentes não têm linha (classe unitária), o que mantém a tabela pequena.
+
+Manutenção incremental: depois de mudar códigos de peças, chame refresh(part_ids), que
+recalcula apenas as classes afetadas. rebuild() recalcula tudo (migração, cargas em massa).
+"""
+from itertools import groupby
+
+from models.base_model import get_db_connection, unit_of_work
+from models.part_model import Part, normalize_code
+
+TABLE_NAME = "part_equivalence"
+
+
+class _UnionFind:
+    """Union-find com compressão de caminho; o representante de cada conjunto é o menor id."""
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        # Iterativo: uma cadeia de peças ligadas uma à outra pode ser mais longa que o limite de recursão
+        root = self.parent.setdefault(item, item)
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while item != root:  # Compressão de caminho: todos os itens do caminho apontam para a raiz
+            parent = self.parent[item]
+            self.parent[item] = root
+            item = parent
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+    def classes(self):
+        """{part_id: class_id} apenas para as classes com mais de uma peça."""
+        roots = {item: self.find(item) for item in self.parent}
+        sizes = {}
+        for root in roots.values():
+            sizes[root] = sizes.get(root, 0) + 1
+        return {item: root for item, root in roots.items() if sizes[root] > 1}
+
+
+def _union_codes(union_find, rows):
+    """Une as peças de cada grupo de linhas (code_normalized, part_id) ordenadas por código."""
+    for _, group in groupby(rows, key=lambda row: row[0]):
+        part_ids = [row[1] for row in group]
+        union_find.find(part_ids[0])
+        for part_id in part_ids[1:]:
+            union_find.union(part_ids[0], part_id)
+
+
+def create_table(cursor):
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+            part_id INTEGER PRIMARY KEY REFERENCES {Part._table_name}(id) ON DELETE CASCADE,
+            class_id INTEGER NOT NULL
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_class_id ON {TABLE_NAME} (class_id)")
+
+
+def rebuild(cursor=None):
+    """Recalcula todas as classes a partir de part_codes. Retorna o número de peças com equivalentes."""
+    with unit_of_work(cursor) as cursor:
+        union_find = _UnionFind()
+        cursor.execute("SELECT code_normalized, part_id FROM part_codes ORDER BY code_normalized")
+        _union_codes(union_find, cursor.fetchall())
+        classes = union_find.classes()
+        cursor.execute(f"DELETE FROM {TABLE_NAME}")
+        cursor.executemany(f"INSERT INTO {TABLE_NAME} (part_id, class_id) VALUES (?, ?)", classes.items())
+        return len(classes)
+
+
+def _placeholders(values):
+    return ", ".join("?" for _ in values)
+
+
+def refresh(part_ids, cursor=None):
+    """
+    Recalcula as classes que envolvem 'part_ids' (peças cujos códigos mudaram ou que foram
+    removidas): junta as classes atuais dessas peças e de toda peça que compartilhe um código
+    com elas, até fechar o conjunto, e refaz o union-find só sobre ele. Cobre tanto a união
+    de classes (código novo) quanto a divisão (código removido).
+    """
+    part_ids = {part_id for part_id in part_ids if part_id is not None}
+    if not part_ids:
+        return
+    with unit_of_work(cursor) as cursor:
+        affected = set()
+        pending = set(part_ids)
+        while pending:
+            affected |= pending
+            batch = list(pending)
+            cursor.execute(f"""
+                SELECT part_id FROM {TABLE_NAME} WHERE class_id IN (
+                    SELECT class_id FROM {TABLE_NAME} WHERE part_id IN ({_placeholders(batch)})
+                )
+                UNION
+                SELECT other.part_id FROM part_codes mine
+                JOIN part_codes other ON other.code_normalized = mine.code_normalized
+                WHERE mine.part_id IN ({_placeholders(batch)})
+            """, batch + batch)
+            pending = {row[0] for row in cursor.fetchall()} - affected
+
+        members = list(affected)
+        union_find = _UnionFind()
+        for part_id in members:
+            union_find.find(part_id)
+        cursor.execute(f"""
+            SELECT code_normalized, part_id FROM part_codes
+            WHERE part_id IN ({_placeholders(members)}) ORDER BY code_normalized
+        """, members)
+        _union_codes(union_find, cursor.fetchall())
+
+        cursor.execute(f"DELETE FROM {TABLE_NAME} WHERE part_id IN ({_placeholders(members)})", members)
+        cursor.executemany(f"INSERT INTO {TABLE_NAME} (part_id, class_id) VALUES (?, ?)",
+                           union_find.classes().items())
+
+
+def class_members(part_id):
+    """Ids das peças da mesma classe de 'part_id' (incluindo ela mesma)."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"""
+            SELECT part_id FROM {TABLE_NAME}
+            WHERE class_id = (SELECT class_id FROM {TABLE_NAME} WHERE part_id = ?)
+        """, (part_id,)).fetchall()
+        return [row[0] for row in rows] or [part_id]
+    finally:
+        conn.close()
+
+
+def find_substitutes(code, in_stock_only=True, fields=None):
+    """
+    Todas as peças intercambiáveis com 'code' (qualquer código, normalizado): as que têm o código
+    e as demais peças das suas classes, em uma única consulta, com maior estoque primeiro.
+    """
+    normalized = normalize_code(code)
+    if not normalized:
+        return []
+    table = Part._table_name
+    select_list = ", ".join(f"{table}.{column}" for column in Part._select_list(fields).split(", "))
+    sql = f"""
+        WITH matched AS (
+            SELECT part_codes.part_id, {TABLE_NAME}.class_id
+            FROM part_codes LEFT JOIN {TABLE_NAME} ON {TABLE_NAME}.part_id = part_codes.part_id
+            WHERE part_codes.code_normalized = ?
+        ),
+        candidates AS (
+            SELECT part_id FROM matched
+            UNION
+            SELECT {TABLE_NAME}.part_id FROM {TABLE_NAME}
+            WHERE {TABLE_NAME}.class_id IN (SELECT class_id FROM matched WHERE class_id IS NOT NULL)
+        )
+        SELECT {select_list} FROM candidates JOIN {table} ON {table}.id = candidates.part_id
+    """
+    if in_stock_only:
+        sql += f" WHERE {table}.stock > 0"
+    sql += f" ORDER BY {table}.stock DESC, {table}.id"
+    conn = get_db_connection()
+    try:
+        return list(Part._from_rows(conn.execute(sql, (normalized,)).fetchall()))
+    finally:
+        conn.close()
@@ -1,6 +1,78 @@
 # models/part_model.py
+import json
+import logging
 import sqlite3
-from models.base_model import BaseModel, get_db_connection
+from collections import Counter
+from models.base_model import BaseModel, get_db_connection, unit_of_work, prefix_condition, SEARCH_MATCH_MODES
+from models.connection_manager import connection_manager
+from utils.helpers import fold_text, trigrams, word_similarity, edit_neighborhood
+
+logger = logging.getLogger('sistema_spec_logger')
+
+# Code normalization shared by Python and the part_codes triggers: separators are dropped and
+# ASCII letters upper-cased (SQLite's upper() only folds ASCII), so "ab-123.4" == "AB1234".
+CODE_SEPARATORS = " -./_"
+_CODE_TRANSLATION = str.maketrans(
+    "abcdefghijklmnopqrstuvwxyz", "ABCDEFGHIJKLMNOPQRSTUVWXYZ", CODE_SEPARATORS
+)
+# Same mapping for bytes: codes are almost always ASCII, and bytes.translate is several times
+# faster than str.translate (which looks every character up in a dict)
+_ASCII_CODE_TRANSLATION = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_ASCII_CODE_SEPARATORS = CODE_SEPARATORS.encode()
+
+
+def normalize_code(code):
+    """Normalized form of a part code, as stored in part_codes.code_normalized."""
+    if not code:
+        return ""
+    if code.isascii():
+        return code.encode().translate(_ASCII_CODE_TRANSLATION, _ASCII_CODE_SEPARATORS).decode()
+    return code.translate(_CODE_TRANSLATION)
+
+
+# Characters tried by the typo-tolerant code search (normalized codes are upper case)
+CODE_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _normalize_code_sql(expression):
+    """SQL expression equivalent to normalize_code() (used inside the triggers)."""
+    for separator in CODE_SEPARATORS:
+        expression = f"replace({expression}, '{separator}', '')"
+    return f"upper({expression})"
+
+
+class _NameVocabulary:
+    """
+    Distinct words of the folded part names, indexed by padded trigram, used by fuzzy_search to
+    correct the words of a mistyped query without touching the parts table. Words of parts
+    saved through StockManager are added as they appear (Part.remember_name); words of renamed
+    or deleted parts stay until the process restarts, which only costs a candidate with no match.
+    """
+    def __init__(self):
+        self.words = set()
+        self.by_gram = {}
+
+    def add(self, text):
+        for word in (text or "").split():
+            if len(word) >= 3 and word not in self.words:
+                self.words.add(word)
+                for gram in trigrams(word):
+                    self.by_gram.setdefault(gram, []).append(word)
+
+    def corrections(self, word, min_score, limit=3, candidates=50):
+        """
+        The word itself if it is known; otherwise up to 'limit' vocabulary words with
+        word_similarity >= min_score, taken from the 'candidates' sharing the most trigrams.
+        """
+        if word in self.words:
+            return [word]
+        overlap = Counter()
+        for gram in trigrams(word):
+            overlap.update(self.by_gram.get(gram, ()))
+        scored = sorted(((word_similarity(word, candidate), candidate)
+                         for candidate, _ in overlap.most_common(candidates)), reverse=True)
+        return [candidate for score, candidate in scored[:limit] if score >= min_score]
+
 
 class Part(BaseModel):
     _table_name = "parts"
@@ -9,6 +81,35 @@ class Part(BaseModel):
         "stock", "min_stock", "location", "supplier_id", "category",
         "original_code", "similar_code_01", "similar_code_02", "barcode"
     ]
+    __slots__ = tuple(_fields)
+
+    # Accent/case/punctuation-folded copies used by every search (see BaseModel._normalized_columns);
+    # codes_norm holds all the codes of the part, so "psl-619" or "psl 619" finds "PSL619".
+    _normalized_columns = {
+        "name_norm": ("name",),
+        "manufacturer_norm": ("manufacturer",),
+        "description_norm": ("description",),
+        "codes_norm": ("part_number", "original_code", "similar_code_01", "similar_code_02", "barcode"),
+    }
+
+    # Full-text index (FTS5, trigram tokenizer) over the folded columns, used by the broad search,
+    # and the bm25 weight of each column: a hit in the name or in a code ranks above one in the description.
+    _search_table = "parts_fts"
+    _search_columns = ("name_norm", "codes_norm", "manufacturer_norm", "description_norm")
+    _search_weights = (10.0, 8.0, 3.0, 1.0)
+    _search_index_ready = {}  # {database: bool}, filled on first search
+
+    # Typo-tolerant search (fuzzy_search): candidates read per source, minimum similarity (0..1)
+    # to be suggested, longest code expanded into its edit neighborhood, and the name vocabulary
+    # of each database ({database: _NameVocabulary}).
+    _fuzzy_candidate_limit = 200
+    _fuzzy_min_score = 0.5
+    _fuzzy_max_code_length = 24
+    _name_vocabularies = {}
+
+    # Columns mirrored into part_codes (kind = column name), in lookup priority order.
+    # Extra codes added with StockManager.add_part_code use other kinds ('similar', 'supplier', 'oem').
+    _code_columns = ("barcode", "part_number", "original_code", "similar_code_01", "similar_code_02")
 
     def __init__(self, id=None, name=None, description=None, part_number=None,
                  manufacturer=None, price=0.0, cost=0.0, stock=0,
@@ -34,67 +135,408 @@ class Part(BaseModel):
         self.barcode = barcode
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """Creates the parts table with an auto-incrementing integer ID."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    description TEXT,
+                    part_number TEXT NOT NULL UNIQUE,
+                    manufacturer TEXT,
+                    price REAL NOT NULL,
+                    cost REAL NOT NULL,
+                    stock INTEGER NOT NULL,
+                    min_stock INTEGER NOT NULL,
+                    location TEXT,
+                    supplier_id INTEGER,
+                    category TEXT,
+                    original_code TEXT UNIQUE,
+                    similar_code_01 TEXT UNIQUE,
+                    similar_code_02 TEXT UNIQUE,
+                    barcode TEXT UNIQUE,
+                    FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_name ON {cls._table_name} (name COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_part_number ON {cls._table_name} (part_number COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_manufacturer ON {cls._table_name} (manufacturer COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_original_code ON {cls._table_name} (original_code COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_barcode ON {cls._table_name} (barcode COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_supplier_id ON {cls._table_name} (supplier_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_category ON {cls._table_name} (category COLLATE NOCASE)")
+
+    @classmethod
+    def _create_search_index(cls, cursor, search_columns=None):
+        """
+        Creates the FTS5 trigram index over the searchable columns (external content: the text
+        stays only in 'parts'), the triggers that keep it in sync, and fills it with the existing
+        rows. Called by a migration; if this SQLite build lacks FTS5/trigram, the index is skipped
+        and search() keeps using LIKE. 'search_columns' lets older migrations pin the columns
+        they indexed.
+        """
+        search_columns = search_columns or cls._search_columns
+        columns = ", ".join(search_columns)
+        new_values = ", ".join(f"new.{column}" for column in search_columns)
+        old_values = ", ".join(f"old.{column}" for column in search_columns)
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {cls._search_table} USING fts5(
+                    {columns}, content='{cls._table_name}', content_rowid='id', tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Full-text index for parts not created ({e}); part search will use LIKE.")
+            return False
         cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                part_number TEXT NOT NULL UNIQUE,
-                manufacturer TEXT,
-                price REAL NOT NULL,
-                cost REAL NOT NULL,
-                stock INTEGER NOT NULL,
-                min_stock INTEGER NOT NULL,
-                location TEXT,
-                supplier_id INTEGER,
-                category TEXT,
-                original_code TEXT UNIQUE,
-                similar_code_01 TEXT UNIQUE,
-                similar_code_02 TEXT UNIQUE,
-                barcode TEXT UNIQUE,
-                FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
-            )
+            CREATE TRIGGER IF NOT EXISTS {cls._search_table}_ai AFTER INSERT ON {cls._table_name} BEGIN
+                INSERT INTO {cls._search_table} (rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {cls._search_table}_ad AFTER DELETE ON {cls._table_name} BEGIN
+                INSERT INTO {cls._search_table} ({cls._search_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END
+        """)
+        # Only changes to indexed columns touch the index (stock movements do not)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {cls._search_table}_au AFTER UPDATE OF {columns} ON {cls._table_name} BEGIN
+                INSERT INTO {cls._search_table} ({cls._search_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO {cls._search_table} (rowid, {columns}) VALUES (new.id, {new_values});
+            END
         """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_name ON {cls._table_name} (name COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_part_number ON {cls._table_name} (part_number COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_manufacturer ON {cls._table_name} (manufacturer COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_original_code ON {cls._table_name} (original_code COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_barcode ON {cls._table_name} (barcode COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_supplier_id ON {cls._table_name} (supplier_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_parts_category ON {cls._table_name} (category COLLATE NOCASE)")
-        conn.commit()
-        conn.close()
+        cursor.execute(f"INSERT INTO {cls._search_table} ({cls._search_table}) VALUES ('rebuild')")
+        cls._search_index_ready.pop(connection_manager.database, None)
+        return True
+
+    @classmethod
+    def _drop_search_index(cls, cursor):
+        """Drops the FTS index and its triggers, so a migration can recreate it over other columns."""
+        for suffix in ("ai", "ad", "au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {cls._search_table}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {cls._search_table}")
+        cls._search_index_ready.pop(connection_manager.database, None)
+
+    @classmethod
+    def _code_rows_sql(cls, source, from_clause=""):
+        """
+        SELECT producing (code_normalized, part_id, kind, code) for each non-empty code column
+        of 'source' (the trigger's 'new' row, or the parts table itself with 'from_clause').
+        """
+        selects = []
+        for column in cls._code_columns:
+            value = f"{source}.{column}"
+            normalized = _normalize_code_sql(value)
+            selects.append(f"SELECT {normalized}, {source}.id, '{column}', {value} {from_clause} "
+                           f"WHERE {value} IS NOT NULL AND {normalized} <> ''")
+        return " UNION ALL ".join(selects)
 
     @classmethod
-    def search(cls, query, column_name=None):
+    def _create_code_table(cls, cursor):
+        """
+        Creates part_codes: one row per code of a part (barcode, part number, original and
+        similar codes, plus any extra supplier/OEM codes), keyed by the normalized code so
+        "any code" resolves with a single index search. Triggers mirror the code columns of
+        'parts'; extra codes are removed with the part (ON DELETE CASCADE).
+        """
+        code_columns = ", ".join(cls._code_columns)
+        column_kinds = ", ".join(f"'{column}'" for column in cls._code_columns)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS part_codes (
+                code_normalized TEXT NOT NULL,
+                part_id INTEGER NOT NULL REFERENCES {cls._table_name}(id) ON DELETE CASCADE,
+                kind TEXT NOT NULL,
+                code TEXT NOT NULL,
+                PRIMARY KEY (code_normalized, part_id, kind)
+            ) WITHOUT ROWID
+        """)
+        # Only for the triggers and the cascade, which remove a part's codes by part_id
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_part_codes_part_id ON part_codes (part_id)")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS part_codes_ai AFTER INSERT ON {cls._table_name} BEGIN
+                INSERT OR IGNORE INTO part_codes (code_normalized, part_id, kind, code) {cls._code_rows_sql('new')};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS part_codes_au AFTER UPDATE OF {code_columns} ON {cls._table_name} BEGIN
+                DELETE FROM part_codes WHERE part_id = old.id AND kind IN ({column_kinds});
+                INSERT OR IGNORE INTO part_codes (code_normalized, part_id, kind, code) {cls._code_rows_sql('new')};
+            END
+        """)
+        cursor.execute(f"INSERT OR IGNORE INTO part_codes (code_normalized, part_id, kind, code) "
+                       f"{cls._code_rows_sql(cls._table_name, f'FROM {cls._table_name}')}")
+
+    @classmethod
+    def _has_search_index(cls, cursor):
+        """Whether the current database has the FTS index (checked once per database)."""
+        database = connection_manager.database
+        ready = cls._search_index_ready.get(database)
+        if ready is None:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (cls._search_table,))
+            ready = cls._search_index_ready[database] = cursor.fetchone() is not None
+        return ready
+
+    @classmethod
+    def search(cls, query, column_name=None, fields=None, match="contains", limit=None):
         """
         Searches for parts. If 'column_name' is provided, performs a case-insensitive search
-        on that specific column. Otherwise, performs a broad search across multiple relevant columns.
+        on that specific column (accent-insensitive too for name, manufacturer and description).
+        Otherwise, performs a broad search across the name, codes, manufacturer and description,
+        ignoring accents, case and punctuation: through the FTS5 trigram index (substring match,
+        ranked by relevance) when the folded query has at least 3 characters, or with LIKE over
+        the folded columns for shorter queries.
+        With match='prefix' only the start of the column (or, in the broad search, of the name or
+        of any code) is matched, through index range scans; 'auto' tries the prefix first and falls
+        back to the search above only when nothing starts with the query (see BaseModel.search).
+        If 'fields' is provided, only those columns (plus id) are read and partial parts are returned.
         """
+        if match not in SEARCH_MATCH_MODES:
+            raise ValueError(f"Invalid search mode: {match}")
+        select_list = cls._select_list(fields)
+        folded = fold_text(query)
+        # Closed in 'finally', as in BaseModel.search: a cancelled query (QueryCancelled) must not leak the connection
         conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if column_name:
-            sql = f"SELECT * FROM {cls._table_name} WHERE LOWER({column_name}) LIKE LOWER(?)"
-            params = (query,)
-        else:
-            search_query = f"%{query.lower()}%"
-            sql = f"""
-                SELECT * FROM {cls._table_name}
-                WHERE LOWER(name) LIKE ? OR LOWER(part_number) LIKE ? OR LOWER(manufacturer) LIKE ? OR LOWER(description) LIKE ?
-                   OR LOWER(original_code) LIKE ? OR LOWER(similar_code_01) LIKE ? OR LOWER(similar_code_02) LIKE ? OR LOWER(barcode) LIKE ?
-                   OR CAST(id AS TEXT) LIKE ? -- Adicionado busca por ID
-            """
-            params = (search_query,) * 8 + (f'%{query}%',) # Aplica o termo de busca a todas as 8 colunas + ID
-        
+        try:
+            cursor = conn.cursor()
+
+            if match != "contains":
+                if column_name:
+                    cursor.execute(*cls._search_query(query, column_name, fields, "prefix", limit))
+                else:
+                    cursor.execute(*cls._prefix_search_query(query, select_list, limit))
+                parts = list(cls._from_rows(cursor.fetchall()))
+                if parts or match == "prefix":
+                    return parts
+
+            if column_name is None and len(folded) >= 3 and cls._has_search_index(cursor):
+                return cls._search_index(cursor, folded, select_list, limit)
+
+            if column_name and f"{column_name}_norm" in cls._normalized_columns:
+                sql = f"SELECT {select_list} FROM {cls._table_name} WHERE {column_name}_norm LIKE ?"
+                params = (folded,)
+            elif column_name:
+                sql = f"SELECT {select_list} FROM {cls._table_name} WHERE LOWER({column_name}) LIKE LOWER(?)"
+                params = (query,)
+            else:
+                search_query = f"%{folded}%"
+                sql = f"""
+                    SELECT {select_list} FROM {cls._table_name}
+                    WHERE name_norm LIKE ? OR codes_norm LIKE ? OR manufacturer_norm LIKE ? OR description_norm LIKE ?
+                       OR CAST(id AS TEXT) LIKE ? -- Adicionado busca por ID
+                """
+                # Codes are stored without spaces, so they are compared with the spaces removed as well
+                params = (search_query, f"%{folded.replace(' ', '')}%", search_query, search_query, f'%{query}%')
+            if limit is not None:
+                sql += " LIMIT ?"
+                params = tuple(params) + (limit,)
+
+            cursor.execute(sql, params)
+            return list(cls._from_rows(cursor.fetchall()))
+        finally:
+            conn.close()
+
+    @classmethod
+    def _prefix_search_query(cls, query, select_list, limit=None):
+        """
+        SQL of the broad prefix search: parts whose name starts with the query (range on the
+        name_norm index) or that have a code starting with it (range on the part_codes primary
+        key), in name order.
+        """
+        name_condition, params = prefix_condition("name_norm", fold_text(query))
+        code_condition, code_params = prefix_condition("code_normalized", normalize_code(query), nocase=False)
+        sql = f"""
+            SELECT {select_list} FROM {cls._table_name} WHERE id IN (
+                SELECT id FROM {cls._table_name} WHERE {name_condition}
+                UNION
+                SELECT part_id FROM part_codes WHERE {code_condition}
+            )
+            ORDER BY name_norm
+        """
+        params += code_params
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    @classmethod
+    def fuzzy_search(cls, query, limit=10, fields=None):
+        """
+        Typo-tolerant search over names and codes ("flitro", "ps995" for PS959, "wo13o"), for
+        "did you mean" suggestions when search() finds nothing. Returns up to 'limit' (part, score)
+        tuples, best first, with score between _fuzzy_min_score and 1.
+
+        Candidate generation is bounded and index-driven, never a scan of the catalog:
+        - codes: every code one edit away from the query (see edit_neighborhood) is looked up
+          on the part_codes primary key, in a single query;
+        - names: each query word is corrected against the vocabulary of name words (_NameVocabulary),
+          and the FTS index returns up to _fuzzy_candidate_limit parts containing the corrections.
+        Each candidate is then scored word by word: the best word_similarity of each query word
+        to a name word or code, averaged.
+        """
+        words = fold_text(query).split()
+        compact = "".join(words)
+        if len(compact) < 3:
+            return []
+        select_list = ", ".join(f"{cls._table_name}.{column}" for column in cls._select_list(fields).split(", "))
+        columns = (f"{select_list}, {cls._table_name}.name_norm AS fuzzy_name, "
+                   f"{cls._table_name}.codes_norm AS fuzzy_codes")
+        conn = get_db_connection()
+        try:
+            rows = cls._fuzzy_code_candidates(conn, compact, columns)
+            if cls._has_search_index(conn.cursor()):
+                rows += cls._fuzzy_name_candidates(conn, words, columns)
+        finally:
+            conn.close()
+
+        similarities = {}
+
+        def similarity(word, token):
+            score = similarities.get((word, token))
+            if score is None:
+                score = similarities[(word, token)] = word_similarity(word, token)
+            return score
+
+        scored, seen = [], set()
+        for position, row in enumerate(rows):
+            if row['id'] in seen:
+                continue
+            seen.add(row['id'])
+            code_tokens = (row['fuzzy_codes'] or "").split()
+            tokens = (row['fuzzy_name'] or "").split() + code_tokens
+            score = sum(max((similarity(word, token) for token in tokens), default=0) for word in words) / len(words)
+            if len(words) > 1 and code_tokens:  # "wo 130" typed with a space for the code WO130
+                score = max(score, max(similarity(compact, token) for token in code_tokens))
+            if score >= cls._fuzzy_min_score:
+                scored.append((-score, position, row))
+        scored.sort(key=lambda item: item[:2])
+        return [(cls._from_row(row), round(-score, 3)) for score, _, row in scored[:limit]]
+
+    @classmethod
+    def _fuzzy_code_candidates(cls, conn, compact, columns):
+        """Parts with a code at most one edit away from 'compact' (primary key lookups on part_codes)."""
+        code = normalize_code(compact).upper()
+        if len(code) > cls._fuzzy_max_code_length:
+            return []
+        variants = json.dumps(sorted(edit_neighborhood(code, CODE_ALPHABET)))
+        return conn.execute(f"""
+            SELECT {columns} FROM part_codes
+            JOIN {cls._table_name} ON {cls._table_name}.id = part_codes.part_id
+            WHERE part_codes.code_normalized IN (SELECT value FROM json_each(?))
+            LIMIT ?
+        """, (variants, cls._fuzzy_candidate_limit)).fetchall()
+
+    @classmethod
+    def _fuzzy_name_candidates(cls, conn, words, columns):
+        """
+        Parts whose name contains a correction of every correctable query word. The FTS query
+        is not ranked (bm25 over common words would read the whole catalog): all candidates
+        already contain the corrected words and are ranked by fuzzy_search itself.
+        """
+        vocabulary = cls._name_vocabulary(conn)
+        groups = [vocabulary.corrections(word, cls._fuzzy_min_score) for word in words if len(word) >= 3]
+        groups = [group for group in groups if group]
+        if not groups:
+            return []
+        match = " AND ".join("{name_norm} : (" + " OR ".join(f'"{word}"' for word in group) + ")" for group in groups)
+        return conn.execute(f"""
+            SELECT {columns} FROM {cls._table_name}
+            WHERE id IN (SELECT rowid FROM {cls._search_table} WHERE {cls._search_table} MATCH ? LIMIT ?)
+        """, (match, cls._fuzzy_candidate_limit)).fetchall()
+
+    @classmethod
+    def _name_vocabulary(cls, conn):
+        """Vocabulary of the current database, built on first use from the distinct folded names."""
+        database = connection_manager.database
+        vocabulary = cls._name_vocabularies.get(database)
+        if vocabulary is None:
+            vocabulary = _NameVocabulary()
+            for row in conn.execute(f"SELECT DISTINCT name_norm FROM {cls._table_name}"):
+                vocabulary.add(row[0])
+            cls._name_vocabularies[database] = vocabulary
+        return vocabulary
+
+    @classmethod
+    def forget_database_state(cls):
+        """Forgets what was cached about the current database (e.g. after a backup was restored over it)."""
+        database = connection_manager.database
+        cls._search_index_ready.pop(database, None)
+        cls._name_vocabularies.pop(database, None)
+
+    @classmethod
+    def remember_name(cls, name):
+        """Adds the words of a saved part name to the vocabulary, if it was already built."""
+        vocabulary = cls._name_vocabularies.get(connection_manager.database)
+        if vocabulary is not None:
+            vocabulary.add(fold_text(name))
+
+    @classmethod
+    def get_by_code(cls, code, fields=None):
+        """
+        Exact lookup of a scanned or typed code: barcode, part_number, original_code, a similar
+        code or an extra supplier/OEM code, compared in normalized form (see normalize_code)
+        with a single search on the part_codes primary key. If the code belongs to more than
+        one part, the barcode wins, then part_number, then original_code.
+        Returns the Part (partial with 'fields') or None.
+        """
+        parts = cls.find_by_code(code, fields=fields, limit=1)
+        return parts[0] if parts else None
+
+    @classmethod
+    def find_by_code(cls, code, fields=None, limit=None):
+        """All parts that have 'code' (normalized) among their codes, in get_by_code priority order."""
+        normalized = normalize_code(code)
+        if not normalized:
+            return []
+        select_list = ", ".join(f"{cls._table_name}.{column}" for column in cls._select_list(fields).split(", "))
+        sql = f"""
+            SELECT {select_list} FROM part_codes
+            JOIN {cls._table_name} ON {cls._table_name}.id = part_codes.part_id
+            WHERE part_codes.code_normalized = ?
+            GROUP BY {cls._table_name}.id
+            ORDER BY MIN(CASE part_codes.kind WHEN 'barcode' THEN 0 WHEN 'part_number' THEN 1
+                                              WHEN 'original_code' THEN 2 ELSE 3 END), {cls._table_name}.id
+        """
+        params = [normalized]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        conn = get_db_connection()
+        try:
+            return list(cls._from_rows(conn.execute(sql, params).fetchall()))
+        finally:
+            conn.close()
+
+    @classmethod
+    def _search_index(cls, cursor, query, select_list, limit=None):
+        """
+        Broad search through the FTS index with an already folded query. The query is matched as
+        a single phrase, which with the trigram tokenizer means "contains this text" in any indexed
+        column, the same semantics as the LIKE '%q%' search, ordered by bm25 with the column weights.
+        A query with spaces also matches the codes with the spaces removed ("psl 619" -> PSL619).
+        A numeric query also matches the part id exactly, listed first.
+        """
+        weights = ", ".join(str(weight) for weight in cls._search_weights)
+        match = '"' + query.replace('"', '""') + '"'
+        if " " in query:
+            match += ' OR codes_norm : "' + query.replace(" ", "").replace('"', '""') + '"'
+        sql = f"""
+            SELECT {select_list} FROM {cls._table_name}
+            JOIN (
+                SELECT rowid AS match_id, bm25({cls._search_table}, {weights}) AS score
+                FROM {cls._search_table} WHERE {cls._search_table} MATCH ?
+            ) ON {cls._table_name}.id = match_id
+            ORDER BY score
+        """
+        params = [match]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
         cursor.execute(sql, params)
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [cls(**dict(row)) for row in rows]
+        parts = list(cls._from_rows(cursor.fetchall()))
+        if query.isdigit() and not any(part.id == int(query) for part in parts):
+            cursor.execute(f"SELECT {select_list} FROM {cls._table_name} WHERE id = ?", (int(query),))
+            parts[:0] = cls._from_rows(cursor.fetchall())
+        return parts
 
@@ -0,0 +1,294 @@
+# models/parts_catalog.py
+"""
+Catálogo de peças em memória, compartilhado por todo o processo.
+
+Os diálogos de venda e de OS, o completer de peças e o diálogo de busca liam o catálogo inteiro
+do banco (get_all_parts) a cada abertura -- o completer, a cada tecla com o campo vazio.
+Aqui as colunas que eles exibem ficam em vetores compactos (array para os números, listas para
+os textos), uma posição por peça em ordem de id, com índices (dict) por id e por código
+normalizado (barras, nº da peça, original e similares; montado na primeira busca por código).
+Os completers usam ainda os índices por prefixo de nome e de código (completion_indexes).
+O catálogo é lido uma vez por banco e mantido em dia pelo StockManager, que aplica inclusões,
+alterações, exclusões e movimentações de estoque depois do commit (on_commit), sem reler o
+banco. Alterações feitas por outros terminais aparecem quando o catálogo expira
+(PARTS_CATALOG_MAX_AGE_S) e é relido.
+
+'version' muda a cada alteração: quem guarda algo derivado do catálogo (ex.: uma lista montada
+com records()) pode reaproveitá-lo enquanto a versão for a mesma.
+As alterações são serializadas por um lock; as leituras não, pois ocorrem na mesma thread
+que as alterações (a da interface).
+"""
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from itertools import compress, count
+
+from config.settings import DB_FETCH_BATCH_SIZE, DB_PAGE_SIZE, PARTS_CATALOG_MAX_AGE_S
+from models.base_model import get_db_connection
+from models.connection_manager import connection_manager
+from models.part_model import Part, normalize_code
+from utils.completion_index import CompletionIndex
+from utils.helpers import fold_text
+
+# Colunas guardadas além do id: as exibidas pelos diálogos e completers e os códigos indexados
+COLUMNS = ("name", "part_number", "manufacturer", "price", "stock", "min_stock", "location",
+           "original_code", "similar_code_01", "similar_code_02", "barcode")
+_NUMERIC_TYPES = {"price": "d", "stock": "q", "min_stock": "q"}  # Colunas guardadas em array
+_COMPACT_RATIO = 0.25  # Fração de posições de peças excluídas a partir da qual os vetores são refeitos
+
+_catalogs = {}  # {banco: PartsCatalog}
+_catalogs_lock = threading.Lock()
+_versions = count(1)  # Versões crescentes mesmo entre um catálogo e o que o substitui ao ser relido
+
+
+def get_catalog():
+    """Catálogo do banco atual, lido do banco na primeira chamada e de novo quando expira."""
+    database = connection_manager.database
+    with _catalogs_lock:
+        catalog = _catalogs.get(database)
+        if catalog is None or catalog.expired():
+            catalog = _catalogs[database] = PartsCatalog.load()
+        return catalog
+
+
+def update(change):
+    """Aplica 'change(catalog)' ao catálogo do banco atual; se ele ainda não foi lido, não há o que atualizar."""
+    catalog = _catalogs.get(connection_manager.database)
+    if catalog is not None:
+        change(catalog)
+
+
+def invalidate():
+    """Descarta o catálogo do banco atual (ex.: depois de uma carga em massa); a próxima leitura o relê."""
+    with _catalogs_lock:
+        _catalogs.pop(connection_manager.database, None)
+
+
+class PartsCatalog:
+    """
+    Peças em vetores por coluna ('ids' e 'columns[coluna]'), na mesma posição (linha) em todos.
+    Peças excluídas ficam marcadas em 'alive' até a próxima compactação.
+    Os códigos extras de part_codes (StockManager.add_part_code) não entram no índice de códigos.
+    """
+    def __init__(self):
+        self.ids = array("q")
+        self.columns = {column: array(_NUMERIC_TYPES[column]) if column in _NUMERIC_TYPES else []
+                        for column in COLUMNS}
+        self.alive = bytearray()
+        self.row_by_id = {}
+        self._row_by_code = None  # Montado na primeira busca por código (_code_index)
+        self._completion = None   # (nomes, códigos), montados no primeiro completion_indexes()
+        self.deleted = 0
+        self.loaded_at = time.monotonic()
+        self.version = next(_versions)
+        self._hydrate = Part._hydrator(("id",) + COLUMNS)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        """Lê o catálogo do banco, em lotes, direto para os vetores."""
+        catalog = cls()
+        select_list = ", ".join(f"IFNULL({column}, 0)" if column in _NUMERIC_TYPES else column for column in COLUMNS)
+        conn = get_db_connection()
+        try:
+            cursor = conn.execute(f"SELECT id, {select_list} FROM {Part._table_name} ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(DB_FETCH_BATCH_SIZE)
+                if not rows:
+                    break
+                values = list(zip(*rows))
+                catalog.ids.extend(values[0])
+                for column, column_values in zip(COLUMNS, values[1:]):
+                    catalog.columns[column].extend(column_values)
+        finally:
+            conn.close()
+        catalog.alive = bytearray(b"\x01") * len(catalog.ids)
+        catalog._rebuild_id_index()
+        return catalog
+
+    def expired(self):
+        return time.monotonic() - self.loaded_at > PARTS_CATALOG_MAX_AGE_S
+
+    def __len__(self):
+        return len(self.ids) - self.deleted
+
+    # --- Leitura ---
+    def _part(self, row):
+        return self._hydrate((self.ids[row],) + tuple(self.columns[column][row] for column in COLUMNS))
+
+    def get(self, part_id):
+        """Peça parcial (id e COLUMNS) com o id informado, ou None."""
+        row = self.row_by_id.get(part_id)
+        return self._part(row) if row is not None else None
+
+    def find_by_code(self, code):
+        """
+        Peça parcial com o código exato 'code' (comparado normalizado), na prioridade de
+        Part.get_by_code: barras, nº da peça, original e similares. None se nenhuma o tiver.
+        """
+        row = self._code_index().get(normalize_code(code))
+        return self._part(row) if row is not None else None
+
+    def page(self, after_id=None, limit=DB_PAGE_SIZE):
+        """Página de peças parciais em ordem de id, depois de 'after_id' (paginação por chave, como get_page)."""
+        row = bisect_right(self.ids, after_id) if after_id is not None else 0
+        parts = []
+        while row < len(self.ids) and len(parts) < limit:
+            if self.alive[row]:
+                parts.append(self._part(row))
+            row += 1
+        return parts
+
+    def records(self, fields):
+        """Lista de tuplas (id, *fields) de todas as peças, em ordem de id, sem criar objetos Part."""
+        return list(compress(zip(self.ids, *(self.columns[field] for field in fields)), self.alive))
+
+    def completion_indexes(self):
+        """
+        Índices de autocompletar por prefixo (utils.completion_index) com os ids das peças:
+        (nomes, por fold_text; códigos, por normalize_code). Montados no primeiro uso e
+        mantidos em dia pelas alterações do catálogo.
+        """
+        if self._completion is None:
+            with self._lock:
+                records = self.records(("name",) + Part._code_columns)
+                names = CompletionIndex(fold_text, ((record[1], record[0]) for record in records))
+                codes = CompletionIndex(normalize_code, ((code, record[0]) for record in records for code in record[2:]))
+                self._completion = (names, codes)
+        return self._completion
+
+    # --- Alterações (chamadas pelo StockManager depois do commit) ---
+    def put(self, part):
+        """Inclui ou substitui uma peça (Part completo, recém-gravado)."""
+        with self._lock:
+            row = self.row_by_id.get(part.id)
+            if row is None:
+                if self.ids and part.id < self.ids[-1]:
+                    # Ids vêm em ordem crescente (AUTOINCREMENT); fora de ordem, os vetores são refeitos
+                    self._insert_sorted(part)
+                    self.version = next(_versions)
+                    return
+                row = len(self.ids)
+                self.ids.append(part.id)
+                for column in COLUMNS:
+                    self.columns[column].append(self._value(part, column))
+                self.alive.append(1)
+                self.row_by_id[part.id] = row
+            else:
+                self._unindex_row(row)
+                for column in COLUMNS:
+                    self.columns[column][row] = self._value(part, column)
+            self._index_row(row)
+            self.version = next(_versions)
+
+    def discard(self, part_id):
+        """Remove uma peça excluída."""
+        with self._lock:
+            row = self.row_by_id.pop(part_id, None)
+            if row is None:
+                return
+            self._unindex_row(row)
+            self.alive[row] = 0
+            self.deleted += 1
+            if self.deleted > len(self.ids) * _COMPACT_RATIO:
+                self._compact()
+            self.version = next(_versions)
+
+    def set_stock(self, stocks):
+        """Grava o estoque atual de peças movimentadas: 'stocks' são tuplas (id da peça, estoque)."""
+        with self._lock:
+            stock_column = self.columns["stock"]
+            for part_id, stock in stocks:
+                row = self.row_by_id.get(part_id)
+                if row is not None:
+                    stock_column[row] = stock
+            self.version = next(_versions)
+
+    # --- Manutenção interna ---
+    @staticmethod
+    def _value(part, column):
+        value = getattr(part, column)
+        if column in _NUMERIC_TYPES:
+            return value or 0
+        return value
+
+    def _codes(self, row):
+        """Códigos normalizados da linha, do mais prioritário para o menos (ordem de Part._code_columns)."""
+        for column in Part._code_columns:
+            code = normalize_code(self.columns[column][row])
+            if code:
+                yield code
+
+    def _completion_entries(self, row):
+        """Pares (índice de autocompletar, texto) da linha."""
+        names, codes = self._completion
+        yield names, self.columns["name"][row]
+        for column in Part._code_columns:
+            yield codes, self.columns[column][row]
+
+    def _index_row(self, row):
+        """Inclui a linha nos índices já montados (autocompletar e códigos)."""
+        if self._completion is not None:
+            for index, text in self._completion_entries(row):
+                index.add(text, self.ids[row])
+        if self._row_by_code is None:
+            return
+        for rank, code in enumerate(self._codes(row)):
+            current = self._row_by_code.get(code)
+            # Código também usado por outra peça: fica com a de código mais prioritário (depois, menor id)
+            if current is None or (self._code_rank(current, code), self.ids[current]) > (rank, self.ids[row]):
+                self._row_by_code[code] = row
+
+    def _unindex_row(self, row):
+        if self._completion is not None:
+            for index, text in self._completion_entries(row):
+                index.remove(text, self.ids[row])
+        if self._row_by_code is None:
+            return
+        # Se outra peça também tinha o código, ela só volta ao índice quando o catálogo for relido
+        for code in self._codes(row):
+            if self._row_by_code.get(code) == row:
+                del self._row_by_code[code]
+
+    def _code_rank(self, row, code):
+        return next((rank for rank, row_code in enumerate(self._codes(row)) if row_code == code), len(Part._code_columns))
+
+    def _rebuild_id_index(self):
+        self.row_by_id = dict(compress(zip(self.ids, range(len(self.ids))), self.alive))
+        self._row_by_code = None
+
+    def _code_index(self):
+        """{código normalizado: linha}, montado de uma vez na primeira busca por código."""
+        if self._row_by_code is None:
+            with self._lock:
+                index = {}
+                rows = range(len(self.ids))
+                # Do menos para o mais prioritário e do maior para o menor id: o último a gravar vence
+                for column in reversed(Part._code_columns):
+                    codes = map(normalize_code, reversed(self.columns[column]))
+                    index.update(compress(zip(codes, reversed(rows)), reversed(self.alive)))
+                index.pop("", None)  # Colunas vazias
+                self._row_by_code = index
+        return self._row_by_code
+
+    def _compact(self):
+        """Refaz os vetores sem as peças excluídas."""
+        self.ids = array("q", compress(self.ids, self.alive))
+        for column, values in self.columns.items():
+            kept = compress(values, self.alive)
+            self.columns[column] = array(_NUMERIC_TYPES[column], kept) if column in _NUMERIC_TYPES else list(kept)
+        self.alive = bytearray(b"\x01") * len(self.ids)
+        self.deleted = 0
+        self._rebuild_id_index()
+
+    def _insert_sorted(self, part):
+        if self.deleted:
+            self._compact()
+        row = bisect_right(self.ids, part.id)
+        self.ids.insert(row, part.id)
+        for column in COLUMNS:
+            self.columns[column].insert(row, self._value(part, column))
+        self.alive.insert(row, 1)
+        self._rebuild_id_index()
+        self._index_row(row)
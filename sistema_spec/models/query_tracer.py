@@ -0,0 +1,317 @@
+# models/query_tracer.py
+import atexit
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from config.settings import (
+    PROJECT_ROOT, SQL_TRACE_ENABLED, SQL_SLOW_QUERY_MS, SQL_TRACE_TOP_N, SQL_SLOW_QUERY_LOG
+)
+
+logger = logging.getLogger('sistema_spec_logger.sql')
+
+_PROJECT_DIR = os.path.normcase(os.path.abspath(PROJECT_ROOT)) + os.sep
+_MODULES_DIR = _PROJECT_DIR + 'modules' + os.sep
+_MODELS_DIR = _PROJECT_DIR + 'models' + os.sep
+
+_WHITESPACE = re.compile(r"\s+")
+_VALUES_ROWS = re.compile(r"\(\?(?:, ?\?)*\)(?:, ?\(\?(?:, ?\?)*\))+")
+_PLACEHOLDER_LIST = re.compile(r"\(\?(?:, ?\?)+\)")
+
+
+def normalize_sql(sql):
+    """
+    Forma canônica do comando, usada para agrupar execuções no relatório:
+    espaços colapsados e listas de parâmetros de tamanho variável (IN (?, ?, ...),
+    VALUES (?, ?), (?, ?) ...) reduzidas a uma única forma.
+    """
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _VALUES_ROWS.sub("(?, ...), ...", sql)
+    return _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+
+
+def params_shape(parameters, many=False):
+    """
+    Descreve os parâmetros sem registrar seus valores (que podem conter dados de clientes):
+    tipos para execute(), 'linhas x colunas' para executemany().
+    """
+    if many:
+        width = len(parameters[0]) if parameters else 0
+        return f"{len(parameters)}x{width}"
+    if not parameters:
+        return "()"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(sorted(parameters)) + "}"
+    if len(parameters) > 6:
+        return f"({len(parameters)} parâmetros)"
+    return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+
+
+def find_caller():
+    """
+    Identifica quem disparou o comando: o primeiro método de um manager (pasta modules/)
+    na pilha; na falta dele, a primeira função do projeto fora de models/ (GUI, utils, benchmarks).
+    """
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.normcase(os.path.abspath(code.co_filename))
+        if filename.startswith(_MODULES_DIR):
+            return code.co_qualname
+        if fallback is None and filename.startswith(_PROJECT_DIR) and not filename.startswith(_MODELS_DIR):
+            module = os.path.splitext(os.path.basename(filename))[0]
+            fallback = f"{module}.{code.co_qualname}"
+        frame = frame.f_back
+    return fallback or "?"
+
+
+class QueryStats:
+    """Totais acumulados na sessão para um comando (normalizado) vindo de um mesmo chamador."""
+    __slots__ = ('sql', 'caller', 'params_shape', 'count', 'total_ms', 'max_ms')
+
+    def __init__(self, sql, caller, params_shape):
+        self.sql = sql
+        self.caller = caller
+        self.params_shape = params_shape
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class ActionStats:
+    """
+    Contadores de uma ação de alto nível (um load_* da interface, uma venda, um relatório):
+    comandos executados, conexões entregues pelo pool, conexões físicas abertas e tempo total.
+    """
+    __slots__ = ('name', 'max_queries', 'max_connections', 'queries', 'connections', 'opened',
+                 'elapsed_ms', 'statements')
+
+    def __init__(self, name, max_queries=None, max_connections=None):
+        self.name = name
+        self.max_queries = max_queries
+        self.max_connections = max_connections
+        self.queries = 0
+        self.connections = 0
+        self.opened = 0
+        self.elapsed_ms = 0.0
+        self.statements = []
+
+    def over_budget(self):
+        """Lista (vazia se dentro do orçamento) com os limites que a ação ultrapassou."""
+        problems = []
+        if self.max_queries is not None and self.queries > self.max_queries:
+            problems.append(f"{self.queries} comandos (limite {self.max_queries})")
+        if self.max_connections is not None and self.connections > self.max_connections:
+            problems.append(f"{self.connections} conexões (limite {self.max_connections})")
+        return problems
+
+    def summary(self):
+        return (f"{self.name}: {self.queries} comandos, {self.connections} conexões "
+                f"({self.opened} novas), {self.elapsed_ms:.1f} ms")
+
+
+class QueryTracer:
+    """
+    Instrumentação opcional das conexões do pool (desligada por padrão).
+    - Os comandos executados por cursor.execute/executemany/executescript são cronometrados
+      por TracedCursor, com o texto do comando, o formato dos parâmetros e o chamador.
+    - O trace callback do sqlite3 captura o que não passa pelos cursores (BEGIN/COMMIT/ROLLBACK
+      implícitos, commit(), backup), que entra no relatório apenas com a contagem.
+    - Comandos acima de 'slow_query_ms' são gravados no log de consultas lentas.
+    - Ações abertas com track_action() contam comandos e conexões e são comparadas a um orçamento.
+    """
+    def __init__(self, enabled=SQL_TRACE_ENABLED, slow_query_ms=SQL_SLOW_QUERY_MS, top_n=SQL_TRACE_TOP_N):
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self.top_n = top_n
+        self.started_at = datetime.now()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._log_handler = None
+        if enabled:
+            self._open_slow_query_log()
+
+    def _open_slow_query_log(self):
+        if self._log_handler is not None:
+            return
+        os.makedirs(os.path.dirname(SQL_SLOW_QUERY_LOG), exist_ok=True)
+        self._log_handler = logging.FileHandler(SQL_SLOW_QUERY_LOG, encoding='utf-8')
+        self._log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger.addHandler(self._log_handler)
+        logger.setLevel(logging.INFO)
+
+    def set_enabled(self, enabled, slow_query_ms=None):
+        """Liga/desliga o rastreamento. Prefira connection_manager.set_tracing(), que renova as conexões."""
+        self.enabled = enabled
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        if enabled:
+            self._open_slow_query_log()
+
+    def attach(self, conn):
+        """Instala o trace callback em uma conexão recém-criada."""
+        conn.set_trace_callback(self._on_statement)
+
+    def _on_statement(self, statement):
+        if getattr(self._local, 'depth', 0):
+            return  # Já está sendo cronometrado por TracedCursor
+        self.record(statement, find_caller(), "-", None)
+
+    def _active_actions(self):
+        actions = getattr(self._local, 'actions', None)
+        if actions is None:
+            actions = self._local.actions = []
+        return actions
+
+    @contextmanager
+    def track_action(self, name, max_queries=None, max_connections=None):
+        """
+        Conta os comandos e as conexões usados pela thread atual até o fim do bloco.
+        Ações aninhadas (load_all_data -> load_parts) somam também na ação externa.
+        Ao final registra o resumo no log e um aviso se o orçamento foi ultrapassado.
+        Só conta com o rastreamento ligado; desligado, o ActionStats devolvido fica zerado.
+        """
+        action = ActionStats(name, max_queries, max_connections)
+        if not self.enabled:
+            yield action
+            return
+        actions = self._active_actions()
+        actions.append(action)
+        start = time.perf_counter()
+        try:
+            yield action
+        finally:
+            action.elapsed_ms = (time.perf_counter() - start) * 1000
+            actions.remove(action)
+            problems = action.over_budget()
+            if problems:
+                logger.warning(f"Ação acima do orçamento de consultas: {action.summary()} - {', '.join(problems)}")
+            else:
+                logger.info(f"Ação {action.summary()}")
+
+    def on_acquire(self):
+        """Chamado pelo pool a cada conexão entregue (fora de uma unidade de trabalho)."""
+        for action in self._active_actions():
+            action.connections += 1
+
+    def on_connect(self):
+        """Chamado pelo pool a cada conexão física aberta."""
+        for action in self._active_actions():
+            action.opened += 1
+
+    def timed(self, execute, sql, parameters, many=False):
+        """Executa 'execute(sql, parameters)' medindo o tempo e registrando o resultado."""
+        if many and not isinstance(parameters, (list, tuple)):
+            parameters = list(parameters)  # Geradores só podem ser percorridos uma vez
+        local = self._local
+        local.depth = getattr(local, 'depth', 0) + 1
+        start = time.perf_counter()
+        try:
+            return execute(sql, parameters)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            local.depth -= 1
+            caller = find_caller()
+            self.record(sql, caller, params_shape(parameters, many), elapsed_ms)
+            for action in self._active_actions():
+                action.queries += 1
+                if len(action.statements) < 100:
+                    action.statements.append(f"{caller}: {normalize_sql(sql)}")
+
+    def record(self, sql, caller, shape, elapsed_ms):
+        """Acumula uma execução; 'elapsed_ms' é None para comandos vistos apenas pelo trace callback."""
+        key = (normalize_sql(sql), caller)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(key[0], caller, shape)
+            stats.count += 1
+            if elapsed_ms is not None:
+                stats.total_ms += elapsed_ms
+                stats.max_ms = max(stats.max_ms, elapsed_ms)
+        if elapsed_ms is not None and elapsed_ms >= self.slow_query_ms:
+            logger.warning(f"Consulta lenta ({elapsed_ms:.1f} ms) em {caller}, parâmetros {shape}: {key[0]}")
+
+    def stats(self):
+        """Cópia dos totais da sessão, do comando mais custoso para o menos custoso."""
+        with self._lock:
+            stats = list(self._stats.values())
+        return sorted(stats, key=lambda s: (s.total_ms, s.count), reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+        self.started_at = datetime.now()
+
+    def report(self, top_n=None):
+        """Relatório em texto com os 'top_n' comandos que mais consumiram tempo na sessão."""
+        top = self.stats()[:top_n or self.top_n]
+        lines = [
+            f"Top {len(top)} comandos SQL desde {self.started_at:%Y-%m-%d %H:%M:%S} (tempo total, execuções, médio, máximo, chamador, parâmetros):"
+        ]
+        for s in top:
+            average = s.total_ms / s.count if s.count else 0.0
+            sql = s.sql if len(s.sql) <= 300 else s.sql[:297] + "..."
+            lines.append(
+                f"{s.total_ms:10.1f} ms {s.count:7d}x {average:8.2f} ms {s.max_ms:8.2f} ms  {s.caller}  {s.params_shape}\n"
+                f"    {sql}"
+            )
+        return "\n".join(lines)
+
+    def dump_report(self, top_n=None):
+        """Grava o relatório da sessão no log de consultas lentas (chamado também ao sair)."""
+        if not self.enabled or not self._stats:
+            return None
+        report = self.report(top_n)
+        logger.info(report)
+        return report
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor usado pelas conexões quando o rastreamento está ligado."""
+    def execute(self, sql, parameters=()):
+        return query_tracer.timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return query_tracer.timed(super().executemany, sql, parameters, many=True)
+
+    def executescript(self, script):
+        return query_tracer.timed(lambda sql, _: super(TracedCursor, self).executescript(sql), script, ())
+
+
+@contextmanager
+def assert_query_budget(max_queries=None, max_connections=None, name="bloco"):
+    """
+    Auxiliar para testes: liga o rastreamento durante o bloco e levanta AssertionError,
+    listando os comandos executados, se o bloco ultrapassar o orçamento. Exemplo:
+
+        with assert_query_budget(max_queries=2):
+            main_window.load_parts()
+    """
+    from models.connection_manager import connection_manager
+    was_enabled = query_tracer.enabled
+    if not was_enabled:
+        connection_manager.set_tracing(True)
+    try:
+        with query_tracer.track_action(name, max_queries, max_connections) as action:
+            yield action
+    finally:
+        if not was_enabled:
+            connection_manager.set_tracing(False)
+    problems = action.over_budget()
+    if problems:
+        raise AssertionError(
+            f"{action.summary()} - {', '.join(problems)}:\n" + "\n".join(action.statements)
+        )
+
+
+query_tracer = QueryTracer()
+atexit.register(query_tracer.dump_report)
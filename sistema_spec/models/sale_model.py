@@ -1,5 +1,5 @@
 # models/sale_model.py
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, unit_of_work
 import sqlite3
 
 class Sale(BaseModel):
@@ -8,6 +8,9 @@ class Sale(BaseModel):
         "sale_date", "customer_id", "total_amount", "discount_applied",
         "payment_method", "user_id", "status", "closed_by_user_id", "is_quote"
     ]
+    __slots__ = tuple(_fields) + ("items",)  # 'items' é preenchido pela tela de edição da venda
+    # Colunas normalizadas usadas pela busca de vendas (ver BaseModel._normalized_columns)
+    _normalized_columns = {"status_norm": ("status",), "payment_method_norm": ("payment_method",)}
 
     def __init__(self, id=None, sale_date=None, customer_id=None, total_amount=0.0,
                  discount_applied=0.0, payment_method=None, user_id=None,
@@ -24,38 +27,36 @@ class Sale(BaseModel):
         self.is_quote = is_quote # True if it's a quote, False if it's a sale
 
     @classmethod
-    def _create_table(cls):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sale_date TEXT NOT NULL,
-                customer_id INTEGER NOT NULL,
-                total_amount REAL NOT NULL,
-                discount_applied REAL DEFAULT 0.0,
-                payment_method TEXT,
-                user_id INTEGER NOT NULL,
-                status TEXT DEFAULT 'PENDENTE',
-                closed_by_user_id INTEGER,
-                is_quote BOOLEAN DEFAULT 0,
-                FOREIGN KEY (customer_id) REFERENCES customers(id),
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (closed_by_user_id) REFERENCES users(id)
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_customer_id ON {cls._table_name} (customer_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_user_id ON {cls._table_name} (user_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_date ON {cls._table_name} (sale_date DESC)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_status ON {cls._table_name} (status COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_is_quote ON {cls._table_name} (is_quote)")
-        conn.commit()
-        conn.close()
+    def _create_table(cls, cursor=None):
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_date TEXT NOT NULL,
+                    customer_id INTEGER NOT NULL,
+                    total_amount REAL NOT NULL,
+                    discount_applied REAL DEFAULT 0.0,
+                    payment_method TEXT,
+                    user_id INTEGER NOT NULL,
+                    status TEXT DEFAULT 'PENDENTE',
+                    closed_by_user_id INTEGER,
+                    is_quote BOOLEAN DEFAULT 0,
+                    FOREIGN KEY (customer_id) REFERENCES customers(id),
+                    FOREIGN KEY (user_id) REFERENCES users(id),
+                    FOREIGN KEY (closed_by_user_id) REFERENCES users(id)
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_customer_id ON {cls._table_name} (customer_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_user_id ON {cls._table_name} (user_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_date ON {cls._table_name} (sale_date DESC)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_status ON {cls._table_name} (status COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sales_is_quote ON {cls._table_name} (is_quote)")
 
 class SaleItem(BaseModel):
     _table_name = "sale_items"
     _fields = ["sale_id", "part_id", "quantity", "unit_price", "subtotal"]
+    __slots__ = tuple(_fields)
 
     def __init__(self, id=None, sale_id=None, part_id=None, quantity=0, unit_price=0.0, subtotal=0.0):
         super().__init__(id)
@@ -66,24 +67,21 @@ class SaleItem(BaseModel):
         self.subtotal = subtotal
 
     @classmethod
-    def _create_table(cls):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sale_id INTEGER NOT NULL,
-                part_id INTEGER,
-                quantity INTEGER NOT NULL,
-                unit_price REAL NOT NULL,
-                subtotal REAL NOT NULL,
-                FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE,
-                FOREIGN KEY (part_id) REFERENCES parts(id) ON DELETE SET NULL
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON {cls._table_name} (sale_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sale_items_part_id ON {cls._table_name} (part_id)")
-        conn.commit()
-        conn.close()
+    def _create_table(cls, cursor=None):
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sale_id INTEGER NOT NULL,
+                    part_id INTEGER,
+                    quantity INTEGER NOT NULL,
+                    unit_price REAL NOT NULL,
+                    subtotal REAL NOT NULL,
+                    FOREIGN KEY (sale_id) REFERENCES sales(id) ON DELETE CASCADE,
+                    FOREIGN KEY (part_id) REFERENCES parts(id) ON DELETE SET NULL
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sale_items_sale_id ON {cls._table_name} (sale_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_sale_items_part_id ON {cls._table_name} (part_id)")
 
@@ -1,5 +1,5 @@
 # models/service_order_model.py
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, unit_of_work
 import sqlite3
 from datetime import datetime
 
@@ -11,6 +11,7 @@ class ServiceOrder(BaseModel):
         "total_amount", "labor_cost", "parts_cost", "assigned_user_id",
         "start_date", "end_date", "payment_status"
     ]
+    __slots__ = tuple(_fields)
 
     def __init__(self, id=None, order_date=None, customer_id=None,\
                  vehicle_make=None, vehicle_model=None, vehicle_year=None,\
@@ -35,44 +36,42 @@ class ServiceOrder(BaseModel):
         self.payment_status = payment_status
 
     @classmethod
-    def _create_table(cls):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_date TEXT NOT NULL,
-                customer_id INTEGER NOT NULL,
-                vehicle_make TEXT,
-                vehicle_model TEXT,
-                vehicle_year TEXT,
-                vehicle_plate TEXT,
-                description TEXT,
-                status TEXT NOT NULL,
-                total_amount REAL NOT NULL,
-                labor_cost REAL DEFAULT 0.0,
-                parts_cost REAL DEFAULT 0.0,
-                assigned_user_id INTEGER,
-                start_date TEXT,
-                end_date TEXT,
-                payment_status TEXT DEFAULT 'Pendente',
-                FOREIGN KEY (customer_id) REFERENCES customers(id),
-                FOREIGN KEY (assigned_user_id) REFERENCES users(id)
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_customer_id ON {cls._table_name} (customer_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_assigned_user_id ON {cls._table_name} (assigned_user_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_date ON {cls._table_name} (order_date DESC)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_status ON {cls._table_name} (status COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_payment_status ON {cls._table_name} (payment_status COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_vehicle_plate ON {cls._table_name} (vehicle_plate COLLATE NOCASE)")
-        conn.commit()
-        conn.close()
+    def _create_table(cls, cursor=None):
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    order_date TEXT NOT NULL,
+                    customer_id INTEGER NOT NULL,
+                    vehicle_make TEXT,
+                    vehicle_model TEXT,
+                    vehicle_year TEXT,
+                    vehicle_plate TEXT,
+                    description TEXT,
+                    status TEXT NOT NULL,
+                    total_amount REAL NOT NULL,
+                    labor_cost REAL DEFAULT 0.0,
+                    parts_cost REAL DEFAULT 0.0,
+                    assigned_user_id INTEGER,
+                    start_date TEXT,
+                    end_date TEXT,
+                    payment_status TEXT DEFAULT 'Pendente',
+                    FOREIGN KEY (customer_id) REFERENCES customers(id),
+                    FOREIGN KEY (assigned_user_id) REFERENCES users(id)
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_customer_id ON {cls._table_name} (customer_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_assigned_user_id ON {cls._table_name} (assigned_user_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_date ON {cls._table_name} (order_date DESC)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_status ON {cls._table_name} (status COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_payment_status ON {cls._table_name} (payment_status COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_orders_vehicle_plate ON {cls._table_name} (vehicle_plate COLLATE NOCASE)")
 
 class ServiceOrderItem(BaseModel):
     _table_name = "service_order_items"
     _fields = ["service_order_id", "part_id", "quantity", "unit_price", "subtotal", "is_service", "description"]
+    __slots__ = tuple(_fields)
 
     def __init__(self, id=None, service_order_id=None, part_id=None, quantity=0, unit_price=0.0, subtotal=0.0, is_service=0, description=None):
         super().__init__(id)
@@ -85,27 +84,24 @@ class ServiceOrderItem(BaseModel):
         self.description = description # Usado para descrição do serviço ou da peça, se necessário
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """Cria a tabela de itens de ordem de serviço se ela não existir."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                service_order_id INTEGER NOT NULL,
-                part_id INTEGER, -- Pode ser NULL se for um serviço
-                quantity INTEGER NOT NULL,
-                unit_price REAL NOT NULL,
-                subtotal REAL NOT NULL,
-                is_service BOOLEAN DEFAULT 0,
-                description TEXT,
-                FOREIGN KEY (service_order_id) REFERENCES service_orders(id) ON DELETE CASCADE,
-                FOREIGN KEY (part_id) REFERENCES parts(id) ON DELETE SET NULL
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_order_items_so_id ON {cls._table_name} (service_order_id)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_order_items_part_id ON {cls._table_name} (part_id)")
-        conn.commit()
-        conn.close()
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    service_order_id INTEGER NOT NULL,
+                    part_id INTEGER, -- Pode ser NULL se for um serviço
+                    quantity INTEGER NOT NULL,
+                    unit_price REAL NOT NULL,
+                    subtotal REAL NOT NULL,
+                    is_service BOOLEAN DEFAULT 0,
+                    description TEXT,
+                    FOREIGN KEY (service_order_id) REFERENCES service_orders(id) ON DELETE CASCADE,
+                    FOREIGN KEY (part_id) REFERENCES parts(id) ON DELETE SET NULL
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_order_items_so_id ON {cls._table_name} (service_order_id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_service_order_items_part_id ON {cls._table_name} (part_id)")
 
@@ -1,6 +1,6 @@
 # models/settings_model.py
 import sqlite3
-from models.base_model import get_db_connection
+from models.base_model import get_db_connection, unit_of_work
 
 class Setting:
     """
@@ -10,18 +10,15 @@ class Setting:
     _table_name = "settings"
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """Creates the settings table if it doesn't exist."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
 
     @classmethod
     def set(cls, key, value):
@@ -2,13 +2,23 @@
 import sqlite3
 import uuid
 
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, get_db_connection, unit_of_work
+from utils.helpers import fold_text
 
 class Supplier(BaseModel):
     _table_name = "suppliers"
     _fields = [
         "name", "cnpj", "contact_person", "phone", "email", "address"
     ]
+    __slots__ = tuple(_fields)
+    _hydrate_with_init = True  # __init__ normaliza nome, CNPJ e endereço para maiúsculas
+    # Colunas normalizadas usadas pela busca (ver BaseModel._normalized_columns)
+    _normalized_columns = {
+        "name_norm": ("name",),
+        "cnpj_norm": ("cnpj",),
+        "contact_person_norm": ("contact_person",),
+        "address_norm": ("address",),
+    }
 
     def __init__(self, name, cnpj, contact_person, phone, email, address, id=None):
         super().__init__(id)
@@ -20,38 +30,35 @@ class Supplier(BaseModel):
         self.address = address.upper() if address else None
 
     @classmethod
-    def _create_table(cls):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                cnpj TEXT UNIQUE NOT NULL,
-                contact_person TEXT,
-                phone TEXT,
-                email TEXT,
-                address TEXT
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_suppliers_name ON {cls._table_name} (name COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_suppliers_cnpj ON {cls._table_name} (cnpj COLLATE NOCASE)")
-        conn.commit()
-        conn.close()
+    def _create_table(cls, cursor=None):
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    cnpj TEXT UNIQUE NOT NULL,
+                    contact_person TEXT,
+                    phone TEXT,
+                    email TEXT,
+                    address TEXT
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_suppliers_name ON {cls._table_name} (name COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_suppliers_cnpj ON {cls._table_name} (cnpj COLLATE NOCASE)")
 
     @classmethod
     def search(cls, query):
         conn = get_db_connection()
         cursor = conn.cursor()
-        search_query = f"%{query.upper()}%"
+        search_query = f"%{fold_text(query)}%"
         cursor.execute(f"""
             SELECT id, name, cnpj, contact_person, phone, email, address
             FROM {cls._table_name}
-            WHERE UPPER(name) LIKE ? OR UPPER(cnpj) LIKE ? OR UPPER(contact_person) LIKE ? OR UPPER(address) LIKE ?
+            WHERE name_norm LIKE ? OR cnpj_norm LIKE ? OR contact_person_norm LIKE ? OR address_norm LIKE ?
         """, (search_query, search_query, search_query, search_query))
         rows = cursor.fetchall()
         conn.close()
         
-        return [cls(id=row['id'], **{k: row[k] for k in cls._fields}) for row in rows]
+        return list(cls._from_rows(rows))
 
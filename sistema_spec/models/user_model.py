@@ -1,11 +1,12 @@
 # models/user_model.py
-from models.base_model import BaseModel, get_db_connection
+from models.base_model import BaseModel, get_db_connection, unit_of_work
 import sqlite3
 import bcrypt
 
 class User(BaseModel):
     _table_name = "users"
     _fields = ["username", "password_hash", "role", "is_active"]
+    __slots__ = tuple(_fields)
 
     def __init__(self, id=None, username=None, password_hash=None, role=None, is_active=1):
         super().__init__(id)
@@ -15,25 +16,22 @@ class User(BaseModel):
         self.is_active = is_active # 0 for inactive, 1 for active
 
     @classmethod
-    def _create_table(cls):
+    def _create_table(cls, cursor=None):
         """Cria a tabela de usuários se ela não existir."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {cls._table_name} (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT NOT NULL UNIQUE,
-                password_hash TEXT NOT NULL,
-                role TEXT NOT NULL, -- e.g., 'Administrador', 'Funcionário', 'Gerente'
-                is_active INTEGER DEFAULT 1 -- 'is_active' column
-            )
-        """)
-        # Adicionando índices
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_users_username ON {cls._table_name} (username COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_users_role ON {cls._table_name} (role COLLATE NOCASE)")
-        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_users_is_active ON {cls._table_name} (is_active)")
-        conn.commit()
-        conn.close()
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {cls._table_name} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT NOT NULL UNIQUE,
+                    password_hash TEXT NOT NULL,
+                    role TEXT NOT NULL, -- e.g., 'Administrador', 'Funcionário', 'Gerente'
+                    is_active INTEGER DEFAULT 1 -- 'is_active' column
+                )
+            """)
+            # Adicionando índices
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_users_username ON {cls._table_name} (username COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_users_role ON {cls._table_name} (role COLLATE NOCASE)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_users_is_active ON {cls._table_name} (is_active)")
 
     def set_password(self, password):
         """Define a senha do usuário, armazenando o hash."""
@@ -52,7 +50,7 @@ class User(BaseModel):
             cursor.execute(f"SELECT * FROM {cls._table_name} WHERE username = ?", (username,))
             row = cursor.fetchone()
             if row:
-                return cls(id=row['id'], **{k: row[k] for k in cls._fields})
+                return cls._from_row(row)
             # CORREÇÃO AQUI: O finally garantirá que a conexão seja fechada.
             # O 'return None' está fora do try, mas é o comportamento desejado.
             return None
@@ -60,18 +58,19 @@ class User(BaseModel):
             conn.close()
 
     @classmethod
-    def search(cls, query_text):
+    def search(cls, query_text, fields=None):
         """
         Busca usuários por nome de usuário.
-        Retorna uma lista de objetos User.
+        Retorna uma lista de objetos User (parciais, se 'fields' for informado).
         """
+        select_list = cls._select_list(fields or cls._fields)
         conn = get_db_connection()
         try:
             cursor = conn.cursor()
             search_term = f'%{query_text.lower()}%'
             
             sql_query = f"""
-                SELECT id, username, password_hash, role, is_active
+                SELECT {select_list}
                 FROM {cls._table_name}
                 WHERE LOWER(username) LIKE ?
                 ORDER BY username
@@ -81,7 +80,7 @@ class User(BaseModel):
             cursor.execute(sql_query, params)
             rows = cursor.fetchall()
             
-            return [cls(id=row['id'], **{k: row[k] for k in cls._fields}) for row in rows]
+            return list(cls._from_rows(rows))
         finally:
             conn.close()
 
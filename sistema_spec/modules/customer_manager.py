@@ -1,10 +1,12 @@
 # modules/customer_manager.py
 from models.customer_model import Customer
+from models.base_model import get_db_connection
+from models.migrations import ensure_schema
 
 class CustomerManager:
     def __init__(self):
         # Garante que a tabela de clientes existe
-        Customer._create_table()
+        ensure_schema()
 
     def add_customer(self, name, cpf_cnpj, phone, email, street=None, number=None, neighborhood=None, city=None, zip_code=None):
         """Adiciona um novo cliente."""
@@ -60,22 +62,37 @@ class CustomerManager:
 
     def delete_customer(self, customer_id):
         """Deleta um cliente."""
-        # TODO: Adicionar verificação de dependências (vendas, OS) antes de deletar
-        Customer.delete(customer_id)
+        # Com foreign_keys=ON o SQLite recusa a exclusão se houver vendas/OS vinculadas.
+        if not Customer.delete(customer_id):
+            return False, "Não foi possível remover o cliente. Verifique se existem vendas ou ordens de serviço vinculadas."
         return True, "Cliente removido com sucesso!"
 
-    def get_all_customers(self):
-        """Retorna todos os clientes."""
-        return Customer.get_all()
+    def get_all_customers(self, fields=None):
+        """Retorna todos os clientes (apenas com os campos em 'fields', se informado)."""
+        return Customer.get_all(fields=fields)
+
+    def get_completion_keys(self):
+        """
+        Pares (chave, id do cliente) com o nome, CPF/CNPJ e telefone de todos os clientes já
+        normalizados (colunas *_norm, gravadas com fold_text), para o autocompletar dos diálogos
+        (utils.completion_index) sem normalizar o cadastro inteiro a cada abertura.
+        """
+        conn = get_db_connection()
+        try:
+            rows = conn.execute("SELECT id, name_norm, cpf_cnpj_norm, phone_norm FROM customers").fetchall()
+        finally:
+            conn.close()
+        return [(key, row[0]) for row in rows for key in row[1:] if key]
 
     def get_customer_by_id(self, customer_id):
         """Retorna um cliente pelo ID."""
         return Customer.get_by_id(customer_id)
 
-    def search_customers(self, query):
+    def search_customers(self, query, fields=None, match="contains"):
         """
         Busca clientes por nome, CPF/CNPJ, email, telefone, rua, número, bairro, cidade, CEP.
         Este método usará a busca multi-coluna de Customer.search.
+        Com match='prefix' (completers), só o início do nome, CPF/CNPJ ou telefone, pelos índices.
         """
-        return Customer.search(query) # O `column='name'` é o padrão no modelo, então 1 argumento aqui está correto.
+        return Customer.search(query, fields=fields, match=match) # O `column='name'` é o padrão no modelo, então 1 argumento aqui está correto.
 
@@ -1,11 +1,13 @@
 # modules/financial_manager.py
 from models.financial_transaction_model import FinancialTransaction
-from models.base_model import get_db_connection
+from models.base_model import get_db_connection, iter_query, keyset_condition
+from models.migrations import ensure_schema
+from utils.helpers import fold_text
 import sqlite3
 
 class FinancialManager:
     def __init__(self):
-        FinancialTransaction._create_table()
+        ensure_schema()
 
     def add_transaction(self, transaction_date, amount, type, category=None, description=None, related_entity_id=None, related_entity_type=None):
         """Adiciona uma nova transação financeira (receita ou despesa)."""
@@ -44,14 +46,13 @@ class FinancialManager:
         FinancialTransaction.delete(transaction_id)
         return True, "Transação removida com sucesso!"
 
-    def get_all_transactions(self, transaction_type_filter=None, start_date=None, end_date=None):
+    def get_all_transactions(self, transaction_type_filter=None, start_date=None, end_date=None, limit=None, after=None):
         """
         Retorna todas as transações financeiras, opcionalmente filtradas por data e tipo.
         As datas devem estar no formato TEXT (YYYY-MM-DD HH:MM:SS).
+        Com 'limit', retorna apenas uma página (mais recentes primeiro); para a seguinte, passe em 'after'
+        a chave (transaction_date, id) da última transação recebida.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         sql_query = f"SELECT id, transaction_date, amount, type, category, description, related_entity_id, related_entity_type FROM {FinancialTransaction._table_name}"
         params = []
         where_clauses = []
@@ -65,17 +66,20 @@ class FinancialManager:
         if end_date:
             where_clauses.append("transaction_date <= ?")
             params.append(end_date)
+        if after is not None:
+            condition, keyset_params = keyset_condition(["transaction_date", "id"], after, descending=True)
+            where_clauses.append(condition)
+            params.extend(keyset_params)
         
         if where_clauses:
             sql_query += " WHERE " + " AND ".join(where_clauses)
         
         sql_query += " ORDER BY transaction_date DESC, id DESC"
+        if limit is not None:
+            sql_query += " LIMIT ?"
+            params.append(limit)
 
-        cursor.execute(sql_query, params)
-        rows = cursor.fetchall()
-        conn.close()
-
-        return [FinancialTransaction(id=row['id'], **{k: row[k] for k in FinancialTransaction._fields}) for row in rows]
+        return list(FinancialTransaction._from_rows(iter_query(sql_query, params)))
 
 
     def get_transaction_by_id(self, transaction_id):
@@ -89,13 +93,13 @@ class FinancialManager:
         """
         conn = get_db_connection()
         cursor = conn.cursor()
-        search_term = f'%{query_text.lower()}%'
+        search_term = f'%{fold_text(query_text)}%'
         
         sql_query = f"""
             SELECT id, transaction_date, amount, type, category, description, related_entity_id, related_entity_type
             FROM {FinancialTransaction._table_name}
-            WHERE (LOWER(category) LIKE ? OR
-                  LOWER(description) LIKE ?)
+            WHERE (category_norm LIKE ? OR
+                  description_norm LIKE ?)
         """
         params = [search_term, search_term]
         
@@ -116,7 +120,7 @@ class FinancialManager:
         conn.close()
         
         # Note: 'cls' is not defined here, assuming it's meant to be FinancialTransaction
-        return [FinancialTransaction(id=row['id'], **{k: row[k] for k in FinancialTransaction._fields}) for row in rows]
+        return list(FinancialTransaction._from_rows(rows))
 
 
     def get_balance(self, start_date=None, end_date=None):
@@ -127,33 +131,30 @@ class FinancialManager:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Query para receitas
-        revenue_query = "SELECT SUM(amount) FROM financial_transactions WHERE type = 'Receita'"
-        revenue_params = []
-        # Query para despesas
-        expense_query = "SELECT SUM(amount) FROM financial_transactions WHERE type = 'Despesa'"
-        expense_params = []
+        # Receitas e despesas somadas em uma única passada pela tabela
+        sql = """
+            SELECT
+                SUM(CASE WHEN type = 'Receita' THEN amount END),
+                SUM(CASE WHEN type = 'Despesa' THEN amount END)
+            FROM financial_transactions
+        """
+        params = []
 
         where_clauses = []
         if start_date:
             where_clauses.append("transaction_date >= ?")
-            revenue_params.append(start_date)
-            expense_params.append(start_date)
+            params.append(start_date)
         if end_date:
             where_clauses.append("transaction_date <= ?")
-            revenue_params.append(end_date)
-            expense_params.append(end_date)
+            params.append(end_date)
 
         if where_clauses:
-            where_str = " AND ".join(where_clauses)
-            revenue_query += f" AND {where_str}"
-            expense_query += f" AND {where_str}"
-
-        cursor.execute(revenue_query, revenue_params)
-        total_revenue = cursor.fetchone()[0] or 0.0
+            sql += " WHERE " + " AND ".join(where_clauses)
 
-        cursor.execute(expense_query, expense_params)
-        total_expense = cursor.fetchone()[0] or 0.0
+        cursor.execute(sql, params)
+        total_revenue, total_expense = cursor.fetchone()
+        total_revenue = total_revenue or 0.0
+        total_expense = total_expense or 0.0
 
         conn.close()
         
@@ -1,13 +1,15 @@
 # modules/notification_manager.py
 from models.notification_model import Notification
-from models.base_model import get_db_connection
+from models.base_model import get_db_connection, unit_of_work
+from models.migrations import ensure_schema
 from datetime import datetime
 import json
+import sqlite3
 
 
 class NotificationManager:
     def __init__(self):
-        Notification._create_table()
+        ensure_schema()
 
     def add_notification(self, type, message, entity_id=None, entity_type=None): # Argumentos são 'entity_id', 'entity_type'
         """Adiciona uma nova notificação ao sistema."""
@@ -42,14 +44,7 @@ class NotificationManager:
         rows = cursor.fetchall()
         conn.close()
         
-        result_notifications = []
-        for row in rows:
-            row_dict = dict(row)
-            notification_id = row_dict.pop('id')
-            # Aqui, os nomes das chaves em row_dict DEVEM ser 'entity_id' e 'entity_type'
-            # se a migração ou criação da tabela foi bem-sucedida.
-            result_notifications.append(Notification(id=notification_id, **row_dict))
-        return result_notifications
+        return list(Notification._from_rows(rows))
 
 
     def get_notification_by_id(self, notification_id):
@@ -67,10 +62,14 @@ class NotificationManager:
 
     def mark_all_notifications_as_read(self):
         """Marca todas as notificações como lidas."""
-        notifications = self.get_all_notifications(unread_only=True)
-        for notification in notifications:
-            notification.is_read = 1
-            notification.save()
+        try:
+            with unit_of_work():
+                notifications = self.get_all_notifications(unread_only=True)
+                for notification in notifications:
+                    notification.is_read = 1
+                Notification.update_many(notifications)
+        except sqlite3.Error as e:
+            return False, f"Erro ao marcar notificações como lidas: {e}"
         return True, "Todas as notificações marcadas como lidas."
 
     def delete_notification(self, notification_id):
@@ -91,21 +90,26 @@ class NotificationManager:
         """
         Verifica se uma peça está abaixo do estoque mínimo e adiciona uma notificação.
         Evita duplicidade de notificações para a mesma peça com o mesmo problema.
+        Quando chamada dentro de uma venda/OS, participa da mesma unidade de trabalho.
         """
         if current_stock <= min_stock:
-            existing_notifications = self.get_all_notifications(unread_only=True)
-            for notif in existing_notifications:
-                # Compara usando os nomes corretos do modelo: entity_id, entity_type
-                if notif.type == 'Estoque Baixo' and notif.entity_type == 'part' and notif.entity_id == part_id:
+            with unit_of_work() as cursor:
+                # Consulta direcionada (índice idx_notifications_entity) em vez de carregar todas as não lidas
+                cursor.execute(
+                    "SELECT 1 FROM notifications WHERE entity_type = 'part' AND entity_id = ? "
+                    "AND type = 'Estoque Baixo' AND is_read = 0 LIMIT 1",
+                    (part_id,)
+                )
+                if cursor.fetchone():
                     return False, "Já existe notificação de estoque baixo para esta peça."
-            
-            message = f"A peça ID {part_id} está com estoque baixo: {current_stock} (Mínimo: {min_stock})."
-            self.add_notification(
-                type="Estoque Baixo",
-                message=message,
-                entity_id=part_id,   # Passa como 'entity_id'
-                entity_type="part"    # Passa como 'entity_type'
-            )
+                
+                message = f"A peça ID {part_id} está com estoque baixo: {current_stock} (Mínimo: {min_stock})."
+                self.add_notification(
+                    type="Estoque Baixo",
+                    message=message,
+                    entity_id=part_id,   # Passa como 'entity_id'
+                    entity_type="part"    # Passa como 'entity_type'
+                )
             return True, "Notificação de estoque baixo gerada."
         return False, "Estoque acima do mínimo."
 
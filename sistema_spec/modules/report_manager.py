@@ -8,6 +8,7 @@ from fpdf import FPDF
 from config.settings import REPORTS_DIR
 from models.base_model import get_db_connection
 from models.report_model import Report
+from models.migrations import ensure_schema
 
 class ReportManager:
     """
@@ -18,7 +19,7 @@ class ReportManager:
         self.data_dir = data_dir
         self.reports_dir = reports_dir
         self.user_manager = user_manager
-        Report._create_table()
+        ensure_schema()
         os.makedirs(self.reports_dir, exist_ok=True)
 
     def _save_report_metadata(self, report_type, generated_by_user_id, file_path, filters):
@@ -6,182 +6,145 @@ from datetime import datetime
 
 from models.sale_model import Sale, SaleItem
 from models.part_model import Part
-from models.base_model import get_db_connection
+from models.base_model import get_db_connection, unit_of_work, iter_query, keyset_condition, evict
 from models.financial_transaction_model import FinancialTransaction
+from models.migrations import ensure_schema
+from utils.helpers import fold_text
 import sqlite3
 
 class SaleManager:
     def __init__(self, stock_manager):
         self.stock_manager = stock_manager
-        Sale._create_table()
-        SaleItem._create_table()
-        FinancialTransaction._create_table()
+        ensure_schema()
 
     def add_sale(self, sale_date, customer_id, total_amount, discount_applied, payment_method, user_id, items, is_quote=False):
         """
         Adds a new sale or quote.
         If is_quote is True, it saves as a quote without affecting stock.
         If is_quote is False, it saves as a sale and deducts stock.
+        The whole operation (sale, items, stock and low-stock notifications) runs in one unit of work.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
-            conn.execute("BEGIN TRANSACTION;")
-
-            status = "ORÇAMENTO" if is_quote else "PENDENTE PAGAMENTO"
-            
-            sale = Sale(
-                sale_date=sale_date,
-                customer_id=customer_id,
-                total_amount=total_amount,
-                discount_applied=discount_applied,
-                payment_method=payment_method,
-                user_id=user_id,
-                status=status,
-                is_quote=is_quote
-            )
-            sale.save(cursor=cursor)
-            sale_id = sale.id
-
-            for item_data in items:
-                part_id = item_data['part_id']
-                quantity = item_data['quantity']
+            with unit_of_work() as cursor:
+                status = "ORÇAMENTO" if is_quote else "PENDENTE PAGAMENTO"
+                
+                sale = Sale(
+                    sale_date=sale_date,
+                    customer_id=customer_id,
+                    total_amount=total_amount,
+                    discount_applied=discount_applied,
+                    payment_method=payment_method,
+                    user_id=user_id,
+                    status=status,
+                    is_quote=is_quote
+                )
+                sale.save(cursor=cursor)
+                sale_id = sale.id
 
-                # If it's a sale (not a quote), deduct stock
+                # If it's a sale (not a quote), deduct stock for all items at once
                 if not is_quote:
-                    part = self.stock_manager.get_part_by_id(part_id)
-                    if not part or part.stock < quantity:
-                        raise ValueError(f"Estoque insuficiente para a peça ID {part_id}.")
-                    self.stock_manager.remove_stock(part_id, quantity, user_id, cursor=cursor)
+                    movements = [(item_data['part_id'], -item_data['quantity']) for item_data in items]
+                    success, stock_message = self.stock_manager.apply_stock_movements(movements, user_id, cursor=cursor)
+                    if not success:
+                        raise ValueError(stock_message)
 
-                sale_item = SaleItem(
-                    sale_id=sale_id,
-                    part_id=part_id,
-                    quantity=quantity,
-                    unit_price=item_data['unit_price'],
-                    subtotal=item_data['subtotal']
-                )
-                sale_item.save(cursor=cursor)
+                self._insert_sale_items(sale_id, items, cursor)
             
-            conn.commit()
             message = "Orçamento salvo com sucesso!" if is_quote else "Venda adicionada com sucesso!"
             return True, message, sale_id
         except ValueError as ve:
-            conn.rollback()
             return False, f"Erro: {ve}", None
         except Exception as e:
-            conn.rollback()
             return False, f"Erro inesperado ao adicionar venda: {e}", None
-        finally:
-            conn.close()
 
     def update_sale(self, sale_id, sale_date, customer_id, total_amount, discount_applied, payment_method, user_id, items, is_quote=False):
         """
         Updates an existing sale or quote.
         Handles stock adjustments based on changes in items and quote status.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
-            conn.execute("BEGIN TRANSACTION;")
-
-            sale = Sale.get_by_id(sale_id)
-            if not sale:
-                return False, "Venda/Orçamento não encontrado.", None
-
-            # Reverte o estoque dos itens antigos da venda (se não era um orçamento)
-            old_items = self.get_sale_items(sale_id, cursor)
-            if not sale.is_quote: # Se a venda original não era um orçamento, devolve o estoque
-                for old_item in old_items:
-                    self.stock_manager.add_stock(old_item.part_id, old_item.quantity, user_id, cursor=cursor)
-            
-            # Deleta todos os itens antigos para substituí-los pelos novos
-            cursor.execute("DELETE FROM sale_items WHERE sale_id = ?", (sale_id,))
-
-            # Atualiza os dados principais da venda
-            sale.sale_date = sale_date
-            sale.customer_id = customer_id
-            sale.total_amount = total_amount
-            sale.discount_applied = discount_applied
-            sale.payment_method = payment_method
-            sale.user_id = user_id # O usuário que está editando
-            sale.is_quote = is_quote
-            
-            # Ajusta o status se for uma conversão de orçamento para venda
-            if not is_quote and sale.is_quote: # Se era orçamento e agora é venda
-                sale.status = "PENDENTE PAGAMENTO"
-            elif is_quote and not sale.is_quote: # Se era venda e agora é orçamento (raro, mas possível)
-                sale.status = "ORÇAMENTO"
-
-            sale.save(cursor=cursor)
-
-            # Adiciona os novos itens e deduz o estoque se for uma venda
-            for item_data in items:
-                part_id = item_data['part_id']
-                quantity = item_data['quantity']
-
-                if not is_quote: # Se for uma venda (não orçamento), deduz o estoque
-                    part = self.stock_manager.get_part_by_id(part_id)
-                    if not part or part.stock < quantity:
-                        raise ValueError(f"Estoque insuficiente para a peça ID {part_id}.")
-                    self.stock_manager.remove_stock(part_id, quantity, user_id, cursor=cursor)
-
-                sale_item = SaleItem(
-                    sale_id=sale_id,
-                    part_id=part_id,
-                    quantity=quantity,
-                    unit_price=item_data['unit_price'],
-                    subtotal=item_data['subtotal']
-                )
-                sale_item.save(cursor=cursor)
+            with unit_of_work() as cursor:
+                sale = Sale.get_by_id(sale_id)
+                if not sale:
+                    return False, "Venda/Orçamento não encontrado.", None
+
+                # Devolve o estoque dos itens antigos (se não era um orçamento) e deduz o dos novos
+                # (se for uma venda) em uma única movimentação, com as quantidades já compensadas.
+                movements = []
+                if not sale.is_quote:
+                    movements += [(old_item.part_id, old_item.quantity) for old_item in self.get_sale_items(sale_id, cursor)]
+                if not is_quote:
+                    movements += [(item_data['part_id'], -item_data['quantity']) for item_data in items]
+                success, stock_message = self.stock_manager.apply_stock_movements(movements, user_id, cursor=cursor)
+                if not success:
+                    raise ValueError(stock_message)
+                
+                # Deleta todos os itens antigos para substituí-los pelos novos
+                cursor.execute("DELETE FROM sale_items WHERE sale_id = ?", (sale_id,))
+                evict(SaleItem)
+
+                # Atualiza os dados principais da venda
+                sale.sale_date = sale_date
+                sale.customer_id = customer_id
+                sale.total_amount = total_amount
+                sale.discount_applied = discount_applied
+                sale.payment_method = payment_method
+                sale.user_id = user_id # O usuário que está editando
+                sale.is_quote = is_quote
+                
+                # Ajusta o status se for uma conversão de orçamento para venda
+                if not is_quote and sale.is_quote: # Se era orçamento e agora é venda
+                    sale.status = "PENDENTE PAGAMENTO"
+                elif is_quote and not sale.is_quote: # Se era venda e agora é orçamento (raro, mas possível)
+                    sale.status = "ORÇAMENTO"
+
+                sale.save(cursor=cursor)
+
+                # Adiciona os novos itens
+                self._insert_sale_items(sale_id, items, cursor)
             
-            conn.commit()
             message = "Orçamento atualizado com sucesso!" if is_quote else "Venda atualizada com sucesso!"
             return True, message, sale_id
         except ValueError as ve:
-            conn.rollback()
             return False, f"Erro: {ve}", None
         except Exception as e:
-            conn.rollback()
             return False, f"Erro inesperado ao atualizar venda: {e}", None
-        finally:
-            conn.close()
 
     def delete_sale(self, sale_id, user_id=None):
         """Deletes a sale or quote and returns parts to stock if it was a sale."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
-            conn.execute("BEGIN TRANSACTION;")
+            with unit_of_work() as cursor:
+                sale = Sale.get_by_id(sale_id)
+                if not sale:
+                    return False, "Venda/Orçamento não encontrado.", None
+
+                # Se era uma venda (não orçamento), devolve as peças ao estoque
+                if not sale.is_quote:
+                    items_to_return_to_stock = self.get_sale_items(sale_id, cursor)
+                    # Peças removidas do cadastro depois da venda não têm estoque a devolver
+                    success, stock_message = self.stock_manager.apply_stock_movements(
+                        [(item.part_id, item.quantity) for item in items_to_return_to_stock], user_id, cursor=cursor,
+                        skip_missing=True
+                    )
+                    if not success:
+                        raise ValueError(stock_message)
+                
+                # Deleta a venda (ON DELETE CASCADE no SaleItem cuidará dos itens)
+                Sale.delete(sale_id, cursor=cursor)
+                evict(SaleItem)  # Removidos pelo ON DELETE CASCADE
 
-            sale = Sale.get_by_id(sale_id)
-            if not sale:
-                return False, "Venda/Orçamento não encontrado.", None
-
-            # Se era uma venda (não orçamento), devolve as peças ao estoque
-            if not sale.is_quote:
-                items_to_return_to_stock = self.get_sale_items(sale_id, cursor)
-                for item in items_to_return_to_stock:
-                    self.stock_manager.add_stock(item.part_id, item.quantity, user_id, cursor=cursor)
-            
-            # Deleta a venda (ON DELETE CASCADE no SaleItem cuidará dos itens)
-            Sale.delete(sale_id, cursor=cursor)
-
-            conn.commit()
             return True, "Venda/Orçamento removido com sucesso e estoque atualizado (se aplicável)!"
         except Exception as e:
-            conn.rollback()
             return False, f"Erro ao remover venda/orçamento: {e}"
-        finally:
-            conn.close()
             
-    def get_all_sales_for_display(self, query=None, start_date=None, end_date=None, status_filter=None, is_quote_filter=None):
+    def get_all_sales_for_display(self, query=None, start_date=None, end_date=None, status_filter=None, is_quote_filter=None,
+                                  limit=None, after=None):
         """
         Fetches all sales/quotes for display in the UI, with customer and user names.
         Can be filtered by a search query, date range, and status.
+        With 'limit', returns a single page (newest first); pass the id of the last sale
+        received as 'after' to get the next one. Rows are streamed with fetchmany.
         """
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
             sql = """
                 SELECT 
@@ -201,14 +164,14 @@ class SaleManager:
             where_clauses = []
 
             if query:
-                search_term = f"%{query}%"
+                folded_term = f"%{fold_text(query)}%"  # Acentos, maiúsculas e pontuação ignorados
                 where_clauses.append(f"""
-                    (LOWER(c.name) LIKE ? OR 
-                    LOWER(s.status) LIKE ? OR 
-                    LOWER(s.payment_method) LIKE ? OR 
+                    (c.name_norm LIKE ? OR 
+                    s.status_norm LIKE ? OR 
+                    s.payment_method_norm LIKE ? OR 
                     CAST(s.id AS TEXT) LIKE ?)
                 """)
-                params.extend([search_term, search_term, search_term, search_term])
+                params.extend([folded_term, folded_term, folded_term, f"%{query}%"])
             
             if start_date:
                 where_clauses.append("s.sale_date >= ?")
@@ -222,18 +185,30 @@ class SaleManager:
             if is_quote_filter is not None:
                 where_clauses.append("s.is_quote = ?")
                 params.append(1 if is_quote_filter else 0) # SQLite stores booleans as 0 or 1
+            if after is not None:
+                condition, keyset_params = keyset_condition(["s.id"], after, descending=True)
+                where_clauses.append(condition)
+                params.extend(keyset_params)
 
             if where_clauses:
                 sql += " WHERE " + " AND ".join(where_clauses)
             
             sql += " ORDER BY s.id DESC"
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(limit)
             
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            return [dict(row) for row in iter_query(sql, params)]
         except Exception as e:
             print(f"Error fetching sales for display: {e}")
             return []
+
+    def get_total_sales_amount(self):
+        """Soma o valor de todas as vendas (orçamentos excluídos) direto no banco."""
+        conn = get_db_connection()
+        try:
+            total = conn.execute("SELECT SUM(total_amount) FROM sales WHERE is_quote = 0").fetchone()[0]
+            return total or 0.0
         finally:
             conn.close()
 
@@ -242,32 +217,24 @@ class SaleManager:
         if not quote or not quote.is_quote:
             return False, "Orçamento não encontrado ou já é uma venda."
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
-            conn.execute("BEGIN TRANSACTION;")
-            
-            items = self.get_sale_items(sale_id, cursor)
-            for item in items:
-                part = self.stock_manager.get_part_by_id(item.part_id)
-                if not part or part.stock < item.quantity:
-                    raise ValueError(f"Estoque insuficiente para a peça {part.name} para converter o orçamento.")
-                self.stock_manager.remove_stock(item.part_id, item.quantity, user_id, cursor=cursor)
+            with unit_of_work() as cursor:
+                items = self.get_sale_items(sale_id, cursor)
+                success, message = self.stock_manager.apply_stock_movements(
+                    [(item.part_id, -item.quantity) for item in items], user_id, cursor=cursor
+                )
+                if not success:
+                    raise ValueError(f"{message} Não foi possível converter o orçamento.")
 
-            quote.is_quote = False
-            quote.status = "PENDENTE PAGAMENTO"
-            quote.save(cursor=cursor)
+                quote.is_quote = False
+                quote.status = "PENDENTE PAGAMENTO"
+                quote.save(cursor=cursor)
 
-            conn.commit()
             return True, "Orçamento convertido em venda com sucesso!"
         except ValueError as ve:
-            conn.rollback()
             return False, f"Erro ao converter orçamento: {ve}"
         except Exception as e:
-            conn.rollback()
             return False, f"Erro inesperado: {e}"
-        finally:
-            conn.close()
 
     def mark_sale_as_paid(self, sale_id, closed_by_user_id):
         sale = Sale.get_by_id(sale_id)
@@ -276,32 +243,41 @@ class SaleManager:
         if sale.status == "PAGA":
             return False, "Esta venda já foi paga."
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
         try:
-            conn.execute("BEGIN TRANSACTION;")
-            sale.status = "PAGA"
-            sale.closed_by_user_id = closed_by_user_id
-            sale.save(cursor=cursor)
-
-            transaction = FinancialTransaction(
-                transaction_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), # Full timestamp
-                amount=sale.total_amount,
-                type="Receita",
-                category="Venda",
-                description=f"Receita da Venda ID {sale.id}",
-                related_entity_id=sale.id,
-                related_entity_type="sale"
-            )
-            transaction.save(cursor=cursor)
+            with unit_of_work() as cursor:
+                sale.status = "PAGA"
+                sale.closed_by_user_id = closed_by_user_id
+                sale.save(cursor=cursor)
+
+                transaction = FinancialTransaction(
+                    transaction_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), # Full timestamp
+                    amount=sale.total_amount,
+                    type="Receita",
+                    category="Venda",
+                    description=f"Receita da Venda ID {sale.id}",
+                    related_entity_id=sale.id,
+                    related_entity_type="sale"
+                )
+                transaction.save(cursor=cursor)
 
-            conn.commit()
             return True, f"Venda ID {sale_id} marcada como paga e receita registrada."
         except Exception as e:
-            conn.rollback()
             return False, f"Erro ao marcar venda como paga: {e}"
-        finally:
-            conn.close()
+
+    def _insert_sale_items(self, sale_id, items, cursor):
+        """Inserts all items of a sale with a single executemany."""
+        sale_items = [
+            SaleItem(
+                sale_id=sale_id,
+                part_id=item_data['part_id'],
+                quantity=item_data['quantity'],
+                unit_price=item_data['unit_price'],
+                subtotal=item_data['subtotal']
+            )
+            for item_data in items
+        ]
+        if not SaleItem.insert_many(sale_items, cursor=cursor):
+            raise ValueError("Não foi possível salvar os itens da venda.")
 
     def get_sale_items(self, sale_id, cursor=None):
         if cursor:
@@ -312,15 +288,19 @@ class SaleManager:
         try:
             local_cursor.execute("SELECT * FROM sale_items WHERE sale_id = ?", (sale_id,))
             rows = local_cursor.fetchall()
-            return [SaleItem(**dict(row)) for row in rows]
+            return list(SaleItem._from_rows(rows))
         finally:
             if close_conn:
                 conn.close()
     
     def get_sale_details_for_email(self, sale_id):
-        sale = Sale.get_by_id(sale_id)
-        if not sale: return None
-        items = self.get_sale_items(sale_id)
+        # Leitura em uma única transação: as peças dos itens vêm em uma consulta só (get_many)
+        # e repetições são servidas pelo mapa de identidade.
+        with unit_of_work(immediate=False):
+            sale = Sale.get_by_id(sale_id)
+            if not sale: return None
+            items = self.get_sale_items(sale_id)
+            parts = Part.get_many(item.part_id for item in items)
         
         details = f"Detalhes do {'Orçamento' if sale.is_quote else 'Venda'} ID: {sale.id}\n"
         details += f"Data: {sale.sale_date.split('T')[0]}\n" # Apenas a data
@@ -329,7 +309,7 @@ class SaleManager:
         details += "Itens:\n"
         details += "--------------------------------\n"
         for item in items:
-            part = Part.get_by_id(item.part_id)
+            part = parts.get(item.part_id)
             part_name = part.name if part else "Peça Removida"
             details += f"- {part_name}: {item.quantity} x R$ {item.unit_price:.2f} = R$ {item.subtotal:.2f}\n"
         details += "--------------------------------\n"
@@ -1,5 +1,6 @@
 # modules/settings_manager.py
 from models.settings_model import Setting
+from models.migrations import ensure_schema
 
 class SettingsManager:
     """
@@ -8,7 +9,7 @@ class SettingsManager:
     """
     def __init__(self):
         """Ensures the settings table exists when the manager is initialized."""
-        Setting._create_table()
+        ensure_schema()
 
     def get_setting(self, key, default=None):
         """
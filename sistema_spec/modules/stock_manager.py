@@ -1,12 +1,15 @@
 # modules/stock_manager.py
-from models.part_model import Part
-from models.base_model import get_db_connection
+from models.part_model import Part, normalize_code
+from models import part_equivalence, parts_catalog
+from models.base_model import get_db_connection, unit_of_work, evict, on_commit
+from models.migrations import ensure_schema
+from config.settings import DB_FETCH_BATCH_SIZE, DB_PAGE_SIZE
 from modules.notification_manager import NotificationManager
 import sqlite3
 
 class StockManager:
     def __init__(self, notification_manager=None):
-        Part._create_table()
+        ensure_schema()
         self.notification_manager = notification_manager
 
     def add_part(self, name, description, part_number, manufacturer, price, cost,
@@ -40,10 +43,17 @@ class StockManager:
                 similar_code_01=similar_code_01, similar_code_02=similar_code_02,
                 barcode=barcode
             )
-            part.save()
+            with unit_of_work() as cursor:
+                if not part.save():
+                    # The failed save marked the transaction to be rolled back; leaving the block
+                    # raises with the database error, which is reported below
+                    return False, "Error adding part: it could not be saved."
+                part_equivalence.refresh([part.id], cursor)
+                self._update_catalog(lambda catalog: catalog.put(part))
 
-            if self.notification_manager:
-                self.notification_manager.check_low_stock(part.id, part.stock, part.min_stock)
+                if self.notification_manager:
+                    self.notification_manager.check_low_stock(part.id, part.stock, part.min_stock)
+            Part.remember_name(part.name)
 
             return True, "Part added successfully!"
         except Exception as e:
@@ -82,69 +92,293 @@ class StockManager:
                 return False, f"A part with Barcode '{barcode}' already exists for another record."
 
 
+            old_codes = [getattr(part, column) for column in Part._code_columns]
             part.name = name; part.description = description; part.part_number = part_number;
             part.manufacturer = manufacturer; part.price = price; part.cost = cost;
             part.stock = stock; part.min_stock = min_stock; part.location = location;
             part.supplier_id = supplier_id; part.category = category;
             part.original_code = original_code; part.similar_code_01 = similar_code_01;
             part.similar_code_02 = similar_code_02; part.barcode = barcode;
-            part.save()
+            try:
+                with unit_of_work() as cursor:
+                    if not part.save():
+                        # The failed save marked the transaction to be rolled back; leaving the block
+                        # raises with the database error, which is reported below
+                        return False, "Error updating part: it could not be saved."
+                    if old_codes != [getattr(part, column) for column in Part._code_columns]:
+                        part_equivalence.refresh([part.id], cursor)
+                    self._update_catalog(lambda catalog: catalog.put(part))
 
-            if self.notification_manager:
-                self.notification_manager.check_low_stock(part.id, part.stock, part.min_stock)
+                    if self.notification_manager:
+                        self.notification_manager.check_low_stock(part.id, part.stock, part.min_stock)
+            except sqlite3.Error as e:
+                return False, f"Error updating part: {e}"
+            Part.remember_name(part.name)
 
             return True, "Part updated successfully!"
         return False, "Part not found."
 
     def delete_part(self, part_id):
         """Deletes a part."""
-        Part.delete(part_id)
+        try:
+            with unit_of_work() as cursor:
+                # The remaining parts of its equivalence class may no longer be linked to each other
+                members = part_equivalence.class_members(part_id)
+                if not Part.delete(part_id):
+                    # Nothing deleted; on a database error, leaving the block raises it (see below)
+                    return False, "Part not found."
+                part_equivalence.refresh(members, cursor)
+                self._update_catalog(lambda catalog: catalog.discard(part_id))
+        except sqlite3.Error as e:
+            return False, f"Error removing part: {e}"
         return True, "Part removed successfully!"
 
-    def get_all_parts(self):
-        """Returns all parts."""
-        return Part.get_all()
+    def get_all_parts(self, after_id=None, limit=None, fields=None):
+        """
+        Returns all parts, or a single page of them when 'limit' is given
+        (keyset pagination: pass the id of the last part received as 'after_id').
+        With 'fields', only those columns are read (see BaseModel._select_list).
+        """
+        if limit is None and after_id is None:
+            return Part.get_all(fields=fields)
+        return Part.get_page(after_id, limit or DB_PAGE_SIZE, fields=fields)
+
+    def get_parts_catalog(self):
+        """
+        The process-wide in-memory parts catalog (see models/parts_catalog.py): id, name, codes,
+        price, stock and location of every part, read once and kept current by this manager's
+        changes. Dialogs and completers read it instead of calling get_all_parts().
+        """
+        return parts_catalog.get_catalog()
+
+    @staticmethod
+    def _update_catalog(change):
+        """Applies 'change(catalog)' to the parts catalog once the current transaction commits."""
+        on_commit(lambda: parts_catalog.update(change))
+
+    def iter_parts(self, batch_size=DB_FETCH_BATCH_SIZE):
+        """Yields every part in id order, reading them from the database in batches."""
+        return Part.iter_all(batch_size)
 
     def get_part_by_id(self, part_id):
         """Returns a part by ID."""
         return Part.get_by_id(part_id)
 
-    def search_parts(self, query):
-        """Searches for parts by name, part number, manufacturer, or codes."""
+    def find_part_by_code(self, code, fields=None):
+        """
+        Fast path for the counter: resolves an exact barcode, part number, original or
+        similar code through the unique indexes. Returns the Part or None; callers fall
+        back to search_parts() when nothing matches.
+        """
+        return Part.get_by_code(code, fields=fields)
+
+    def find_parts_by_code(self, code, fields=None):
+        """
+        Resolves any supplier or OEM code (punctuation and case ignored) to the parts that
+        carry it, with one indexed query on part_codes. Returns a list, best match first.
+        """
+        return Part.find_by_code(code, fields=fields)
+
+    def get_part_codes(self, part_id):
+        """Returns every code of a part as a list of (kind, code) tuples."""
+        conn = get_db_connection()
+        try:
+            rows = conn.execute("SELECT kind, code FROM part_codes WHERE part_id = ? ORDER BY kind, code", (part_id,))
+            return [(row['kind'], row['code']) for row in rows]
+        finally:
+            conn.close()
+
+    def add_part_code(self, part_id, code, kind="similar"):
+        """
+        Adds an extra cross-reference code to a part (beyond the two similar_code columns).
+        'kind' is free text such as 'similar', 'supplier' or 'oem'; the column kinds are reserved.
+        """
+        normalized = normalize_code(code)
+        if not normalized:
+            return False, "Invalid code."
+        if kind in Part._code_columns:
+            return False, f"Kind '{kind}' is managed through the part's own fields."
+        try:
+            with unit_of_work() as cursor:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO part_codes (code_normalized, part_id, kind, code) VALUES (?, ?, ?, ?)",
+                    (normalized, part_id, kind, code.strip())
+                )
+                part_equivalence.refresh([part_id], cursor)
+            return True, "Code added successfully!"
+        except sqlite3.IntegrityError:
+            return False, "Part not found."
+
+    def remove_part_code(self, part_id, code, kind="similar"):
+        """Removes an extra code added with add_part_code."""
+        if kind in Part._code_columns:
+            return False, f"Kind '{kind}' is managed through the part's own fields."
+        try:
+            with unit_of_work() as cursor:
+                cursor.execute(
+                    "DELETE FROM part_codes WHERE code_normalized = ? AND part_id = ? AND kind = ?",
+                    (normalize_code(code), part_id, kind)
+                )
+                removed = cursor.rowcount
+                if removed:
+                    part_equivalence.refresh([part_id], cursor)
+        except sqlite3.Error as e:
+            return False, f"Error removing code: {e}"
+        return (True, "Code removed.") if removed else (False, "Code not found.")
+
+    def find_substitutes(self, code, in_stock_only=True, fields=None):
+        """
+        Everything the counter can sell instead of 'code': the parts carrying that code plus
+        every part transitively linked to them through shared original/similar/extra codes
+        (precomputed equivalence classes, see models/part_equivalence.py). One query; parts
+        with the most stock come first, and out-of-stock parts are left out unless asked for.
+        """
+        return part_equivalence.find_substitutes(code, in_stock_only=in_stock_only, fields=fields)
+
+    def search_parts(self, query, fields=None, match="contains"):
+        """
+        Searches for parts by name, part number, manufacturer, or codes.
+        match='prefix' (or 'auto') matches only the start of the name or of a code, through the indexes.
+        """
         # Esta chamada agora está correta, pois Part.search() sem column_name faz a busca ampla.
-        return Part.search(query)
+        return Part.search(query, fields=fields, match=match)
+
+    def fuzzy_search_parts(self, query, limit=10):
+        """
+        "Did you mean" suggestions for a query that search_parts() does not find (typos,
+        swapped digits, missing dashes): a list of (part, score) tuples, most similar first.
+        """
+        return Part.fuzzy_search(query, limit=limit)
 
     def add_stock(self, part_id, quantity, user_id=None, cursor=None):
-        """Adds a quantity to a part's stock."""
-        part = Part.get_by_id(part_id)
-        if part:
-            part.stock += quantity
-            part.save(cursor=cursor)
+        """
+        Adds a quantity to a part's stock with a single UPDATE on the primary key.
+        Joins the caller's unit of work, if any.
+        """
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(
+                "UPDATE parts SET stock = stock + ? WHERE id = ? RETURNING name, stock, min_stock",
+                (quantity, part_id)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return False, "Part not found."
+            evict(Part, [part_id])
+            part = rows[0]
+            self._update_catalog(lambda catalog: catalog.set_stock([(part_id, part['stock'])]))
             if self.notification_manager:
-                self.notification_manager.check_low_stock(part.id, part.stock, part.min_stock)
-            return True, f"Stock for '{part.name}' updated to {part.stock}."
-        return False, "Part not found."
+                self.notification_manager.check_low_stock(part_id, part['stock'], part['min_stock'])
+            return True, f"Stock for '{part['name']}' updated to {part['stock']}."
 
     def remove_stock(self, part_id, quantity, user_id=None, cursor=None):
-        """Removes a quantity from a part's stock."""
-        part = Part.get_by_id(part_id)
-        if part:
-            if part.stock >= quantity:
-                part.stock -= quantity
-                part.save(cursor=cursor)
-                if self.notification_manager:
-                    self.notification_manager.check_low_stock(part.id, part.stock, part.min_stock)
-                return True, f"Stock for '{part.name}' updated to {part.stock}."
-            else:
-                return False, f"Not enough stock for '{part.name}'. Available: {part.stock}."
-        return False, "Part not found."
+        """
+        Removes a quantity from a part's stock with a single conditional UPDATE
+        (`stock >= quantity`), so two terminals can never sell the same last unit.
+        Callers don't need to read the part beforehand: a (False, message) result
+        means the part doesn't exist or doesn't have enough stock.
+        Joins the caller's unit of work, if any.
+        """
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(
+                "UPDATE parts SET stock = stock - ? WHERE id = ? AND stock >= ? RETURNING name, stock, min_stock",
+                (quantity, part_id, quantity)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                # Caminho de falha: uma leitura apenas para montar a mensagem.
+                cursor.execute("SELECT name, stock FROM parts WHERE id = ?", (part_id,))
+                part = cursor.fetchone()
+                if part is None:
+                    return False, "Part not found."
+                return False, f"Not enough stock for '{part['name']}'. Available: {part['stock']}."
+            evict(Part, [part_id])
+            part = rows[0]
+            self._update_catalog(lambda catalog: catalog.set_stock([(part_id, part['stock'])]))
+            if self.notification_manager:
+                self.notification_manager.check_low_stock(part_id, part['stock'], part['min_stock'])
+            return True, f"Stock for '{part['name']}' updated to {part['stock']}."
+
+    def apply_stock_movements(self, movements, user_id=None, cursor=None, skip_missing=False):
+        """
+        Applies several stock movements at once. 'movements' is a list of (part_id, delta)
+        tuples (negative delta = removal); repeated parts are combined. Everything is
+        validated with one query and applied with one VALUES-join UPDATE, so a 40-line
+        order costs two statements instead of one read and one write per line.
+        Nothing is changed if any part is missing or would end with negative stock; with
+        skip_missing, movements of parts that no longer exist are dropped instead (e.g. when
+        returning the items of a deleted sale to stock).
+        Joins the caller's unit of work, if any.
+        """
+        totals = {}
+        for part_id, delta in movements:
+            if part_id is not None:
+                totals[part_id] = totals.get(part_id, 0) + delta
+        totals = {part_id: delta for part_id, delta in totals.items() if delta}
+        if not totals:
+            return True, "No stock changes."
+
+        values_sql = ", ".join(["(?, ?)"] * len(totals))
+        params = [value for pair in totals.items() for value in pair]
+        with unit_of_work(cursor) as cursor:
+            cursor.execute(f"""
+                WITH movement(part_id, delta) AS (VALUES {values_sql})
+                SELECT movement.part_id, movement.delta, parts.name, parts.stock
+                FROM movement LEFT JOIN parts ON parts.id = movement.part_id
+                WHERE parts.id IS NULL OR parts.stock + movement.delta < 0
+            """, params)
+            failures = cursor.fetchall()
+            if skip_missing and any(row['name'] is None for row in failures):
+                for row in failures:
+                    if row['name'] is None:
+                        del totals[row['part_id']]
+                failures = [row for row in failures if row['name'] is not None]
+                if not totals:
+                    return True, "No stock changes."
+                values_sql = ", ".join(["(?, ?)"] * len(totals))
+                params = [value for pair in totals.items() for value in pair]
+            if failures:
+                problems = [
+                    f"Part ID {row['part_id']} not found." if row['name'] is None
+                    else f"Not enough stock for '{row['name']}'. Available: {row['stock']}, requested: {-row['delta']}."
+                    for row in failures
+                ]
+                return False, " ".join(problems)
+
+            cursor.execute(f"""
+                WITH movement(part_id, delta) AS (VALUES {values_sql})
+                UPDATE parts SET stock = parts.stock + movement.delta
+                FROM movement
+                WHERE parts.id = movement.part_id AND parts.stock + movement.delta >= 0
+                RETURNING parts.id, parts.stock, parts.min_stock
+            """, params)
+            updated = cursor.fetchall()
+            if len(updated) != len(totals):
+                # Só acontece se outro terminal alterou o estoque fora de uma transação IMMEDIATE.
+                raise sqlite3.IntegrityError("Stock changed by another terminal while applying movements.")
+            evict(Part, totals.keys())
+            stocks = [(row['id'], row['stock']) for row in updated]
+            self._update_catalog(lambda catalog: catalog.set_stock(stocks))
+
+            if self.notification_manager:
+                for row in updated:
+                    if row['stock'] <= row['min_stock']:
+                        self.notification_manager.check_low_stock(row['id'], row['stock'], row['min_stock'])
+        return True, f"Stock updated for {len(updated)} part(s)."
 
     def get_parts_below_min_stock(self):
         """Returns a list of parts with stock below minimum."""
         conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT * FROM parts WHERE stock <= min_stock")
-        rows = cursor.fetchall()
-        conn.close()
-        return [Part(**dict(row)) for row in rows]
+        try:
+            rows = conn.execute("SELECT * FROM parts WHERE stock <= min_stock").fetchall()
+        finally:
+            conn.close()
+        return list(Part._from_rows(rows))
+
+    def count_parts_below_min_stock(self):
+        """Returns how many parts have stock below minimum, without loading them."""
+        conn = get_db_connection()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM parts WHERE stock <= min_stock").fetchone()[0]
+        finally:
+            conn.close()
 
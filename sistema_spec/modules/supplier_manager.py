@@ -1,11 +1,12 @@
 # modules/supplier_manager.py
 from models.supplier_model import Supplier
+from models.migrations import ensure_schema
 import sqlite3
 
 class SupplierManager:
     def __init__(self):
         # Garante que a tabela de fornecedores é criada quando o manager é inicializado
-        Supplier._create_table()
+        ensure_schema()
 
     def add_supplier(self, name, cnpj, contact_person, phone, email, address):
         """Adiciona um novo fornecedor."""
@@ -66,10 +67,9 @@ class SupplierManager:
 
     def delete_supplier(self, supplier_id):
         """Deleta um fornecedor."""
-        # TODO: Adicionar verificação de dependências (peças) antes de deletar
-        # Se um fornecedor tiver peças associadas, a exclusão pode gerar inconsistências.
-        # Por enquanto, apenas deleta.
-        Supplier.delete(supplier_id)
+        # Com foreign_keys=ON o SQLite recusa a exclusão se houver peças vinculadas ao fornecedor.
+        if not Supplier.delete(supplier_id):
+            return False, "Não foi possível remover o fornecedor. Verifique se existem peças vinculadas."
         return True, "Fornecedor removido com sucesso!"
 
     def get_all_suppliers(self):
@@ -80,6 +80,10 @@ class SupplierManager:
         """Retorna um fornecedor pelo ID."""
         return Supplier.get_by_id(supplier_id)
 
+    def get_suppliers_by_ids(self, supplier_ids):
+        """Retorna {id: fornecedor} para vários ids com uma única consulta."""
+        return Supplier.get_many(supplier_ids)
+
     def search_suppliers(self, query):
         """
         Busca fornecedores por nome, CNPJ ou pessoa de contato.
@@ -1,11 +1,12 @@
 # modules/user_manager.py
 from models.user_model import User
+from models.migrations import ensure_schema
 import bcrypt # Para hash de senhas
 
 class UserManager:
     def __init__(self):
         # Garante que a tabela de usuários é criada quando o manager é inicializado
-        User._create_table()
+        ensure_schema()
 
     def add_user(self, username, password, role, is_active=True): # is_active default True
         """Adiciona um novo usuário."""
@@ -43,15 +44,14 @@ class UserManager:
         if not user:
             return False, "Usuário não encontrado."
         
-        # TODO: Adicionar lógica para lidar com a exclusão de usuário que criou vendas/OS etc.
-        # Por exemplo, definir 'user_id' para NULL em registros dependentes, ou impedir exclusão.
-        # Por enquanto, apenas deleta.
-        User.delete(user_id)
+        # Com foreign_keys=ON o SQLite impede a exclusão de usuários que registraram vendas/OS etc.
+        if not User.delete(user_id):
+            return False, "Não foi possível remover o usuário. Verifique se existem vendas, ordens de serviço ou relatórios vinculados."
         return True, "Usuário deletado com sucesso."
 
-    def get_all_users(self):
-        """Retorna todos os usuários."""
-        return User.get_all()
+    def get_all_users(self, fields=None):
+        """Retorna todos os usuários (apenas com os campos em 'fields', se informado)."""
+        return User.get_all(fields=fields)
 
     def get_user_by_id(self, user_id):
         """Retorna um usuário pelo ID."""
@@ -75,9 +75,9 @@ class UserManager:
         user.save()
         return True, "Senha alterada com sucesso."
 
-    def search_users(self, query):
+    def search_users(self, query, fields=None):
         """
         Busca usuários por nome de usuário.
         Utiliza o método search do UserModel.
         """
-        return User.search(query)
\ No newline at end of file
+        return User.search(query, fields=fields)
\ No newline at end of file
@@ -1,7 +1,24 @@
 import os
-import shutil
+import sqlite3
 from datetime import datetime
 from config.settings import DATA_DIR, BACKUP_DIR, DB_NAME
+from models.base_model import get_db_connection
+from models.connection_manager import connection_manager
+from models.migrations import recheck_schema
+from models import parts_catalog
+from models.part_model import Part
+
+def _copy_database(source_conn, target_path):
+    """
+    Copia o banco usando a API de backup do SQLite.
+    Com o journal em modo WAL, copiar apenas o arquivo .db perderia as transações
+    que ainda estão no arquivo -wal.
+    """
+    target_conn = sqlite3.connect(target_path)
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        target_conn.close()
 
 def create_backup():
     """Cria um backup do banco de dados."""
@@ -13,30 +30,59 @@ def create_backup():
     backup_filename = f"autopeças_backup_{timestamp}.db"
     backup_path = os.path.join(BACKUP_DIR, backup_filename)
     
+    if not os.path.exists(db_path):
+        return False, "Erro: Banco de dados não encontrado para backup."
+
+    conn = get_db_connection()
     try:
-        shutil.copyfile(db_path, backup_path)
+        _copy_database(conn, backup_path)
         return True, f"Backup criado com sucesso: {backup_filename}"
-    except FileNotFoundError:
-        return False, "Erro: Banco de dados não encontrado para backup."
     except Exception as e:
         return False, f"Erro ao criar backup: {e}"
+    finally:
+        conn.close()
 
 def restore_backup(backup_file_path):
     """Restaura o banco de dados a partir de um arquivo de backup."""
     db_path = os.path.join(DATA_DIR, DB_NAME)
+    if not os.path.exists(backup_file_path) or not os.path.exists(db_path):
+        return False, "Erro: Arquivo de backup ou banco de dados principal não encontrado."
     
+    conn = get_db_connection()
     try:
         # Opcional: Criar um backup temporário do BD atual antes de restaurar
         # Isso pode ser útil para reverter se a restauração der errado.
         current_db_temp_backup_name = f"autopeças_pre_restore_temp_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-        shutil.copyfile(db_path, os.path.join(BACKUP_DIR, current_db_temp_backup_name))
+        _copy_database(conn, os.path.join(BACKUP_DIR, current_db_temp_backup_name))
         
-        shutil.copyfile(backup_file_path, db_path)
-        return True, "Restauração concluída com sucesso."
-    except FileNotFoundError:
-        return False, "Erro: Arquivo de backup ou banco de dados principal não encontrado."
+        # A restauração usa a própria conexão do pool, em vez de sobrescrever o arquivo
+        # enquanto outras conexões (e o arquivo -wal) ainda estão abertos.
+        source_conn = sqlite3.connect(backup_file_path)
+        try:
+            source_conn.backup(conn)
+        finally:
+            source_conn.close()
     except Exception as e:
         return False, f"Erro ao restaurar backup: {e}"
+    finally:
+        conn.close()
+
+    try:
+        _reload_database()
+    except Exception as e:
+        return False, f"Backup restaurado, mas não foi possível atualizar o esquema do banco: {e}"
+    return True, "Restauração concluída com sucesso."
+
+def _reload_database():
+    """
+    Depois da restauração o arquivo tem o conteúdo do backup, que pode ser de uma versão
+    anterior do esquema: descarta as conexões do pool e o que ficou em memória sobre o banco
+    anterior (incluindo o catálogo de peças), e aplica as migrações pendentes.
+    """
+    connection_manager.close_all()
+    Part.forget_database_state()
+    parts_catalog.invalidate()
+    recheck_schema()
 
 def get_available_backups():
     """Retorna uma lista de caminhos completos para os arquivos de backup disponíveis."""
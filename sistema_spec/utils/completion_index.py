@@ -0,0 +1,108 @@
+# utils/completion_index.py
+"""
+Autocompletar por prefixo em memória, para os completers de clientes e de peças.
+
+Os completers consultavam o banco a cada tecla (get_all_customers/search_customers) e montavam
+o texto de todas as peças encontradas. Aqui as chaves normalizadas (nome, códigos, CPF/CNPJ...)
+ficam em um vetor ordenado, com o valor de cada uma (ex.: o id do registro) em um vetor paralelo:
+as chaves que começam com um prefixo formam uma faixa contígua, achada com duas buscas binárias,
+e só os 'limit' primeiros valores dela são lidos -- o custo quase não depende do tamanho do cadastro.
+Um PrefixSearch acompanha a digitação de um campo: enquanto o texto só cresce, a busca binária
+fica restrita à faixa encontrada na tecla anterior.
+"""
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+
+def _prefix_end(prefix):
+    """Menor chave maior que todas as que começam com 'prefix' (None se não houver)."""
+    next_char = ord(prefix[-1]) + 1
+    if 0xD800 <= next_char <= 0xDFFF:
+        next_char = 0xE000
+    if next_char > 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(next_char)
+
+
+class CompletionIndex:
+    """
+    Chaves normalizadas por 'normalize' (ex.: fold_text), em ordem, cada uma com um valor.
+    'entries' são pares (texto, valor); um registro pode ter várias chaves (nome, CPF/CNPJ,
+    telefone...) e textos vazios são ignorados. Com normalized=True os textos já são chaves
+    (ex.: colunas *_norm lidas do banco) e não passam por 'normalize', que continua sendo
+    aplicado ao texto digitado. 'version' muda a cada add/remove, o que invalida as faixas
+    guardadas pelos PrefixSearch.
+    """
+    def __init__(self, normalize, entries=(), normalized=False):
+        self.normalize = normalize
+        if not normalized:
+            entries = ((normalize(text), value) for text, value in entries if text)
+        pairs = sorted(entries, key=itemgetter(0))
+        self.keys = [key for key, _ in pairs if key]
+        self.values = [value for key, value in pairs if key]
+        self.version = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, text, value):
+        key = self.normalize(text) if text else ""
+        if key:
+            position = bisect_right(self.keys, key)
+            self.keys.insert(position, key)
+            self.values.insert(position, value)
+            self.version += 1
+
+    def remove(self, text, value):
+        key = self.normalize(text) if text else ""
+        position = bisect_left(self.keys, key)
+        while key and position < len(self.keys) and self.keys[position] == key:
+            if self.values[position] == value:
+                del self.keys[position]
+                del self.values[position]
+                self.version += 1
+                return
+            position += 1
+
+    def prefix_range(self, prefix, lo=0, hi=None):
+        """Faixa [início, fim) das chaves que começam com 'prefix' (já normalizado), procurada em [lo, hi)."""
+        if hi is None:
+            hi = len(self.keys)
+        if not prefix:
+            return lo, hi
+        start = bisect_left(self.keys, prefix, lo, hi)
+        end = _prefix_end(prefix)
+        return start, bisect_left(self.keys, end, start, hi) if end is not None else hi
+
+
+class PrefixSearch:
+    """
+    Buscas sucessivas de um campo de texto em um ou mais índices: até 'limit' valores, na ordem
+    dos índices e das chaves, sem repetir valores. Se o texto normalizado começa com o da busca
+    anterior (o usuário continuou digitando), cada índice é pesquisado só na faixa anterior.
+    """
+    def __init__(self, indexes, limit):
+        self.indexes = list(indexes)
+        self.limit = limit
+        self._ranges = [None] * len(self.indexes)  # (prefixo, versão do índice, início, fim)
+
+    def complete(self, text):
+        results, seen = [], set()
+        for position, index in enumerate(self.indexes):
+            prefix = index.normalize(text) if text else ""
+            if text and not prefix:
+                continue  # Texto sem nada que este índice compare (ex.: só pontuação)
+            last = self._ranges[position]
+            if last is not None and last[1] == index.version and prefix.startswith(last[0]):
+                start, end = index.prefix_range(prefix, last[2], last[3])
+            else:
+                start, end = index.prefix_range(prefix)
+            self._ranges[position] = (prefix, index.version, start, end)
+            values = index.values
+            for row in range(start, end):
+                if len(results) >= self.limit:
+                    return results
+                if values[row] not in seen:
+                    seen.add(values[row])
+                    results.append(values[row])
+        return results
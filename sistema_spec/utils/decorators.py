@@ -1,5 +1,9 @@
+import functools
+import inspect
+
 from PySide6.QtWidgets import QMessageBox
 from config.user_roles import UserRole
+from models.query_tracer import query_tracer
 
 def login_required(func):
     """
@@ -40,4 +44,30 @@ def role_required(required_roles):
                 return
             return func(self, *args, **kwargs)
         return wrapper
+    return decorator
+
+def query_budget(max_queries=None, max_connections=None):
+    """
+    Decorator para ações da interface (load_*, add_sale, generate_report...).
+    Com o rastreamento SQL ligado (SPEC_SQL_TRACE=1), conta os comandos e conexões usados pela
+    ação e registra um aviso no log de consultas lentas se o orçamento for ultrapassado.
+    Como o método é usado como slot, argumentos extras enviados pelo sinal (o 'checked' de
+    clicked, o texto de textChanged) são descartados se o método não os aceitar.
+    """
+    def decorator(func):
+        code = func.__code__
+        max_args = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount - 1
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if max_args is not None:
+                args = args[:max_args]
+            if not query_tracer.enabled:
+                return func(self, *args, **kwargs)
+            with query_tracer.track_action(func.__qualname__, max_queries, max_connections):
+                return func(self, *args, **kwargs)
+        # O orçamento fica exposto para verificações como benchmarks/check_query_budgets.py
+        wrapper.max_queries = max_queries
+        wrapper.max_connections = max_connections
+        return wrapper
     return decorator
\ No newline at end of file
@@ -1,5 +1,6 @@
 import uuid
 import re
+import unicodedata
 from datetime import datetime
 
 def generate_unique_id():
@@ -24,4 +25,84 @@ def is_valid_phone(phone):
 
 def get_current_timestamp():
     """Retorna o timestamp atual no formato ISO 8601 para armazenamento no BD."""
-    return datetime.now().isoformat()
\ No newline at end of file
+    return datetime.now().isoformat()
+
+_NON_WORD = re.compile(r"[^\w\s]|_")
+_SPACES = re.compile(r"\s+")
+# Atalho de fold_text para textos ASCII (a maioria): minúsculas e remoção da pontuação com
+# bytes.translate, sem normalização Unicode nem regex -- mesmo resultado, várias vezes mais rápido
+_ASCII_LOWER = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+_ASCII_NON_WORD = bytes(char for char in range(128) if _NON_WORD.match(chr(char)))
+
+def fold_text(value):
+    """
+    Forma normalizada de um texto para busca: sem acentos, em minúsculas e sem pontuação,
+    com os espaços reduzidos a um só ("São  Paulo" -> "sao paulo", "123.456-78" -> "12345678").
+    É a forma gravada nas colunas *_norm dos models e aplicada ao termo digitado.
+    """
+    if value is None:
+        return ""
+    value = str(value)
+    if value.isascii():
+        return " ".join(value.encode().translate(_ASCII_LOWER, _ASCII_NON_WORD).decode().split())
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _SPACES.sub(" ", _NON_WORD.sub("", stripped.casefold())).strip()
+
+def trigrams(word):
+    """
+    Conjunto de trigramas de uma palavra já normalizada, com dois espaços antes e um depois
+    (como o pg_trgm), para que o início e o fim da palavra também contem.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def trigram_similarity(a, b):
+    """Coeficiente de Dice entre os trigramas de 'a' e 'b' (0 a 1)."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+def edit_distance(a, b):
+    """
+    Distância de edição com transposição de vizinhos (Damerau-Levenshtein restrita): inserir,
+    remover, trocar ou inverter dois caracteres vizinhos custa 1 ("ps959" -> "ps995" = 1).
+    """
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[len(b)]
+
+def word_similarity(a, b):
+    """
+    Semelhança (0 a 1) entre duas palavras normalizadas, tolerante a erros de digitação:
+    o Dice dos trigramas ou, para palavras de tamanho parecido, 1 - distância de edição / tamanho
+    ("flitro" x "filtro" = 0,83), o que for maior.
+    """
+    score = trigram_similarity(a, b)
+    if score >= 0.2 and abs(len(a) - len(b)) <= 2:
+        score = max(score, 1 - edit_distance(a, b) / max(len(a), len(b)))
+    return score
+
+def edit_neighborhood(word, alphabet):
+    """
+    Todas as palavras a uma edição de 'word' (remoção, inversão de vizinhos, troca ou inserção
+    de um caractere de 'alphabet'), incluindo a própria palavra.
+    """
+    variants = {word}
+    for i in range(len(word) + 1):
+        head, tail = word[:i], word[i:]
+        if tail:
+            variants.add(head + tail[1:])
+            if len(tail) > 1:
+                variants.add(head + tail[1] + tail[0] + tail[2:])
+        for char in alphabet:
+            variants.add(head + char + tail)
+            if tail:
+                variants.add(head + char + tail[1:])
+    return variants
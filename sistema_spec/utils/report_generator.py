@@ -5,12 +5,13 @@ from datetime import datetime
 import json # Para lidar com filters_json
 from config.settings import REPORTS_DIR
 from models.report_model import Report
+from models.migrations import ensure_schema
 from utils.helpers import get_current_timestamp
 
 class ReportGenerator:
     def __init__(self, user_id=None):
-        # Garante que a tabela de relatórios é criada quando o manager é inicializado
-        Report._create_table()
+        # Garante que o esquema (incluindo a tabela de relatórios) está atualizado
+        ensure_schema()
         os.makedirs(REPORTS_DIR, exist_ok=True)
         self.user_id = user_id # ID do usuário logado
 
@@ -145,7 +146,7 @@ class ReportGenerator:
 
         # Converte a lista de objetos FinancialTransaction para uma lista de dicionários
         # antes de criar o DataFrame.
-        financial_data_dicts = [transaction.__dict__ for transaction in financial_data]
+        financial_data_dicts = [transaction.to_dict() for transaction in financial_data]
         df = pd.DataFrame(financial_data_dicts)
 
         # Formatar colunas financeiras
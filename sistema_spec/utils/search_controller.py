@@ -0,0 +1,126 @@
+# utils/search_controller.py
+"""
+Busca enquanto o usuário digita, sem travar a interface.
+
+Antes, cada tecla nos campos de busca chamava o load_* da tela, que consultava o banco e
+reconstruía a tabela na thread da interface. O SearchController:
+- espera o usuário parar de digitar (SEARCH_DEBOUNCE_MS) antes de consultar;
+- lê o texto e os filtros da tela na thread da interface ('prepare') e executa a consulta
+  devolvida por ele em um QThreadPool (cada thread tem suas próprias conexões do pool);
+- entrega o resultado à tela ('apply') na thread da interface, descartando-o se uma busca
+  mais nova da mesma tela já tiver começado;
+- cancela a consulta superada: cada busca roda dentro de cancellable() com o seu
+  CancellationToken, e a busca seguinte da mesma chave cancela o anterior, o que interrompe
+  o SQLite em milissegundos e libera a thread do pool para a busca mais recente.
+Buscas sem campo de texto (ex.: o Dashboard) usam add() e search().
+"""
+import logging
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from config.settings import SEARCH_DEBOUNCE_MS, SEARCH_MAX_THREADS
+from models.base_model import cancellable
+from models.connection_manager import CancellationToken, QueryCancelled
+
+logger = logging.getLogger('sistema_spec_logger')
+
+
+class _SearchSignals(QObject):
+    """Vive na thread da interface; o sinal emitido pelas threads do pool chega a ela pela fila de eventos."""
+    finished = Signal(object, int, object, object)  # (chave, geração, resultado, exceção)
+
+
+class _SearchJob(QRunnable):
+    def __init__(self, signals, key, generation, query, token):
+        super().__init__()
+        self._signals = signals
+        self._key = key
+        self._generation = generation
+        self._query = query
+        self._token = token
+
+    def run(self):
+        try:
+            with cancellable(self._token):
+                result, error = self._query(), None
+        except Exception as e:
+            result, error = None, e
+        self._signals.finished.emit(self._key, self._generation, result, error)
+
+
+class _Search:
+    """Estado de uma busca: a espera da digitação, a geração e o token da busca mais recente."""
+    def __init__(self, timer, prepare, apply):
+        self.timer = timer
+        self.prepare = prepare
+        self.apply = apply
+        self.generation = 0
+        self.token = CancellationToken()
+
+    def restart(self):
+        """Supera a busca em andamento: cancela as consultas dela e devolve o token da nova."""
+        self.timer.stop()
+        self.token.cancel()
+        self.generation += 1
+        self.token = CancellationToken()
+        return self.token
+
+
+class SearchController(QObject):
+    """Buscas digitadas das telas, identificadas por uma chave (ex.: 'clientes')."""
+    def __init__(self, delay_ms=SEARCH_DEBOUNCE_MS, max_threads=SEARCH_MAX_THREADS, parent=None):
+        super().__init__(parent)
+        self._delay_ms = delay_ms
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._signals = _SearchSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._searches = {}
+
+    def add(self, key, prepare, apply):
+        """
+        Cria a busca 'key'. 'prepare()' roda na thread da interface e devolve a consulta (uma
+        função sem argumentos, executada no pool); 'apply(resultado)' exibe o resultado, também
+        na thread da interface.
+        """
+        timer = QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(self._delay_ms)
+        timer.timeout.connect(lambda: self.search(key))
+        self._searches[key] = _Search(timer, prepare, apply)
+
+    def register(self, key, line_edit, prepare, apply):
+        """Cria a busca 'key' (veja add) disparada pela digitação em 'line_edit'."""
+        self.add(key, prepare, apply)
+        timer = self._searches[key].timer
+        line_edit.textChanged.connect(lambda _text: timer.start())
+
+    def search(self, key):
+        """Inicia a busca 'key' no pool agora; a busca anterior dela é cancelada e descartada."""
+        search = self._searches[key]
+        token = search.restart()
+        self._pool.start(_SearchJob(self._signals, key, search.generation, search.prepare(), token))
+
+    def refresh(self, key):
+        """
+        Executa a busca 'key' na thread atual e exibe o resultado (recarga depois de incluir,
+        editar ou remover um registro). Buscas em andamento dela são canceladas.
+        """
+        search = self._searches[key]
+        search.restart()
+        search.apply(search.prepare()())
+
+    def cancel_all(self):
+        """Cancela todas as buscas em andamento (ex.: ao fechar a janela)."""
+        for search in self._searches.values():
+            search.restart()
+
+    def _on_finished(self, key, generation, result, error):
+        search = self._searches[key]
+        if generation != search.generation or isinstance(error, QueryCancelled):
+            logger.debug(f"Resultado da busca '{key}' descartado: uma busca mais nova já começou.")
+            return
+        if error is not None:
+            logger.error(f"Erro na busca '{key}': {error}", exc_info=error)
+            return
+        search.apply(result)
@@ -0,0 +1,108 @@
+# utils/table_models.py
+"""
+Modelo de tabela (model/view do Qt) para as listagens da aplicação.
+
+Com QTableWidget, cada listagem criava um QTableWidgetItem por célula (13 colunas x 100 mil
+peças = 1,3 milhão de objetos Qt) e ainda pintava célula a célula as linhas com estoque baixo.
+Aqui a tabela é um QTableView sobre um RecordTableModel que guarda só os registros vindos
+dos managers (Part, dicts de vendas...) e formata cada célula em data(), quando ela é desenhada.
+As linhas aparecem para a view em lotes (canFetchMore/fetchMore, chamados pelo Qt ao rolar) e,
+quando o manager tem paginação por chave, os registros também são lidos do banco página a página.
+"""
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from config.settings import DB_PAGE_SIZE
+
+
+class RecordTableModel(QAbstractTableModel):
+    """
+    Tabela somente leitura de registros.
+
+    'columns' é uma lista de (título, formatar) ou (título, formatar, alinhamento), onde
+    formatar(registro) devolve o valor exibido (None aparece vazio). 'row_background(registro)',
+    se informado, devolve a cor de fundo da linha (QColor) ou None.
+    """
+    def __init__(self, columns, row_background=None, batch_size=DB_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self._columns = list(columns)
+        self._row_background = row_background
+        self._batch_size = batch_size
+        self._records = []       # Registros já lidos
+        self._visible = 0        # Quantos deles a view já conhece (rowCount)
+        self._fetch_page = None  # fetch_page(último registro, limite) enquanto houver páginas no banco
+
+    # --- Carga ---
+    def set_records(self, records, fetch_page=None):
+        """
+        Substitui o conteúdo por uma lista já lida; as linhas são expostas à view em lotes.
+        Com 'fetch_page', 'records' é a primeira página (de batch_size registros) de uma listagem
+        paginada, lida por exemplo fora da thread da interface; veja set_pages.
+        """
+        self.beginResetModel()
+        self._records = list(records)
+        self._visible = min(len(self._records), self._batch_size)
+        self._fetch_page = fetch_page if len(self._records) >= self._batch_size else None
+        self.endResetModel()
+
+    def set_pages(self, fetch_page):
+        """
+        Substitui o conteúdo por uma listagem paginada: lê agora só a primeira página e as
+        seguintes quando a view pedir (fetchMore). fetch_page(último registro ou None, limite)
+        devolve a página seguinte; uma página menor que o limite encerra a listagem.
+        """
+        self.set_records(fetch_page(None, self._batch_size), fetch_page)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._visible < len(self._records) or self._fetch_page is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        if self._visible == len(self._records) and self._fetch_page is not None:
+            page = list(self._fetch_page(self._records[-1] if self._records else None, self._batch_size))
+            if len(page) < self._batch_size:
+                self._fetch_page = None
+            self._records.extend(page)
+        count = min(self._batch_size, len(self._records) - self._visible)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visible, self._visible + count - 1)
+        self._visible += count
+        self.endInsertRows()
+
+    # --- Acesso pelos handlers da tela ---
+    def record(self, row):
+        """Registro da linha 'row' (o objeto ou dict vindo do manager)."""
+        return self._records[row]
+
+    def text(self, row, column):
+        """Texto exibido na célula, como o item(row, column).text() do QTableWidget."""
+        value = self._columns[column][1](self._records[row])
+        return "" if value is None else str(value)
+
+    # --- Interface do QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._visible
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.text(index.row(), index.column())
+        if role == Qt.BackgroundRole and self._row_background:
+            return self._row_background(self._records[index.row()])
+        if role == Qt.TextAlignmentRole and len(self._columns[index.column()]) > 2:
+            return self._columns[index.column()][2]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section][0]
+        return str(section + 1)